@@ -0,0 +1,148 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.io import wavfile
+
+from .audio import GRAPHIC_EQ_BANDS, PER_CHANNEL_KEYS, AudioProcessor
+from .datalog import record_dtype, write_header
+
+
+def open_wav(path):
+    try:
+        sample_rate, data = wavfile.read(path, mmap=True)
+    except ValueError:
+        # 24-bit files cannot be memory-mapped.
+        sample_rate, data = wavfile.read(path)
+    data = np.asarray(data)
+    if data.ndim == 1:
+        data = data[:, None]
+    return sample_rate, data
+
+
+def to_float32(block):
+    if block.dtype == np.uint8:
+        return (block.astype(np.float32) - 128.0) / 128.0
+    if block.dtype.kind == "i":
+        return block.astype(np.float32) / float(2 ** (8 * block.dtype.itemsize - 1))
+    return block.astype(np.float32, copy=False)
+
+
+def analyze_file(path, config, interval_s=1.0, output_dir=None, output_format="bin"):
+    sample_rate, data = open_wav(path)
+    config = dict(config)
+    config.update({
+        "sample_rate": sample_rate,
+        "channels": data.shape[1],
+        "processing": "callback",
+        "event_dir": None,
+        "dose_checkpoint": None,
+    })
+    audio = AudioProcessor(config)
+
+    block_size = audio.block_size
+    record_frames = max(1, int(round(interval_s * sample_rate)))
+    spectrum_frames = max(1, int(round(audio.spectrum_interval_s * sample_rate)))
+    records = np.zeros(len(data) // record_frames, dtype=record_dtype(len(GRAPHIC_EQ_BANDS)))
+
+    started = time.perf_counter()
+    counter = audio.get_energy_counter()
+    next_record = record_frames
+    next_spectrum = spectrum_frames
+    count = 0
+    done = 0
+    # Statistics, dose, history and detections are timed by the position in
+    # the file, in seconds from its start like the records, not by the clock.
+    audio.clock = lambda: done / float(sample_rate)
+    # Blocks go through the same path the live stream and worker use, and the
+    # spectrum is refreshed on the audio clock at the live update interval.
+    # A block is cut short at a record or spectrum edge, so each happens at
+    # exactly the frame it is due and record n covers n * interval_s.
+    while done < len(data):
+        start = done
+        done = min(start + block_size, next_record, next_spectrum, len(data))
+        audio.process_block(np.ascontiguousarray(to_float32(data[start:done]).T))
+        if done == next_spectrum:
+            audio.compute_spectrum()
+            next_spectrum += spectrum_frames
+        if done == next_record:
+            if count < len(records):
+                latest = audio.get_energy_counter()
+                leq = audio.leq_between(counter, latest)
+                counter = latest
+                records[count]["time"] = (count + 1) * record_frames / float(sample_rate)
+                records[count]["leq"] = np.nan if leq is None else leq
+                records[count]["bands"] = audio.get_spectrum()
+                count += 1
+            next_record += record_frames
+    elapsed = time.perf_counter() - started
+
+    output_path = None
+    if output_dir:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        output_path = os.path.join(output_dir, f"{stem}.{output_format}")
+        if output_format == "csv":
+            write_csv(output_path, records)
+        else:
+            with open(output_path, "wb") as handle:
+                write_header(handle, len(GRAPHIC_EQ_BANDS), interval_s)
+                handle.write(records.tobytes())
+
+    duration = len(data) / float(sample_rate)
+    summary = audio.get_statistics()["total"]
+    summary.update({
+        "path": path,
+        "output": output_path,
+        "duration_s": duration,
+        "elapsed_s": elapsed,
+        "speed": duration / elapsed if elapsed > 0 else float("inf"),
+    })
+    return summary
+
+
+def write_csv(path, records):
+    header = ["time", "leq"] + [f"{band:g}" for band in GRAPHIC_EQ_BANDS]
+    table = np.column_stack([records["time"], records["leq"], records["bands"]])
+    np.savetxt(path, table, delimiter=",", header=",".join(header), comments="", fmt="%.3f")
+
+
+def _format(value):
+    return "--" if value is None else f"{value:.1f}"
+
+
+def check_channels(paths, config):
+    # Per-channel settings have to match every file; checked before any
+    # analysis starts rather than failing part way through a batch.
+    problems = []
+    for path in paths:
+        channels = open_wav(path)[1].shape[1]
+        for key in PER_CHANNEL_KEYS:
+            value = config.get(key)
+            if isinstance(value, (list, tuple)) and len(value) != channels:
+                problems.append(f"{path}: {channels} channel(s), but {key} has {len(value)} entries")
+    if problems:
+        raise SystemExit("\n".join(problems))
+
+
+def run_analysis(config, args):
+    check_channels(args.analyze, config)
+    output_dir = args.output_dir
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    jobs = args.jobs or os.cpu_count() or 1
+    options = (args.interval, output_dir, args.format)
+
+    if jobs == 1 or len(args.analyze) == 1:
+        results = [analyze_file(path, config, *options) for path in args.analyze]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(analyze_file, path, config, *options) for path in args.analyze]
+            results = [future.result() for future in futures]
+
+    for result in results:
+        print(
+            f"{result['path']}: {result['duration_s']:.1f} s at {result['speed']:.0f}x realtime, "
+            f"Leq {_format(result['leq'])} Lmax {_format(result['lmax'])} "
+            f"L10 {_format(result['l10'])} L50 {_format(result['l50'])} L90 {_format(result['l90'])} dBA"
+        )
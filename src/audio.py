@@ -1,11 +1,24 @@
 import json
 import os
+import queue
 import re
 import threading
+import time
 
 import numpy as np
-import sounddevice as sd
-from scipy.signal import bilinear, lfilter, lfilter_zi
+
+from .cache import cached_arrays, default_cache_dir, file_digest
+from .calibration import correction_db, fit_correction_sos
+from .detectors import ImpulseDetector, TonalDetector, impulse_summary, tonal_summary
+from .diagnostics import Diagnostics
+from .dose import DoseEngine, dose_criteria
+from .dsp import ScratchBuffers, SosFilter, preload_sosfilt, resolve_sosfilt
+from .events import EventCapture
+from .history import LevelHistory
+from .ringbuffer import SpscRing
+from .sources import SignalGenerator, SyntheticStream
+from .stats import LevelStatistics
+from .stft import IncrementalStft
 
 REF_PASCAL = 20e-6
 
@@ -65,7 +78,19 @@ def load_calibration_profile(path):
     }
 
 
+def band_corrections(calibration_freqs, calibration_gains):
+    # Added to the band levels; the opposite of the microphone's deviation,
+    # the same correction the weighting filter applies.
+    if calibration_freqs is None:
+        return np.zeros(len(GRAPHIC_EQ_BANDS), dtype=np.float64)
+    return correction_db(calibration_freqs, calibration_gains, GRAPHIC_EQ_BANDS)
+
+
+# Designs are cached on disk, so these only run when the cache misses.
 def design_a_weighting(sample_rate):
+    resolve_sosfilt()
+    from scipy.signal import bilinear
+
     f1 = 20.598997
     f2 = 107.65265
     f3 = 737.86223
@@ -80,56 +105,422 @@ def design_a_weighting(sample_rate):
     return b, a
 
 
+def design_c_weighting(sample_rate):
+    resolve_sosfilt()
+    from scipy.signal import bilinear
+
+    f1 = 20.598997
+    f4 = 12194.217
+    c1000 = 0.0619
+
+    nums = [(2 * np.pi * f4) ** 2 * (10 ** (c1000 / 20)), 0, 0]
+    dens = np.polymul([1, 4 * np.pi * f4, (2 * np.pi * f4) ** 2],
+                      [1, 4 * np.pi * f1, (2 * np.pi * f1) ** 2])
+    b, a = bilinear(nums, dens, sample_rate)
+    return b, a
+
+
+def a_weighting_sos(sample_rate):
+    resolve_sosfilt()
+    from scipy.signal import tf2sos
+
+    return tf2sos(*design_a_weighting(sample_rate))
+
+
+def c_weighting_sos(sample_rate):
+    resolve_sosfilt()
+    from scipy.signal import tf2sos
+
+    return tf2sos(*design_c_weighting(sample_rate))
+
+
+class BandPlan:
+    def __init__(self, sample_rate, size, corrections):
+        self.sample_rate = sample_rate
+        self.size = size
+        self.corrections = np.atleast_2d(corrections)
+        self.channels = self.corrections.shape[0]
+        self.window = np.hanning(size)
+        self.frame = np.zeros((self.channels, size), dtype=np.float64)
+
+        # Band power in dBFS RMS, on the filterbank engine's scale: a
+        # full-scale sine reads -3 dB in its band. Window sum/2 gives the
+        # amplitude of a sine for the Hann window, the extra factor of 2
+        # converts peak amplitude to RMS power, and summing a band counts
+        # every component over the window's equivalent noise bandwidth (1.5
+        # bins for Hann), which the last factor removes.
+        scale = max(np.sum(self.window) / 2.0, 1e-12)
+        self.power_scale = (
+            np.sum(self.window) ** 2 / (size * np.sum(self.window ** 2)) / (2.0 * scale * scale)
+        )
+
+        # Each band covers a contiguous run of FFT bins, so the per-band sums
+        # come from a single cumulative sum instead of one mask per band.
+        freqs = np.fft.rfftfreq(size, 1.0 / sample_rate)
+        centers = np.asarray(GRAPHIC_EQ_BANDS, dtype=np.float64)
+        self.band_lo = np.searchsorted(freqs, centers / (2 ** (1 / 6)), side="left")
+        self.band_hi = np.searchsorted(freqs, centers * (2 ** (1 / 6)), side="right")
+        self.band_empty = self.band_hi <= self.band_lo
+        self._cumsum = np.zeros((self.channels, len(freqs) + 1), dtype=np.float64)
+
+    def band_levels(self, frame):
+        np.multiply(frame, self.window, out=frame)
+        spectrum = np.fft.rfft(frame, axis=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        np.cumsum(power, axis=-1, out=self._cumsum[:, 1:])
+        sums = self._cumsum[:, self.band_hi] - self._cumsum[:, self.band_lo]
+        levels = 10 * np.log10(sums * self.power_scale + 1e-20)
+        levels[:, self.band_empty] = -120.0
+        return levels + self.corrections
+
+
+# Settings that may be a list with one entry per input channel.
+PER_CHANNEL_KEYS = ("calibration_db", "calibration_file")
+
+
+def _per_channel(value, channels):
+    if isinstance(value, (list, tuple)):
+        if len(value) != channels:
+            raise ValueError(f"Expected {channels} per-channel values, got {len(value)}")
+        return list(value)
+    return [value] * channels
+
+
 class AudioProcessor:
     def __init__(self, config):
+        # The filter kernel's import runs while the rest of the app is built
+        # (main starts it earlier still).
+        preload_sosfilt()
         self.sample_rate = int(config["sample_rate"])
         self.block_size = int(config["block_size"])
+        self.channels = int(config.get("channels", 1))
         self.device = config.get("device")
-        self.calibration_db = float(config.get("calibration_db", 0.0))
+        self.source = config.get("source", "device")
+        self.synthetic = config.get("synthetic", {})
+        self.calibration_db = [
+            float(value) for value in _per_channel(config.get("calibration_db", 0.0), self.channels)
+        ]
         self.calibration_file = config.get("calibration_file")
+        self.calibration_sections = int(config.get("calibration_filter_sections", 4))
         self.spectrum_smooth = float(config.get("spectrum_smooth", 0.6))
         self.meter_window_s = float(config.get("meter_window_s", 1.0))
-
+        self.spectrum_engine = config.get("spectrum_engine", "fft")
+        if self.spectrum_engine not in ("fft", "filterbank"):
+            raise ValueError(f"Unknown spectrum_engine: {self.spectrum_engine}")
+        self.processing = config.get("processing", "callback")
+        if self.processing not in ("callback", "worker"):
+            raise ValueError(f"Unknown processing mode: {self.processing}")
+        self.worker_buffer_s = float(config.get("worker_buffer_s", 1.0))
+        self.spectrum_interval_s = float(config.get("update_interval_ms", 250)) / 1000.0
+        self.diagnostics = Diagnostics() if config.get("diagnostics", False) else None
+        self.cache_dir = config.get("cache_dir", default_cache_dir())
+        # Measured from started_at (by default, construction) to the first
+        # processed block.
+        self.started_at = time.monotonic()
+        self.first_reading_s = None
+        self._listeners = []
+        self._level_listeners = []
+        # Blocks lost to stream underruns or a full worker queue, and the
+        # stream's xruns. Only the audio callback writes these; telemetry
+        # and diagnostics both read them from here.
+        self.dropped_blocks = 0
+        self.input_overflows = 0
+        self.input_underflows = 0
+        # Time source for statistics, dose, history and detections; offline
+        # analysis swaps in one that follows the position in the file.
+        self.clock = time.time
+        # In worker mode the worker keeps the spectrum current on its own;
+        # a client that computes it on demand can switch this off.
+        self.worker_spectrum = True
+
+        channels = self.channels
         self._lock = threading.Lock()
+        self._stream = None
         self._last_db = 0.0
-        self._spectrum = np.zeros(len(GRAPHIC_EQ_BANDS), dtype=np.float32)
-        self._ring = np.zeros(self.sample_rate, dtype=np.float32)
+        self._spectrum = np.zeros((channels, len(GRAPHIC_EQ_BANDS)), dtype=np.float32)
+        self._ring = np.zeros((channels, self.sample_rate), dtype=np.float32)
         self._ring_idx = 0
         meter_size = max(1, int(self.sample_rate * self.meter_window_s))
-        self._meter_ring = np.zeros(meter_size, dtype=np.float32)
+        # The meter ring holds squared weighted samples, so each sample is
+        # squared once and the running sum adds and removes identical values.
+        self._meter_ring = np.zeros((channels, meter_size), dtype=np.float64)
         self._meter_idx = 0
         self._meter_filled = 0
-        self._meter_sum_sq = 0.0
-
-        self._b, self._a = design_a_weighting(self.sample_rate)
-        self._zi = lfilter_zi(self._b, self._a) * 0.0
+        self._meter_sum_sq = np.zeros(channels, dtype=np.float64)
+        self._meter_removed = np.zeros(channels, dtype=np.float64)
+        self._block_sum_sq = np.zeros(channels, dtype=np.float64)
+        # Short-term levels are kept for every channel for the impulse
+        # detectors; statistics and the rest follow the primary (first) channel.
+        self.short_interval_s = float(config.get("short_interval_s", 0.1))
+        self._short_size = max(1, int(self.sample_rate * self.short_interval_s))
+        self._short_sum_sq = np.zeros(channels, dtype=np.float64)
+        self._short_dbs = np.zeros(channels, dtype=np.float64)
+        self._short_count = 0
+        self._total_sum_sq = 0.0
+        self._total_frames = 0
+        self._statistics = LevelStatistics(config.get("shift_hours", 8.0))
+        self.history = LevelHistory() if config.get("history", True) else None
+        self.tonal_detector = None
+        self.impulse_detectors = None
+        if config.get("detectors", False):
+            updates = round(float(config.get("tonal_window_s", 10.0)) / self.spectrum_interval_s)
+            self.tonal_detector = TonalDetector(GRAPHIC_EQ_BANDS, updates, channels)
+            self.impulse_detectors = [
+                ImpulseDetector(config.get("impulse_threshold", 5.0)) for _ in range(channels)
+            ]
+        self.dose = DoseEngine(
+            dose_criteria(config),
+            shift_hours=config.get("shift_hours", 8.0),
+            checkpoint_path=config.get("dose_checkpoint"),
+            checkpoint_s=config.get("dose_checkpoint_s", 10.0),
+        )
 
-        calibration_path = self._resolve_calibration_path()
-        calibration = load_calibration_profile(calibration_path)
-        self._calibration_sens_db = calibration["sens_db"]
-        self._calibration_freqs = calibration["freqs"]
-        self._calibration_gains = calibration["gains"]
+        # Second-order sections in float64: in float32 the poles near DC
+        # cost up to 0.02 dB at low frequencies and high sample rates.
+        self._a_weighting_sos = cached_arrays(
+            self.cache_dir, "a-weighting", self.sample_rate,
+            lambda: {"sos": a_weighting_sos(self.sample_rate)},
+        )["sos"]
+        self._weighting = []
+        # Per-block scratch buffers, grown only if a block exceeds block_size.
+        # With these and the filterbank's and level engine's own, no sample
+        # arrays are allocated per block; what remains is about 1.5 kB of
+        # array views and scalars, and the spectrogram's FFT output per hop.
+        # Blocks arrive as float32 and are filtered in float64, so there are
+        # two pools.
+        self._input_scratch = ScratchBuffers(np.float32)
+        self._input_scratch.view("input", self.channels, self.block_size)
+        self._scratch = ScratchBuffers(np.float64)
+        for name in ("weighted", "squares"):
+            self._scratch.view(name, self.channels, self.block_size)
+
+        self._levels = None
+        if config.get("level_engine", False):
+            from .levels import LevelEngine
+
+            # Cached like the A-weighting, so a warm start designs nothing.
+            c_weighting = cached_arrays(
+                self.cache_dir, "c-weighting", self.sample_rate,
+                lambda: {"sos": c_weighting_sos(self.sample_rate)},
+            )["sos"]
+            self._levels = LevelEngine(self.sample_rate, c_weighting, channels)
+
+        self._pending_calibration = None
+        self._calibration_requests = queue.Queue()
+        self._calibration_thread = None
+        self._apply_calibrations([
+            self._load_calibration(self._resolve_calibration_path(path))
+            for path in _per_channel(self.calibration_file, channels)
+        ])
+
+        self._band_plan = None
+        self._filterbank = None
+        if self.spectrum_engine == "filterbank":
+            from .filterbank import ThirdOctaveFilterbank
+
+            self._filterbank = ThirdOctaveFilterbank(self.sample_rate, GRAPHIC_EQ_BANDS, channels)
+            self._band_energy = np.zeros((channels, len(GRAPHIC_EQ_BANDS)), dtype=np.float64)
+            self._band_counts = np.zeros(len(GRAPHIC_EQ_BANDS), dtype=np.float64)
+
+        self.spectrogram = None
+        if config.get("spectrogram", False):
+            self.spectrogram = IncrementalStft(
+                self.sample_rate,
+                fft_size=int(config.get("spectrogram_fft_size", 2048)),
+                overlap=float(config.get("spectrogram_overlap", 0.5)),
+                history_s=float(config.get("spectrogram_history_s", 30.0)),
+                channels=channels,
+            )
 
-        self._stream = None
+        self.events = None
+        if config.get("event_dir"):
+            self.events = EventCapture(
+                self.sample_rate,
+                channels,
+                os.path.abspath(config["event_dir"]),
+                threshold_db=config.get("event_threshold_db", config.get("range_high_db", 85.0)),
+                hysteresis_db=config.get("event_hysteresis_db", 3.0),
+                pre_s=config.get("event_pre_s", 2.0),
+                post_s=config.get("event_post_s", 1.0),
+                max_s=config.get("event_max_s", 30.0),
+                slots=config.get("event_slots", 4),
+                band_levels=self._clip_band_levels,
+            )
 
-    def _resolve_calibration_path(self):
-        if self.calibration_file:
-            return os.path.abspath(self.calibration_file)
+        self._capture = None
+        self._worker = None
+        self._worker_stop = threading.Event()
+        if self.processing == "worker":
+            capacity = max(4 * self.block_size, int(self.sample_rate * self.worker_buffer_s))
+            self._capture = SpscRing(capacity, (channels,))
+
+    def set_calibration_profile(self, path, channel=None):
+        # Swaps the calibration of one channel (or all of them) while the
+        # stream keeps running. Fitting a new correction filter takes a good
+        # fraction of a second, so requests are designed in order on a
+        # background thread and the audio path picks up each result between
+        # blocks.
+        if self._calibration_thread is None:
+            self._calibration_thread = threading.Thread(
+                target=self._calibration_loop, name="calibration", daemon=True
+            )
+            self._calibration_thread.start()
+        self._calibration_requests.put((path, channel))
+
+    def wait_for_calibration(self):
+        self._calibration_requests.join()
+
+    def _calibration_loop(self):
+        while True:
+            path, channel = self._calibration_requests.get()
+            try:
+                calibration = self._load_calibration(self._resolve_calibration_path(path))
+                calibrations = list(self._calibrations)
+                for index in range(self.channels) if channel is None else [channel]:
+                    calibrations[index] = calibration
+                self._apply_calibrations(calibrations)
+            except (OSError, ValueError, IndexError) as exc:
+                print(f"Calibration: could not switch to {path}: {exc}")
+            finally:
+                self._calibration_requests.task_done()
+
+    def _apply_calibrations(self, calibrations):
+        db_offsets = np.array([
+            self._db_offset(calibration["sens_db"], offset)
+            for calibration, offset in zip(calibrations, self.calibration_db)
+        ])
+        corrections = np.array([
+            band_corrections(calibration["freqs"], calibration["gains"])
+            for calibration in calibrations
+        ])
+
+        # One cascade per distinct profile: the A-weighting sections followed
+        # by the fitted correction, so calibrated weighting is a single pass.
+        # The level engine also gets the correction on its own, for the C
+        # and Z weighted levels.
+        if all(calibration["digest"] == calibrations[0]["digest"] for calibration in calibrations):
+            groups = [(slice(None), calibrations[0], self.channels)]
+        else:
+            groups = [(slice(index, index + 1), calibration, 1) for index, calibration in enumerate(calibrations)]
+        weighting = []
+        for rows, calibration, count in groups:
+            correction = self._correction_sos(calibration)
+            if correction is None:
+                weighting.append((rows, SosFilter(self._a_weighting_sos, count), None))
+                continue
+            level_correction = SosFilter(correction, count) if self._levels is not None else None
+            weighting.append((
+                rows, SosFilter(np.vstack([self._a_weighting_sos, correction]), count), level_correction
+            ))
+
+        self._calibrations = calibrations
+        with self._lock:
+            self._pending_calibration = (db_offsets, corrections, weighting)
+            # With no stream running nothing is filtering, so it can be
+            # installed straight away.
+            if self._stream is None:
+                self._install_calibration()
+
+    def _install_calibration(self):
+        # Called with the lock held, between blocks. Carries the A-weighting
+        # state across so a switch does not restart the filter; only the
+        # correction sections start from rest.
+        db_offsets, corrections, weighting = self._pending_calibration
+        self._pending_calibration = None
+        sections = len(self._a_weighting_sos)
+        state = np.zeros((self.channels, sections, 2))
+        for rows, old, _ in self._weighting:
+            state[rows] = old.zi[:, :sections]
+        for rows, new, _ in weighting:
+            new.zi[:, :sections] = state[rows]
+        self._db_offsets = db_offsets
+        self._band_corrections = corrections
+        self._band_plan = None
+        self._weighting = weighting
+        self._level_correction = any(correction is not None for _, _, correction in weighting)
+
+    def _correction_sos(self, calibration):
+        if not self.calibration_sections or calibration["freqs"] is None:
+            return None
+        return cached_arrays(
+            self.cache_dir, "correction", (self.sample_rate, calibration["digest"], self.calibration_sections),
+            lambda: {"sos": fit_correction_sos(
+                calibration["freqs"], calibration["gains"], self.sample_rate, self.calibration_sections
+            )},
+        )["sos"]
+
+    def _load_calibration(self, path):
+        digest = file_digest(path)
+        if digest is None:
+            return dict(load_calibration_profile(path), digest=None)
+
+        def build():
+            profile = load_calibration_profile(path)
+            empty = np.zeros(0, dtype=np.float32)
+            return {
+                "sens_db": np.array(np.nan if profile["sens_db"] is None else profile["sens_db"]),
+                "freqs": empty if profile["freqs"] is None else profile["freqs"],
+                "gains": empty if profile["gains"] is None else profile["gains"],
+            }
+
+        arrays = cached_arrays(self.cache_dir, "calibration", digest, build)
+        sens_db = float(arrays["sens_db"])
+        return {
+            "sens_db": None if np.isnan(sens_db) else sens_db,
+            "freqs": arrays["freqs"] if len(arrays["freqs"]) else None,
+            "gains": arrays["gains"] if len(arrays["gains"]) else None,
+            "digest": digest,
+        }
+
+    def _resolve_calibration_path(self, path):
+        if path:
+            return os.path.abspath(path)
         base_dir = os.path.dirname(os.path.abspath(__file__))
         default_path = os.path.join(base_dir, "..", "calibration.txt")
         return default_path if os.path.exists(default_path) else None
 
+    def _db_offset(self, sens_db, calibration_db):
+        if sens_db is not None:
+            return -sens_db + 94.0 + calibration_db
+        return -10 * np.log10(REF_PASCAL ** 2) + calibration_db
+
     def start(self):
         if self._stream:
             return
 
-        self._stream = sd.InputStream(
-            samplerate=self.sample_rate,
-            blocksize=self.block_size,
-            device=self.device,
-            channels=1,
-            callback=self._on_audio,
-        )
+        resolve_sosfilt()
+        if self.events is not None:
+            self.events.start()
+        self.dose.start()
+
+        if self._capture is not None:
+            self._worker_stop.clear()
+            self._worker = threading.Thread(
+                target=self._worker_loop, name="audio-worker", daemon=True
+            )
+            self._worker.start()
+
+        if self.source == "synthetic":
+            self._stream = SyntheticStream(
+                samplerate=self.sample_rate,
+                blocksize=self.block_size,
+                channels=self.channels,
+                callback=self._on_audio,
+                generator=SignalGenerator(self.sample_rate, self.channels, **self.synthetic),
+            )
+        else:
+            import sounddevice as sd
+
+            self._stream = sd.InputStream(
+                samplerate=self.sample_rate,
+                blocksize=self.block_size,
+                device=self.device,
+                channels=self.channels,
+                callback=self._on_audio,
+            )
+        if self.diagnostics is not None:
+            latency = getattr(self._stream, "latency", None)
+            self.diagnostics.stream_latency_s = latency if isinstance(latency, float) else None
         self._stream.start()
 
     def stop(self):
@@ -139,114 +530,403 @@ class AudioProcessor:
         self._stream.close()
         self._stream = None
 
-    def _on_audio(self, indata, frames, time, status):
-        if status:
-            return
+        if self._worker is not None:
+            self._worker_stop.set()
+            self._worker.join()
+            self._worker = None
+
+        if self.events is not None:
+            self.events.stop()
+        self.dose.stop()
 
-        samples = indata[:, 0].astype(np.float32, copy=False)
-        weighted, self._zi = lfilter(self._b, self._a, samples, zi=self._zi)
+    def _on_audio(self, indata, frames, time_info, status):
+        diagnostics = self.diagnostics
+        if diagnostics is not None:
+            started = time.perf_counter()
+            diagnostics.on_callback(time_info)
+
+        # An overflow means samples before this block were lost; the block
+        # itself is intact. An underflow means it holds no real input.
+        # Output and priming flags do not concern an input stream.
+        if status:
+            if status.input_overflow:
+                self.input_overflows += 1
+            if status.input_underflow:
+                self.input_underflows += 1
+                self.dropped_blocks += 1
+                return
+
+        if self._capture is not None:
+            if not self._capture.write(indata[:, :self.channels]):
+                self.dropped_blocks += 1
+        else:
+            block = self._input_scratch.view("input", self.channels, len(indata))
+            block[...] = indata[:, :self.channels].T
+            self.process_block(block)
+
+        if diagnostics is not None:
+            diagnostics.record("callback", time.perf_counter() - started)
+
+    def _worker_loop(self):
+        block = np.zeros((self.block_size, self.channels), dtype=np.float32)
+        idle_s = self.block_size / float(self.sample_rate) / 2.0
+        next_spectrum = time.monotonic() + self.spectrum_interval_s
+        while not self._worker_stop.is_set():
+            count = self._capture.read_into(block)
+            if count:
+                started = time.perf_counter()
+                samples = self._input_scratch.view("input", self.channels, count)
+                samples[...] = block[:count].T
+                self.process_block(samples)
+                if self.diagnostics is not None:
+                    self.diagnostics.record("process", time.perf_counter() - started)
+            now = time.monotonic()
+            if now >= next_spectrum and self.worker_spectrum:
+                self.compute_spectrum()
+                next_spectrum = now + self.spectrum_interval_s
+            if not count:
+                self._worker_stop.wait(idle_s)
+
+    def process_block(self, samples):
+        # samples is a (channels, frames) float32 block. The stream, the
+        # worker and offline analysis all measure through here.
+        if self.first_reading_s is None:
+            self.first_reading_s = time.monotonic() - self.started_at
+        if self._pending_calibration is not None:
+            with self._lock:
+                if self._pending_calibration is not None:
+                    self._install_calibration()
+        weighted = self._scratch.view("weighted", self.channels, samples.shape[1])
+        weighted[...] = samples
+        for rows, weighting, _ in self._weighting:
+            weighting.process(weighted[rows])
+        if self._filterbank is not None:
+            band_energy, band_counts = self._filterbank.process(samples)
+        if self._levels is not None:
+            corrected = samples
+            if self._level_correction:
+                corrected = self._scratch.view("corrected", self.channels, samples.shape[1])
+                corrected[...] = samples
+                for rows, _, correction in self._weighting:
+                    if correction is not None:
+                        correction.process(corrected[rows])
+            self._levels.process(corrected, weighted)
+        stft_rows = None
+        if self.spectrogram is not None:
+            stft_rows = self.spectrogram.process(samples)
 
         with self._lock:
-            self._append_meter(weighted)
+            block_sum_sq = self._append_meter(weighted)
+            self._append_short(block_sum_sq, weighted.shape[1])
             self._append_ring(samples)
+            if self._levels is not None:
+                self._levels.accumulate()
+            if self._filterbank is not None:
+                self._band_energy += band_energy
+                self._band_counts += band_counts
+            if stft_rows is not None:
+                self.spectrogram.append(stft_rows)
+        if self.events is not None:
+            self.events.process(samples)
+        for listener in self._listeners:
+            listener()
 
     def _append_ring(self, samples):
-        count = len(samples)
+        count = samples.shape[1]
+        size = self._ring.shape[1]
         end = self._ring_idx + count
-        if end <= len(self._ring):
-            self._ring[self._ring_idx:end] = samples
+        if end <= size:
+            self._ring[:, self._ring_idx:end] = samples
         else:
-            first = len(self._ring) - self._ring_idx
-            self._ring[self._ring_idx:] = samples[:first]
-            self._ring[:count - first] = samples[first:]
-        self._ring_idx = end % len(self._ring)
+            first = size - self._ring_idx
+            self._ring[:, self._ring_idx:] = samples[:, :first]
+            self._ring[:, :count - first] = samples[:, first:]
+        self._ring_idx = end % size
 
     def _append_meter(self, samples):
-        count = len(samples)
-        size = len(self._meter_ring)
+        count = samples.shape[1]
+        size = self._meter_ring.shape[1]
+        squares = self._scratch.view("squares", self.channels, count)
+        np.multiply(samples, samples, out=squares)
+        block_sum_sq = np.sum(squares, axis=1, out=self._block_sum_sq)
         if count >= size:
-            tail = samples[-size:]
-            self._meter_ring[:] = tail
+            self._meter_ring[:] = squares[:, -size:]
             self._meter_idx = 0
             self._meter_filled = size
-            self._meter_sum_sq = float(np.sum(tail ** 2))
-            return
+            np.sum(self._meter_ring, axis=1, out=self._meter_sum_sq)
+            return block_sum_sq
 
         end = self._meter_idx + count
+        removed = self._meter_removed
         if end <= size:
             if self._meter_filled == size:
-                self._meter_sum_sq -= float(np.sum(self._meter_ring[self._meter_idx:end] ** 2))
-            self._meter_ring[self._meter_idx:end] = samples
-            self._meter_sum_sq += float(np.sum(samples ** 2))
+                self._meter_sum_sq -= np.sum(self._meter_ring[:, self._meter_idx:end], axis=1, out=removed)
+            self._meter_ring[:, self._meter_idx:end] = squares
         else:
             first = size - self._meter_idx
             if self._meter_filled == size:
-                self._meter_sum_sq -= float(np.sum(self._meter_ring[self._meter_idx:] ** 2))
-                self._meter_sum_sq -= float(np.sum(self._meter_ring[:count - first] ** 2))
-            self._meter_ring[self._meter_idx:] = samples[:first]
-            self._meter_ring[:count - first] = samples[first:]
-            self._meter_sum_sq += float(np.sum(samples ** 2))
+                self._meter_sum_sq -= np.sum(self._meter_ring[:, self._meter_idx:], axis=1, out=removed)
+                self._meter_sum_sq -= np.sum(self._meter_ring[:, :count - first], axis=1, out=removed)
+            self._meter_ring[:, self._meter_idx:] = squares[:, :first]
+            self._meter_ring[:, :count - first] = squares[:, first:]
+        self._meter_sum_sq += block_sum_sq
         self._meter_idx = end % size
         if self._meter_filled < size:
             self._meter_filled = min(size, self._meter_filled + count)
-
-    def get_last_db(self):
+        return block_sum_sq
+
+    def _append_short(self, block_sum_sq, count):
+        self._total_sum_sq += block_sum_sq[0]
+        self._total_frames += count
+        self._short_sum_sq += block_sum_sq
+        self._short_count += count
+        if self._short_count < self._short_size:
+            return
+        dbs = self._short_dbs
+        np.divide(self._short_sum_sq, self._short_count, out=dbs)
+        np.maximum(dbs, 1e-24, out=dbs)
+        np.log10(dbs, out=dbs)
+        dbs *= 10.0
+        dbs += self._db_offsets
+        duration = self._short_count / float(self.sample_rate)
+        self._short_sum_sq[:] = 0.0
+        self._short_count = 0
+        self._on_short_level(dbs, duration)
+
+    def _on_short_level(self, dbs, duration):
+        db = float(dbs[0])
+        now = self.clock()
+        self._statistics.add(db, duration, now)
+        self.dose.add(db, duration, now)
+        if self.history is not None:
+            # Filed under the middle of the interval the level covers.
+            self.history.add(db, duration, now - duration / 2.0)
+        if self.impulse_detectors is not None:
+            for detector, level in zip(self.impulse_detectors, dbs):
+                detector.add(float(level), duration, now)
+        if self.events is not None:
+            self.events.on_level(db, duration, now)
+        for listener in self._level_listeners:
+            listener(db, duration)
+
+    def get_last_db(self, channel=0):
         with self._lock:
             if self._meter_filled == 0:
                 return 0.0
-            rms = np.sqrt(self._meter_sum_sq / float(self._meter_filled))
-            if self._calibration_sens_db is not None:
-                dbfs = 20 * np.log10(max(rms, 1e-12))
-                db = dbfs - self._calibration_sens_db + 94.0
-            else:
-                db = 20 * np.log10(max(rms, 1e-12) / REF_PASCAL)
-            db += self.calibration_db
-            self._last_db = db
+            db = self._mean_square_to_db(self._meter_sum_sq[channel] / float(self._meter_filled), channel)
+            if channel == 0:
+                self._last_db = db
             return float(db)
 
-    def get_spectrum(self):
+    def get_channel_dbs(self):
+        with self._lock:
+            if self._meter_filled == 0:
+                return [0.0] * self.channels
+            dbs = self._mean_square_to_db(self._meter_sum_sq / float(self._meter_filled), slice(None))
+            return [float(db) for db in dbs]
+
+    def get_energy_counter(self):
+        with self._lock:
+            return self._total_sum_sq, self._total_frames
+
+    def leq_between(self, start, end):
+        frames = end[1] - start[1]
+        if frames <= 0:
+            return None
+        return float(self._mean_square_to_db((end[0] - start[0]) / frames))
+
+    def get_levels(self, channel=0):
+        if self._levels is None:
+            return {}
+        with self._lock:
+            mean_squares = self._levels.snapshot(channel)
+        return {
+            name: float(self._mean_square_to_db(value, channel))
+            for name, value in mean_squares.items()
+        }
+
+    def get_statistics(self):
+        with self._lock:
+            return self._statistics.summary()
+
+    def reset_statistics(self, period=None):
+        with self._lock:
+            self._statistics.reset(period)
+
+    def get_history(self, span_s, max_points=4000):
+        # Leq, max and min of the primary channel over the last span_s
+        # seconds, from the finest tier that fits in max_points buckets.
+        if self.history is None:
+            return None
+        with self._lock:
+            return self.history.select(span_s, max_points)
+
+    def get_detector_state(self):
+        # Tonal prominence and flags, and the stored impulsive events and
+        # event count of every channel, copied together.
+        if self.tonal_detector is None:
+            return None
+        with self._lock:
+            return (
+                self.tonal_detector.prominence.copy(),
+                self.tonal_detector.tonal.copy(),
+                [detector.recent() for detector in self.impulse_detectors],
+                [detector.count for detector in self.impulse_detectors],
+            )
+
+    def get_detections(self, channel=0):
+        state = self.get_detector_state()
+        if state is None:
+            return None
+        prominence, tonal, impulses, counts = state
+        return {
+            "tonal": tonal_summary(GRAPHIC_EQ_BANDS, prominence[channel], tonal[channel]),
+            "impulsive": impulse_summary(impulses[channel], counts[channel]),
+        }
+
+    def get_dose(self):
+        return self.dose.summary()
+
+    def reset_dose(self):
+        self.dose.reset()
+
+    def reset_levels(self):
+        if self._levels is None:
+            return
+        with self._lock:
+            self._levels.reset()
+
+    def _mean_square_to_db(self, mean_square, channel=0):
+        return 10 * np.log10(np.maximum(mean_square, 1e-24)) + self._db_offsets[channel]
+
+    def get_spectrum(self, channel=0):
+        with self._lock:
+            return self._spectrum[channel].copy()
+
+    def get_channel_spectra(self):
         with self._lock:
             return self._spectrum.copy()
 
+    def get_spectrogram_rows(self, channel=0, since=0):
+        # Returns the dBFS spectrogram rows written after row `since` and the
+        # new row count to pass next time.
+        if self.spectrogram is None:
+            return None, 0
+        with self._lock:
+            return self.spectrogram.rows_since(channel, since), self.spectrogram.count
+
+    def get_events(self):
+        if self.events is None:
+            return None
+        return {
+            "written": self.events.written,
+            "dropped": self.events.dropped,
+            "recent": list(self.events.recent),
+        }
+
+    def _clip_band_levels(self, clip):
+        # Runs on the event writer thread: the mean of 1-second spectra across
+        # the clip, on the same scale as get_spectrum(). A trailing partial
+        # second is measured from the clip's last full second, weighted by
+        # the part of it not already counted, and a clip shorter than a
+        # second is one spectrum of its own length, so no silence is padded
+        # in and no audio is left out.
+        frames = clip.shape[1]
+        size = max(1, min(self.sample_rate, frames))
+        plan = BandPlan(self.sample_rate, size, self._band_corrections)
+        starts = list(range(0, frames - size + 1, size))
+        weights = [1.0] * len(starts)
+        if frames % size:
+            starts.append(frames - size)
+            weights.append((frames % size) / float(size))
+        power = np.zeros((self.channels, len(GRAPHIC_EQ_BANDS)))
+        for start, weight in zip(starts, weights):
+            plan.frame[:] = clip[:, start:start + size]
+            power += weight * 10 ** (plan.band_levels(plan.frame) / 10.0)
+        return 10 * np.log10(power / sum(weights))
+
+    def add_listener(self, callback):
+        # Called from the audio (or worker) thread after every processed
+        # block, so it must be cheap and must not block.
+        self._listeners.append(callback)
+
+    def add_level_listener(self, callback):
+        # Called with every short-term level (dBA, duration in seconds) of
+        # the primary channel, on the audio thread with the lock held.
+        self._level_listeners.append(callback)
+
+    def xrun_counters(self):
+        # Written only by the audio callback; read without a lock.
+        return {
+            "input_overflow": self.input_overflows,
+            "input_underflow": self.input_underflows,
+            "dropped_blocks": self.dropped_blocks,
+        }
+
+    def get_diagnostics(self):
+        if self.diagnostics is None:
+            return None
+        summary = self.diagnostics.snapshot()
+        summary["counters"].update(self.xrun_counters())
+        summary["first_reading_s"] = self.first_reading_s
+        return summary
+
     def compute_spectrum(self):
+        if self.diagnostics is None:
+            self._compute_spectrum()
+            return
+        started = time.perf_counter()
+        self._compute_spectrum()
+        self.diagnostics.record("compute_spectrum", time.perf_counter() - started)
+
+    def _compute_spectrum(self):
+        if self._filterbank is not None:
+            self._compute_filterbank_spectrum()
+            return
+
+        plan = self._get_band_plan()
+        frame = plan.frame
         with self._lock:
-            data = np.roll(self._ring, -self._ring_idx).copy()
+            tail = self._ring.shape[1] - self._ring_idx
+            frame[:, :tail] = self._ring[:, self._ring_idx:]
+            frame[:, tail:] = self._ring[:, :self._ring_idx]
 
-        if not np.any(data):
+        if not np.any(frame):
             return
 
-        window = np.hanning(len(data))
-        spectrum = np.fft.rfft(data * window)
-        # Scale FFT to approximate dBFS for a full-scale sine.
-        # Window sum/2 gives correct amplitude for Hann window.
-        scale = max(np.sum(window) / 2.0, 1e-12)
-        mag = (np.abs(spectrum) / scale) / np.sqrt(2.0)
-        freqs = np.fft.rfftfreq(len(data), 1.0 / self.sample_rate)
-
-        band_levels = np.zeros(len(GRAPHIC_EQ_BANDS), dtype=np.float32)
-        for i, center in enumerate(GRAPHIC_EQ_BANDS):
-            low = center / (2 ** (1 / 6))
-            high = center * (2 ** (1 / 6))
-            mask = (freqs >= low) & (freqs <= high)
-            if not np.any(mask):
-                level = -120.0
-            else:
-                power = np.mean(mag[mask] ** 2)
-                level = 10 * np.log10(power + 1e-20)
-            band_levels[i] = level
-
-        if self._calibration_freqs is not None:
-            corrections = np.interp(
-                GRAPHIC_EQ_BANDS,
-                self._calibration_freqs,
-                self._calibration_gains,
-                left=self._calibration_gains[0],
-                right=self._calibration_gains[-1],
+        band_levels = plan.band_levels(frame)
+
+        with self._lock:
+            self._spectrum = (
+                self.spectrum_smooth * self._spectrum
+                + (1.0 - self.spectrum_smooth) * band_levels
             )
-            band_levels = band_levels + corrections
+            if self.tonal_detector is not None:
+                self.tonal_detector.update(band_levels)
+
+    def _compute_filterbank_spectrum(self):
+        with self._lock:
+            energy = self._band_energy.copy()
+            counts = self._band_counts.copy()
+            self._band_energy[:] = 0.0
+            self._band_counts[:] = 0.0
+
+        if not np.any(energy):
+            return
+
+        band_levels = self._filterbank.band_levels(energy, counts) + self._band_corrections
 
         with self._lock:
             self._spectrum = (
                 self.spectrum_smooth * self._spectrum
                 + (1.0 - self.spectrum_smooth) * band_levels
             )
+            if self.tonal_detector is not None:
+                self.tonal_detector.update(band_levels)
+
+    def _get_band_plan(self):
+        plan = self._band_plan
+        if plan is None or plan.size != self._ring.shape[1] or plan.sample_rate != self.sample_rate:
+            plan = BandPlan(self.sample_rate, self._ring.shape[1], self._band_corrections)
+            self._band_plan = plan
+        return plan
@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+from .audio import GRAPHIC_EQ_BANDS, AudioProcessor
+from .sources import SIGNAL_KINDS, make_signal
+
+PERCENTILES = (50, 90, 99)
+
+
+def _timings(fn, iterations, warmup=5):
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        started = time.perf_counter_ns()
+        fn()
+        samples[i] = time.perf_counter_ns() - started
+    return samples / 1000.0
+
+
+def _summarize(samples_us, deadline_us=None):
+    result = {f"p{n}_us": float(np.percentile(samples_us, n)) for n in PERCENTILES}
+    result["max_us"] = float(np.max(samples_us))
+    result["mean_us"] = float(np.mean(samples_us))
+    if deadline_us:
+        result["deadline_us"] = deadline_us
+        result["p99_load"] = result["p99_us"] / deadline_us
+    return result
+
+
+def _processor(sample_rate, block_size, variant):
+    config = {
+        "sample_rate": sample_rate,
+        "block_size": block_size,
+        "spectrum_engine": "filterbank" if variant == "filterbank" else "fft",
+        "level_engine": variant == "levels",
+    }
+    return AudioProcessor(config)
+
+
+def bench_audio(sample_rate, block_size, kind, variant, iterations):
+    audio = _processor(sample_rate, block_size, variant)
+    frames = block_size * (iterations + 16)
+    signal = make_signal(kind, sample_rate, max(frames, sample_rate), seed=1)
+    blocks = [signal[i:i + block_size] for i in range(0, frames - block_size + 1, block_size)]
+    weighted = [np.ascontiguousarray(block.T) for block in blocks]
+    deadline_us = block_size / float(sample_rate) * 1e6
+
+    position = {"i": 0}
+
+    def next_block(source):
+        block = source[position["i"] % len(source)]
+        position["i"] += 1
+        return block
+
+    results = {}
+    results["_on_audio"] = _summarize(
+        _timings(lambda: audio._on_audio(next_block(blocks), block_size, None, None), iterations),
+        deadline_us,
+    )
+    results["_append_meter"] = _summarize(
+        _timings(lambda: audio._append_meter(next_block(weighted)), iterations), deadline_us
+    )
+    results["_append_ring"] = _summarize(
+        _timings(lambda: audio._append_ring(next_block(weighted)), iterations), deadline_us
+    )
+    return results
+
+
+def bench_spectrum(sample_rate, kind, variant, iterations, update_interval_s=0.25):
+    block_size = 1024
+    audio = _processor(sample_rate, block_size, variant)
+    signal = make_signal(kind, sample_rate, 2 * sample_rate, seed=2)
+    tick_blocks = max(1, int(update_interval_s * sample_rate / block_size))
+    blocks = [signal[i:i + block_size] for i in range(0, len(signal) - block_size + 1, block_size)]
+    for block in blocks:
+        audio._on_audio(block, block_size, None, None)
+
+    position = {"i": 0}
+
+    def tick():
+        # The filterbank engine consumes energy accumulated since the last
+        # tick, so feed it one update interval of audio (untimed) first.
+        if variant == "filterbank":
+            for _ in range(tick_blocks):
+                audio._filterbank.process(np.ascontiguousarray(blocks[position["i"] % len(blocks)].T))
+                audio._band_energy += audio._filterbank.energy
+                audio._band_counts += audio._filterbank.counts
+                position["i"] += 1
+
+    samples = []
+    for _ in range(iterations + 3):
+        tick()
+        started = time.perf_counter_ns()
+        audio.compute_spectrum()
+        samples.append((time.perf_counter_ns() - started) / 1000.0)
+    return _summarize(np.array(samples[3:]), update_interval_s * 1e6)
+
+
+def bench_ui(iterations):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5 import QtGui, QtWidgets
+    except ImportError:
+        return None
+    from .ui_widgets import RangeBarWidget, SpectrumWidget
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    results = {}
+
+    widget = RangeBarWidget(93.0, 97.0)
+    widget.resize(800, 400)
+    image = QtGui.QImage(widget.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+    values = iter(np.tile(np.linspace(80.0, 110.0, 97), iterations // 97 + 10))
+
+    def paint_range():
+        widget.set_value(next(values))
+        widget.render(image)
+
+    results["RangeBarWidget.paintEvent"] = _summarize(_timings(paint_range, iterations))
+
+    spectrum = SpectrumWidget()
+    spectrum.resize(800, 400)
+    rng = np.random.default_rng(3)
+    levels = rng.uniform(-80.0, 0.0, (iterations + 10, len(GRAPHIC_EQ_BANDS)))
+    position = {"i": 0}
+
+    def paint_spectrum():
+        spectrum.set_levels(levels[position["i"] % len(levels)])
+        position["i"] += 1
+        spectrum.render(image)
+
+    results["SpectrumWidget.set_levels+paint"] = _summarize(_timings(paint_spectrum, iterations))
+    app.processEvents()
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    results = {
+        "revision": _git_revision(),
+        "time": time.time(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "audio": {},
+        "spectrum": {},
+        "ui": None,
+    }
+
+    for sample_rate in args.sample_rates:
+        for kind in args.signals:
+            for variant in args.variants:
+                key = f"{variant}/{kind}/{sample_rate}"
+                results["spectrum"][key] = bench_spectrum(sample_rate, kind, variant, args.spectrum_iterations)
+                for block_size in args.block_sizes:
+                    block_key = f"{key}/{block_size}"
+                    results["audio"][block_key] = bench_audio(
+                        sample_rate, block_size, kind, variant, args.iterations
+                    )
+    if not args.no_ui:
+        results["ui"] = bench_ui(args.ui_iterations)
+    return results
+
+
+def _flatten(results):
+    rows = {}
+    for key, functions in results["audio"].items():
+        for name, stats in functions.items():
+            rows[f"{name} {key}"] = stats
+    for key, stats in results["spectrum"].items():
+        rows[f"compute_spectrum {key}"] = stats
+    for name, stats in (results.get("ui") or {}).items():
+        rows[name] = stats
+    return rows
+
+
+def report(results, baseline=None):
+    rows = _flatten(results)
+    base_rows = _flatten(baseline) if baseline else {}
+    print(f"{'case':<58} {'p50 us':>9} {'p99 us':>9} {'max us':>9} {'p99/deadline':>12}"
+          + (f" {'p50 vs base':>11}" if baseline else ""))
+    for name, stats in rows.items():
+        load = stats.get("p99_load")
+        line = (f"{name:<58} {stats['p50_us']:>9.1f} {stats['p99_us']:>9.1f} {stats['max_us']:>9.1f} "
+                f"{'' if load is None else f'{load:.1%}':>12}")
+        base = base_rows.get(name)
+        if base:
+            line += f" {stats['p50_us'] / base['p50_us']:>10.2f}x"
+        print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the audio hot paths and UI paint")
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=[44100, 48000])
+    parser.add_argument("--block-sizes", type=int, nargs="+", default=[128, 256, 512, 1024, 2048])
+    parser.add_argument("--signals", nargs="+", choices=SIGNAL_KINDS, default=list(SIGNAL_KINDS))
+    parser.add_argument("--variants", nargs="+", choices=("fft", "filterbank", "levels"), default=["fft"])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--spectrum-iterations", type=int, default=40)
+    parser.add_argument("--ui-iterations", type=int, default=200)
+    parser.add_argument("--no-ui", action="store_true", help="Skip the Qt paint benchmarks")
+    parser.add_argument("--output", default=None, help="Results JSON (default: bench_results/<revision>.json)")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+    report(results, baseline)
+
+    output = args.output or os.path.join("bench_results", f"{results['revision'] or int(results['time'])}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, indent=1)
+    print(f"Saved {output}")
+
+
+if __name__ == "__main__":
+    main()
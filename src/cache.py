@@ -0,0 +1,45 @@
+import hashlib
+import os
+
+import numpy as np
+
+# Bump when the contents of a cached entry change meaning.
+CACHE_VERSION = 2
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "soundmonitor")
+
+
+def file_digest(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "rb") as handle:
+        return hashlib.sha1(handle.read()).hexdigest()
+
+
+def cached_arrays(cache_dir, name, key, build):
+    # Returns the dict of arrays build() produces, storing it under a name
+    # derived from `key` so later launches can skip building it. Any problem
+    # with the cache just falls back to building.
+    if not cache_dir:
+        return build()
+    digest = hashlib.sha1(repr((CACHE_VERSION, name, key)).encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"{name}-{digest}.npz")
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return {field: data[field] for field in data.files}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    arrays = build()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "wb") as handle:
+            np.savez(handle, **arrays)
+        os.replace(partial, path)
+    except OSError:
+        pass
+    return arrays
@@ -0,0 +1,84 @@
+import numpy as np
+
+from .dsp import resolve_sosfilt
+
+# The fit covers the audible band; outside it the A-weighting dominates.
+FIT_LOW_HZ = 20.0
+FIT_HIGH_HZ = 20000.0
+FIT_POINTS = 300
+# Calibration curves are relative to the sensitivity at this frequency, and
+# the fit is weighted to hold it exactly.
+REFERENCE_HZ = 1000.0
+REFERENCE_WEIGHT = 10.0
+
+
+def correction_db(freqs, gains_db, at_hz):
+    # Calibration files list the microphone's deviation from flat, so the
+    # correction is its opposite: the deviation is subtracted, taken
+    # relative to REFERENCE_HZ where the sensitivity already applies.
+    deviation = np.interp(at_hz, freqs, gains_db)
+    return np.interp(REFERENCE_HZ, freqs, gains_db) - deviation
+
+
+def peaking_sos(center, gain_db, q, sample_rate):
+    # RBJ peaking equalizer: unity at DC and Nyquist, and minimum phase for
+    # any gain, so a cascade of them is always a stable correction.
+    amplitude = 10 ** (gain_db / 40.0)
+    w0 = 2 * np.pi * center / sample_rate
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0 = np.cos(w0)
+    b = np.array([1 + alpha * amplitude, -2 * cos_w0, 1 - alpha * amplitude])
+    a = np.array([1 + alpha / amplitude, -2 * cos_w0, 1 - alpha / amplitude])
+    return np.concatenate([b / a[0], a / a[0]])
+
+
+def sos_response_db(sos, freqs, sample_rate):
+    z = np.exp(-2j * np.pi * np.asarray(freqs) / sample_rate)
+    response = np.ones_like(z)
+    for b0, b1, b2, a0, a1, a2 in np.atleast_2d(sos):
+        response *= (b0 + b1 * z + b2 * z * z) / (a0 + a1 * z + a2 * z * z)
+    return 20 * np.log10(np.abs(response))
+
+
+def fit_correction_sos(freqs, gains_db, sample_rate, sections=4):
+    # Fits `sections` peaking filters to the correction for the calibration
+    # curve on a log frequency grid. Sections are added greedily at the
+    # largest remaining error and all parameters are then refined together,
+    # which avoids the local minima a fixed initial spread runs into.
+    resolve_sosfilt()
+    from scipy.optimize import least_squares
+
+    grid = np.geomspace(FIT_LOW_HZ, min(FIT_HIGH_HZ, 0.45 * sample_rate), FIT_POINTS)
+    points = np.append(grid, REFERENCE_HZ)
+    target = np.append(correction_db(freqs, gains_db, grid), 0.0)
+    weights = np.append(np.ones(len(grid)), REFERENCE_WEIGHT)
+    low = [np.log(10.0), -24.0, np.log(0.1)]
+    high = [np.log(0.49 * sample_rate), 24.0, np.log(10.0)]
+
+    def build(params):
+        return np.array([
+            peaking_sos(np.exp(log_center), gain, np.exp(log_q), sample_rate)
+            for log_center, gain, log_q in params.reshape(-1, 3)
+        ])
+
+    def error(params):
+        return sos_response_db(build(params), points, sample_rate) - target
+
+    def residual(params):
+        return weights * error(params)
+
+    params = np.zeros(0)
+    for _ in range(sections):
+        remaining = (error(params) if len(params) else -target)[:len(grid)]
+        worst = np.argmax(np.abs(remaining))
+        params = np.concatenate([params, [np.log(grid[worst]), -remaining[worst], 0.0]])
+        count = len(params) // 3
+        bounds = (np.tile(low, count), np.tile(high, count))
+        params = np.clip(params, bounds[0] + 1e-9, bounds[1] - 1e-9)
+        params = least_squares(residual, params, bounds=bounds).x
+
+    # The weighted fit leaves a few thousandths of a dB at the reference;
+    # scaling the first section removes it, so 1 kHz passes at exactly unity.
+    sos = build(params)
+    sos[0, :3] *= 10 ** (-sos_response_db(sos, [REFERENCE_HZ], sample_rate)[0] / 20.0)
+    return sos
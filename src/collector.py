@@ -0,0 +1,449 @@
+import argparse
+import json
+import signal
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from .telemetry import (
+    MISSING,
+    FRAME,
+    MAX_BATCH,
+    MAX_FRAME,
+    TelemetrySender,
+    decode_packet,
+    encode_packet,
+    from_centi_db,
+    parse_address,
+    record_dtype,
+    resolve,
+    to_centi_db,
+)
+
+BANDS = 31
+
+
+class FleetStore:
+    # Every record from every meter goes into one set of preallocated
+    # column arrays used as a ring, so ingesting a packet is a few slice
+    # copies and a fleet-wide query is a handful of vectorized passes.
+    def __init__(self, capacity=1000000, bands=BANDS):
+        self.capacity = int(capacity)
+        self.bands = bands
+        self.time = np.zeros(self.capacity, dtype=np.float64)
+        self.unit = np.zeros(self.capacity, dtype=np.uint32)
+        self.leq = np.full(self.capacity, MISSING, dtype=np.int16)
+        self.lmax = np.full(self.capacity, MISSING, dtype=np.int16)
+        self.band_levels = np.full((self.capacity, bands), MISSING, dtype=np.int16)
+        self.dropped_blocks = np.zeros(self.capacity, dtype=np.uint32)
+        self.input_overflows = np.zeros(self.capacity, dtype=np.uint32)
+        self.input_underflows = np.zeros(self.capacity, dtype=np.uint32)
+        self.count = 0
+
+        self.units = []
+        self._unit_index = {}
+        self._last_seen = []
+        self.packets = 0
+        self.rejected = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def ingest_packet(self, data):
+        try:
+            unit, records = decode_packet(data)
+            if records.dtype["bands"].shape[0] != self.bands:
+                raise ValueError("unexpected band count")
+        except ValueError:
+            self.reject()
+            return False
+        self.ingest(unit, records)
+        return True
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def ingest(self, unit, records):
+        count = len(records)
+        with self._lock:
+            index = self._unit_index.get(unit)
+            if index is None:
+                index = len(self.units)
+                self._unit_index[unit] = index
+                self.units.append(unit)
+                self._last_seen.append(0.0)
+            self._last_seen[index] = time.time()
+            self.packets += 1
+            if count > self.capacity:
+                records = records[-self.capacity:]
+                self.count += count - self.capacity
+                count = self.capacity
+            start = self.count % self.capacity
+            first = min(count, self.capacity - start)
+            for rows, part in ((slice(start, start + first), records[:first]), (slice(0, count - first), records[first:])):
+                self.time[rows] = part["time"]
+                self.unit[rows] = index
+                self.leq[rows] = part["leq"]
+                self.lmax[rows] = part["lmax"]
+                self.band_levels[rows] = part["bands"]
+                self.dropped_blocks[rows] = part["dropped_blocks"]
+                self.input_overflows[rows] = part["input_overflows"]
+                self.input_underflows[rows] = part["input_underflows"]
+            self.count += count
+
+    def _window(self, seconds, unit=None):
+        # Row indices of records newer than `seconds` (and of one unit).
+        filled = min(self.count, self.capacity)
+        mask = self.time[:filled] >= time.time() - seconds
+        if unit is not None:
+            index = self._unit_index.get(unit)
+            if index is None:
+                return np.zeros(0, dtype=np.intp)
+            mask &= self.unit[:filled] == index
+        return np.flatnonzero(mask)
+
+    def summary(self, seconds=60.0):
+        with self._lock:
+            rows = self._window(seconds)
+            units = self.unit[rows]
+            leq = self.leq[rows]
+            lmax = self.lmax[rows]
+            times = self.time[rows]
+            dropped = self.dropped_blocks[rows]
+            overflows = self.input_overflows[rows]
+            underflows = self.input_underflows[rows]
+            names = list(self.units)
+            last_seen = list(self._last_seen)
+
+        count = len(names)
+        valid = leq != MISSING
+        energy = np.where(valid, 10 ** (from_centi_db(leq) / 10.0), 0.0)
+        energy_sum = np.bincount(units, weights=energy, minlength=count)
+        valid_count = np.bincount(units, weights=valid, minlength=count)
+        records = np.bincount(units, minlength=count)
+        peak = np.full(count, -np.inf)
+        np.maximum.at(peak, units, np.where(lmax != MISSING, lmax / 100.0, -np.inf))
+        latest_time = np.full(count, -np.inf)
+        np.maximum.at(latest_time, units, times)
+        # The counters are running totals, so the largest is the latest.
+        worst_dropped = np.zeros(count, dtype=np.int64)
+        np.maximum.at(worst_dropped, units, dropped)
+        worst_overflows = np.zeros(count, dtype=np.int64)
+        np.maximum.at(worst_overflows, units, overflows)
+        worst_underflows = np.zeros(count, dtype=np.int64)
+        np.maximum.at(worst_underflows, units, underflows)
+
+        now = time.time()
+        meters = []
+        for index, name in enumerate(names):
+            if not records[index]:
+                continue
+            meters.append({
+                "unit": name,
+                "records": int(records[index]),
+                "leq": _db_or_none(energy_sum[index], valid_count[index]),
+                "lmax": float(peak[index]) if np.isfinite(peak[index]) else None,
+                "last_record_time": float(latest_time[index]),
+                "age_s": round(now - last_seen[index], 3),
+                "dropped_blocks": int(worst_dropped[index]),
+                "input_overflows": int(worst_overflows[index]),
+                "input_underflows": int(worst_underflows[index]),
+            })
+        meters.sort(key=lambda meter: -np.inf if meter["leq"] is None else meter["leq"], reverse=True)
+        return {
+            "window_s": seconds,
+            "units": len(meters),
+            "leq": _db_or_none(energy.sum(), valid.sum()),
+            "lmax": max((meter["lmax"] for meter in meters if meter["lmax"] is not None), default=None),
+            "meters": meters,
+        }
+
+    def band_summary(self, seconds=60.0, unit=None):
+        # Energy mean of each band over the window, for one unit or the fleet.
+        with self._lock:
+            levels = self.band_levels[self._window(seconds, unit)]
+        valid = levels != MISSING
+        energy = np.where(valid, 10 ** (from_centi_db(levels) / 10.0), 0.0)
+        counts = valid.sum(axis=0)
+        return {
+            "window_s": seconds,
+            "unit": unit,
+            "records": len(levels),
+            "levels": [_db_or_none(total, n) for total, n in zip(energy.sum(axis=0), counts)],
+        }
+
+    def series(self, unit, seconds=3600.0):
+        with self._lock:
+            rows = self._window(seconds, unit)
+            times = self.time[rows]
+            leq = self.leq[rows]
+            lmax = self.lmax[rows]
+        order = np.argsort(times, kind="stable")
+        return {
+            "unit": unit,
+            "time": times[order].tolist(),
+            "leq": _nan_to_none(from_centi_db(leq[order])),
+            "lmax": _nan_to_none(from_centi_db(lmax[order])),
+        }
+
+    def stats(self):
+        with self._lock:
+            uptime = time.time() - self.started
+            return {
+                "uptime_s": round(uptime, 3),
+                "units": len(self.units),
+                "packets": self.packets,
+                "records": self.count,
+                "rejected": self.rejected,
+                "stored": min(self.count, self.capacity),
+                "capacity": self.capacity,
+                "packets_per_s": round(self.packets / uptime, 1) if uptime > 0 else None,
+            }
+
+
+def _db_or_none(energy, count):
+    if not count:
+        return None
+    return round(float(10 * np.log10(max(energy / count, 1e-30))), 2)
+
+
+def _nan_to_none(values):
+    return [None if np.isnan(value) else round(float(value), 2) for value in values]
+
+
+class UdpReceiver:
+    def __init__(self, store, address):
+        self.store = store
+        family, address = resolve(address, socket.SOCK_DGRAM)
+        self.socket = socket.socket(family, socket.SOCK_DGRAM)
+        # Room for bursts from many meters while the store lock is held.
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.socket.bind(address)
+        self.socket.settimeout(0.5)
+        self.address = self.socket.getsockname()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="udp-receiver", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.socket.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data = self.socket.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.store.ingest_packet(data)
+
+
+class TcpHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            header = self.rfile.read(FRAME.size)
+            if len(header) < FRAME.size:
+                return
+            (length,) = FRAME.unpack(header)
+            if length > MAX_FRAME:
+                # Not a meter (or out of step with the stream): drop the
+                # connection instead of reading an arbitrary length.
+                self.server.store.reject()
+                return
+            data = self.rfile.read(length)
+            if len(data) < length:
+                return
+            self.server.store.ingest_packet(data)
+
+
+class TcpReceiver(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, store, address):
+        self.address_family, address = resolve(address, socket.SOCK_STREAM)
+        super().__init__(address, TcpHandler)
+        self.store = store
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        store = self.server.store
+        try:
+            seconds = float(query.get("seconds", 60.0))
+            if url.path in ("/", "/units"):
+                body = store.summary(seconds)
+            elif url.path == "/bands":
+                body = store.band_summary(seconds, query.get("unit"))
+            elif url.path == "/series" and "unit" in query:
+                body = store.series(query["unit"], float(query.get("seconds", 3600.0)))
+            elif url.path == "/stats":
+                body = store.stats()
+            else:
+                self.send_error(404)
+                return
+        except ValueError:
+            self.send_error(400)
+            return
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SimulatedFleet:
+    # Stand-in meters for load testing on one machine: each tick produces a
+    # record per meter (a random walk around a per-meter level with a pink
+    # band shape) and sends them in the same batched packets real meters use.
+    # Packets carry the unit name, so all meters share one socket (or one
+    # TCP connection) however many are simulated.
+    def __init__(self, address, meters, rate=1.0, batch=10, protocol="udp", seed=None):
+        self.meters = int(meters)
+        self.period_s = 1.0 / float(rate)
+        self.batch = max(1, min(int(batch), MAX_BATCH))
+        self.names = [f"sim-{index:04d}" for index in range(self.meters)]
+        self.sender = TelemetrySender(address, protocol)
+        self._rng = np.random.default_rng(seed)
+        self._base = self._rng.uniform(55.0, 90.0, self.meters)
+        self._level = self._base.copy()
+        self._shape = -3.0 * np.log2(np.geomspace(20.0, 20000.0, BANDS) / 1000.0) - 15.0
+        self._records = np.zeros((self.meters, self.batch), dtype=record_dtype(BANDS))
+        self._filled = 0
+        self._dropped = np.zeros(self.meters, dtype=np.uint32)
+        self._overflows = np.zeros(self.meters, dtype=np.uint32)
+        self.sent = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="simulated-fleet", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.sender.close()
+
+    def _run(self):
+        next_time = time.time()
+        while not self._stop.wait(max(0.0, next_time - time.time())):
+            self._tick(next_time)
+            next_time += self.period_s
+            if next_time < time.time():
+                next_time = time.time() + self.period_s
+
+    def _tick(self, now):
+        rng = self._rng
+        self._level += 0.2 * (self._base - self._level) + rng.normal(0.0, 1.5, self.meters)
+        self._dropped += rng.random(self.meters) < 0.001
+        self._overflows += rng.random(self.meters) < 0.002
+        records = self._records[:, self._filled]
+        records["time"] = now
+        records["leq"] = to_centi_db(self._level)
+        records["lmax"] = to_centi_db(self._level + rng.exponential(3.0, self.meters))
+        records["bands"] = to_centi_db(
+            self._level[:, None] + self._shape + rng.normal(0.0, 1.0, (self.meters, BANDS))
+        )
+        records["dropped_blocks"] = self._dropped
+        records["input_overflows"] = self._overflows
+        self._filled += 1
+        if self._filled < self.batch:
+            return
+        self._filled = 0
+        for name, batch in zip(self.names, self._records):
+            try:
+                self.sender.send(encode_packet(name, batch))
+                self.sent += 1
+            except OSError:
+                self.failed += 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Collect telemetry from a fleet of sound monitors")
+    parser.add_argument("--udp", default="0.0.0.0:9750", help="UDP listen address (empty to disable)")
+    parser.add_argument("--tcp", default="", help="TCP listen address, e.g. 0.0.0.0:9750")
+    parser.add_argument("--http", default="127.0.0.1:9751", help="HTTP query address")
+    parser.add_argument("--capacity", type=int, default=1000000, help="Records kept in memory")
+    parser.add_argument("--simulate", type=int, default=0, metavar="N", help="Also run N simulated meters")
+    parser.add_argument("--simulate-rate", type=float, default=1.0, help="Records per second per simulated meter")
+    parser.add_argument("--simulate-batch", type=int, default=10, help="Records per simulated packet")
+    parser.add_argument("--simulate-protocol", choices=("udp", "tcp"), default=None)
+    return parser.parse_args()
+
+
+def _local(address):
+    host, port = address[:2]
+    if host in ("", "0.0.0.0"):
+        return "127.0.0.1", port
+    if host == "::":
+        return "::1", port
+    return host, port
+
+
+def main():
+    args = parse_args()
+    store = FleetStore(args.capacity)
+
+    udp = tcp = None
+    if args.udp:
+        udp = UdpReceiver(store, parse_address(args.udp, 9750))
+        udp.start()
+    if args.tcp:
+        tcp = TcpReceiver(store, parse_address(args.tcp, 9750))
+        threading.Thread(target=tcp.serve_forever, name="tcp-receiver", daemon=True).start()
+
+    server = ThreadingHTTPServer(parse_address(args.http, 9751), CollectorHandler)
+    server.daemon_threads = True
+    server.store = store
+
+    fleet = None
+    if args.simulate:
+        protocol = args.simulate_protocol or ("udp" if udp else "tcp")
+        receiver = udp.address if protocol == "udp" else tcp.server_address
+        fleet = SimulatedFleet(
+            _local(receiver), args.simulate, rate=args.simulate_rate, batch=args.simulate_batch, protocol=protocol
+        )
+        fleet.start()
+
+    def shutdown(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    host, port = server.server_address[:2]
+    print(f"Collector serving queries on http://{host}:{port}/", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        if fleet:
+            fleet.stop()
+        if udp:
+            udp.stop()
+        if tcp:
+            tcp.shutdown()
+            tcp.server_close()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b"SMLOG001"
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<8sIId")
+
+
+def record_dtype(bands):
+    return np.dtype([
+        ("time", "<f8"),
+        ("leq", "<f4"),
+        ("bands", "<f4", (bands,)),
+    ])
+
+
+def log_path(log_dir, timestamp):
+    return os.path.join(log_dir, time.strftime("levels-%Y%m%d.bin", time.localtime(timestamp)))
+
+
+def write_header(handle, bands, interval_s):
+    header = _HEADER.pack(MAGIC, record_dtype(bands).itemsize, bands, interval_s)
+    handle.write(header.ljust(HEADER_SIZE, b"\0"))
+
+
+def read_header(path):
+    with open(path, "rb") as handle:
+        raw = handle.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"{path}: truncated header")
+    magic, record_size, bands, interval_s = _HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a level log")
+    if record_dtype(bands).itemsize != record_size:
+        raise ValueError(f"{path}: unexpected record size {record_size}")
+    return {"bands": bands, "interval_s": interval_s, "record_size": record_size}
+
+
+def read_log(path):
+    header = read_header(path)
+    dtype = record_dtype(header["bands"])
+    # A crash can leave a partial record at the end; ignore it.
+    count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if count <= 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def read_day(log_dir, day):
+    if not isinstance(day, str):
+        day = day.strftime("%Y%m%d")
+    return read_log(os.path.join(log_dir, f"levels-{day}.bin"))
+
+
+class LevelLogger:
+    def __init__(self, audio, log_dir, interval_s=1.0, flush_s=10.0, bands=31):
+        self.audio = audio
+        self.log_dir = log_dir
+        self.interval_s = float(interval_s)
+        self.flush_s = float(flush_s)
+        self.bands = bands
+        self.dtype = record_dtype(bands)
+
+        self._batch = np.zeros(max(1, int(np.ceil(self.flush_s / self.interval_s))), dtype=self.dtype)
+        self._batch_len = 0
+        self._handle = None
+        self._handle_path = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="level-logger", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        counter = self.audio.get_energy_counter()
+        next_time = (np.floor(time.time() / self.interval_s) + 1) * self.interval_s
+        try:
+            while not self._stop.wait(max(0.0, next_time - time.time())):
+                latest = self.audio.get_energy_counter()
+                leq = self.audio.leq_between(counter, latest)
+                counter = latest
+
+                record = self._batch[self._batch_len]
+                record["time"] = next_time
+                record["leq"] = np.nan if leq is None else leq
+                record["bands"] = self.audio.get_spectrum()
+                self._batch_len += 1
+                if self._batch_len == len(self._batch):
+                    self._flush()
+
+                next_time += self.interval_s
+                if next_time < time.time():
+                    # Fell behind (e.g. suspended); resume on the next boundary.
+                    next_time = (np.floor(time.time() / self.interval_s) + 1) * self.interval_s
+        finally:
+            self._flush()
+            if self._handle:
+                self._handle.close()
+                self._handle = None
+
+    def _flush(self):
+        records = self._batch[:self._batch_len]
+        start = 0
+        while start < len(records):
+            path = log_path(self.log_dir, records[start]["time"])
+            end = start + 1
+            while end < len(records) and log_path(self.log_dir, records[end]["time"]) == path:
+                end += 1
+            self._open(path).write(records[start:end].tobytes())
+            start = end
+        if self._handle:
+            self._handle.flush()
+        self._batch_len = 0
+
+    def _open(self, path):
+        if self._handle_path == path:
+            return self._handle
+        if self._handle:
+            self._handle.close()
+
+        handle = open(path, "ab")
+        size = handle.tell()
+        if 0 < size < HEADER_SIZE:
+            # Cut off while the header was being written; nothing to keep.
+            handle.truncate(0)
+            size = 0
+        elif size and not self._compatible(path):
+            # Another format or band count: kept under a new name, so the
+            # day's records start again in a file of their own.
+            handle.close()
+            os.replace(path, _aside_path(path))
+            handle = open(path, "ab")
+            size = 0
+        if size == 0:
+            write_header(handle, self.bands, self.interval_s)
+        elif (size - HEADER_SIZE) % self.dtype.itemsize:
+            handle.truncate(size - (size - HEADER_SIZE) % self.dtype.itemsize)
+            handle.seek(0, os.SEEK_END)
+        self._handle = handle
+        self._handle_path = path
+        return handle
+
+    def _compatible(self, path):
+        try:
+            return read_header(path)["bands"] == self.bands
+        except (OSError, ValueError):
+            return False
+
+
+def _aside_path(path):
+    root, ext = os.path.splitext(path)
+    index = 1
+    while os.path.exists(f"{root}.{index}{ext}"):
+        index += 1
+    return f"{root}.{index}{ext}"
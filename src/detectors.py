@@ -0,0 +1,130 @@
+import math
+
+import numpy as np
+
+# ISO 1996-2 Annex K: a one-third-octave band holds a tone when its level
+# exceeds both adjacent bands by this much in each frequency range.
+TONAL_RANGES = ((25.0, 125.0, 15.0), (160.0, 400.0, 8.0), (500.0, 10000.0, 5.0))
+IMPULSE_FIELDS = ("time", "level_db", "level_difference_db", "onset_rate_db_s", "prominence", "penalty_db")
+
+
+class TonalDetector:
+    # Band levels are averaged (on energy) over the last `updates` spectrum
+    # updates in a fixed ring with a running sum; each update then costs a
+    # few small vector operations.
+    def __init__(self, bands, updates, channels=1):
+        bands = np.asarray(bands, dtype=np.float64)
+        self.thresholds = np.full(len(bands), np.nan)
+        for low, high, difference in TONAL_RANGES:
+            self.thresholds[(bands >= low) & (bands <= high)] = difference
+        # The outermost bands have only one neighbour.
+        self.thresholds[[0, -1]] = np.nan
+        self._assessed = ~np.isnan(self.thresholds)
+
+        self._ring = np.zeros((max(1, int(updates)), channels, len(bands)), dtype=np.float64)
+        self._sum = np.zeros((channels, len(bands)), dtype=np.float64)
+        self._index = 0
+        self._filled = 0
+        self.prominence = np.full((channels, len(bands)), np.nan, dtype=np.float32)
+        self.tonal = np.zeros((channels, len(bands)), dtype=bool)
+
+    def reset(self):
+        self._ring[:] = 0.0
+        self._sum[:] = 0.0
+        self._index = 0
+        self._filled = 0
+        self.prominence[:] = np.nan
+        self.tonal[:] = False
+
+    def update(self, band_levels):
+        slot = self._ring[self._index]
+        self._sum -= slot
+        np.power(10.0, np.asarray(band_levels) / 10.0, out=slot)
+        self._sum += slot
+        self._index = (self._index + 1) % len(self._ring)
+        self._filled = min(self._filled + 1, len(self._ring))
+        if self._index == 0:
+            # Recomputed once per lap so rounding in the running sum cannot drift.
+            np.sum(self._ring, axis=0, out=self._sum)
+
+        levels = 10 * np.log10(np.maximum(self._sum / self._filled, 1e-30))
+        # Prominence over the louder neighbour is the smaller of the two
+        # differences, so both neighbours are exceeded when it passes.
+        prominence = levels[:, 1:-1] - np.maximum(levels[:, :-2], levels[:, 2:])
+        self.prominence[:, 1:-1] = prominence
+        self.prominence[:, ~self._assessed] = np.nan
+        np.greater_equal(self.prominence, self.thresholds, out=self.tonal)
+
+
+class ImpulseDetector:
+    # Finds onsets in the short-term level: a run of rising levels gives the
+    # level difference and onset rate, rated with the Nordtest NT ACOU 112
+    # prominence P = 3 lg(rate) + 2 lg(difference). The level resolution is
+    # short_interval_s, so faster onsets read as that interval's rate.
+    MIN_RATE_DB_S = 10.0
+    MIN_DIFFERENCE_DB = 3.0
+
+    def __init__(self, threshold=5.0, capacity=32):
+        self.threshold = float(threshold)
+        self.events = np.full((int(capacity), len(IMPULSE_FIELDS)), np.nan)
+        self.count = 0
+        self._previous = None
+        self._rise_start = None
+        self._rise_s = 0.0
+
+    def reset(self):
+        self.events[:] = np.nan
+        self.count = 0
+        self._previous = None
+        self._rise_start = None
+
+    def add(self, db, duration, now):
+        previous = self._previous
+        self._previous = db
+        if previous is None:
+            return
+        if db > previous:
+            if self._rise_start is None:
+                self._rise_start = previous
+                self._rise_s = 0.0
+            self._rise_s += duration
+            return
+        if self._rise_start is not None:
+            self._onset(previous, now - duration)
+            self._rise_start = None
+
+    def _onset(self, peak, now):
+        difference = peak - self._rise_start
+        rate = difference / self._rise_s
+        if difference < self.MIN_DIFFERENCE_DB or rate < self.MIN_RATE_DB_S:
+            return
+        prominence = 3 * math.log10(rate) + 2 * math.log10(difference)
+        if prominence <= self.threshold:
+            return
+        penalty = 1.8 * (prominence - 5.0) if prominence > 5.0 else 0.0
+        self.events[self.count % len(self.events)] = (now, peak, difference, rate, prominence, penalty)
+        self.count += 1
+
+    def recent(self):
+        # Stored events, oldest first.
+        count = min(self.count, len(self.events))
+        start = self.count % len(self.events) if self.count > len(self.events) else 0
+        return np.roll(self.events, -start, axis=0)[:count]
+
+
+def tonal_summary(bands, prominence, tonal):
+    return {
+        "bands": list(bands),
+        "prominence_db": [None if np.isnan(value) else round(float(value), 2) for value in prominence],
+        "tonal": [bool(flag) for flag in tonal],
+    }
+
+
+def impulse_summary(events, count):
+    return {
+        "count": int(count),
+        "recent": [
+            {field: round(float(value), 3) for field, value in zip(IMPULSE_FIELDS, row)}
+            for row in events
+        ],
+    }
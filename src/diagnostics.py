@@ -0,0 +1,85 @@
+import bisect
+
+import numpy as np
+
+
+class LatencyHistogram:
+    # Log-spaced duration bins, so recording is a bisect and an increment
+    # and memory stays fixed however long the process runs.
+    def __init__(self, low_us=1.0, high_us=1e7, bins_per_decade=10):
+        decades = int(round(np.log10(high_us / low_us)))
+        self.edges = list(np.logspace(np.log10(low_us), np.log10(high_us), decades * bins_per_decade + 1))
+        self.counts = [0] * (len(self.edges) + 1)
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def add(self, seconds):
+        us = seconds * 1e6
+        self.counts[bisect.bisect_right(self.edges, us)] += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def summary(self):
+        # Lock-free against a concurrent add(): the bins are copied in one
+        # step and the count and percentiles come from that copy, so at
+        # worst the mean or max is one sample ahead of them.
+        counts = list(self.counts)
+        count = sum(counts)
+        max_us = self.max_us
+        return {
+            "count": count,
+            "mean_us": self.total_us / count if count else None,
+            "p50_us": self._percentile(counts, count, 50, max_us),
+            "p99_us": self._percentile(counts, count, 99, max_us),
+            "max_us": max_us if count else None,
+        }
+
+    def _percentile(self, counts, total, n, max_us):
+        if not total:
+            return None
+        target = total * n / 100.0
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                # Upper bin edge, never above the largest duration seen.
+                return min(self.edges[min(index, len(self.edges) - 1)], max_us)
+        return max_us
+
+
+class Diagnostics:
+    # Every counter and timing has a single writer: the audio callback owns
+    # "blocks", "callback" and the latencies, the thread that processes
+    # blocks owns "process" and the thread that drives the spectrum owns
+    # "compute_spectrum". Nothing is locked, and readers take a snapshot.
+    # The UI thread's timings ("paint", "ui_refresh") live in an instance of
+    # their own. The xrun counters are kept by AudioProcessor (telemetry
+    # reports them whether or not diagnostics are on) and added to its
+    # snapshot there; COUNTERS is the order they are reported in.
+    COUNTERS = ("blocks", "input_overflow", "input_underflow", "dropped_blocks")
+    AUDIO_TIMINGS = ("callback", "process", "compute_spectrum")
+    UI_TIMINGS = ("paint", "ui_refresh")
+
+    def __init__(self, timings=AUDIO_TIMINGS):
+        self.blocks = 0
+        self.histograms = {name: LatencyHistogram() for name in timings}
+        self.stream_latency_s = None
+        self.input_latency_s = None
+
+    def record(self, name, seconds):
+        self.histograms[name].add(seconds)
+
+    def on_callback(self, time_info):
+        self.blocks += 1
+        if time_info is not None:
+            # Age of the first sample in the block when the callback runs.
+            self.input_latency_s = time_info.currentTime - time_info.inputBufferAdcTime
+
+    def snapshot(self):
+        return {
+            "counters": {"blocks": self.blocks},
+            "timings": {name: histogram.summary() for name, histogram in self.histograms.items()},
+            "stream_latency_s": self.stream_latency_s,
+            "input_latency_s": self.input_latency_s,
+        }
@@ -0,0 +1,191 @@
+import json
+import math
+import os
+import threading
+import time
+
+# Criterion level and time, exchange rate and threshold of the common
+# occupational noise standards. A threshold of None integrates every level.
+PRESETS = {
+    "osha_pel": {"criterion_db": 90.0, "exchange_db": 5.0, "threshold_db": 90.0},
+    "osha_hc": {"criterion_db": 90.0, "exchange_db": 5.0, "threshold_db": 80.0},
+    "niosh": {"criterion_db": 85.0, "exchange_db": 3.0, "threshold_db": None},
+}
+CHECKPOINT_VERSION = 1
+FIELDS = ("dose_pct", "twa", "projected_dose_pct", "projected_twa", "duration_s", "lmax", "start_time")
+
+
+class DoseMeter:
+    # Dose is the sum of duration / allowed time at each short-term level,
+    # where the allowed time halves for every exchange_db above the
+    # criterion level; levels below the threshold add time but no dose.
+    def __init__(self, name, criterion_db=90.0, exchange_db=5.0, threshold_db=80.0, criterion_hours=8.0):
+        self.name = name
+        self.criterion_db = float(criterion_db)
+        self.exchange_db = float(exchange_db)
+        self.threshold_db = None if threshold_db is None else float(threshold_db)
+        self.criterion_s = float(criterion_hours) * 3600.0
+        self.reset()
+
+    def reset(self, start_time=None):
+        self.dose = 0.0
+        self.duration = 0.0
+        self.max_db = None
+        self.start_time = start_time
+
+    def add(self, db, duration):
+        if self.threshold_db is None or db >= self.threshold_db:
+            self.dose += duration / self.criterion_s * 2.0 ** ((db - self.criterion_db) / self.exchange_db)
+        self.duration += duration
+        if self.max_db is None or db > self.max_db:
+            self.max_db = db
+
+    def _level(self, dose):
+        # Level that gives this dose over the criterion time.
+        if dose <= 0:
+            return None
+        return self.criterion_db + self.exchange_db * math.log2(dose)
+
+    def summary(self):
+        projected = self.dose * self.criterion_s / self.duration if self.duration > 0 else None
+        return {
+            "dose_pct": 100.0 * self.dose,
+            "twa": self._level(self.dose),
+            "projected_dose_pct": None if projected is None else 100.0 * projected,
+            "projected_twa": None if projected is None else self._level(projected),
+            "duration_s": self.duration,
+            "lmax": self.max_db,
+            "start_time": self.start_time,
+        }
+
+    def settings(self):
+        return [self.criterion_db, self.exchange_db, self.threshold_db, self.criterion_s]
+
+    def state(self):
+        return {"dose": self.dose, "duration": self.duration, "max_db": self.max_db, "start_time": self.start_time}
+
+    def restore(self, state):
+        self.dose = float(state["dose"])
+        self.duration = float(state["duration"])
+        self.max_db = state["max_db"]
+        self.start_time = state["start_time"]
+
+
+def dose_criteria(config):
+    # Named presets from dose_presets plus any custom criteria, each a dict
+    # of DoseMeter arguments with a "name".
+    criteria = []
+    for name in config.get("dose_presets", ["osha_hc", "niosh"]):
+        if name not in PRESETS:
+            raise ValueError(f"Unknown dose preset: {name}")
+        criteria.append(dict(PRESETS[name], name=name))
+    criteria.extend(dict(criterion) for criterion in config.get("dose_criteria", []))
+    return criteria
+
+
+class DoseEngine:
+    # Integrates every criterion from the short-term levels on the audio
+    # thread; a background thread copies the few accumulated numbers to a
+    # checkpoint file so a restart within the shift carries on from there.
+    def __init__(self, criteria, shift_hours=8.0, checkpoint_path=None, checkpoint_s=10.0):
+        self.meters = [DoseMeter(**criterion) for criterion in criteria]
+        self.shift_s = float(shift_hours) * 3600.0
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_s = float(checkpoint_s)
+        self.restored = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, db, duration, now=None):
+        if now is None:
+            now = time.time()
+        with self._lock:
+            for meter in self.meters:
+                if meter.start_time is None or now - meter.start_time >= self.shift_s:
+                    meter.reset(now)
+                meter.add(db, duration)
+
+    def reset(self):
+        with self._lock:
+            for meter in self.meters:
+                meter.reset()
+
+    def summary(self):
+        with self._lock:
+            return {meter.name: meter.summary() for meter in self.meters}
+
+    def start(self):
+        if self._thread or not self.checkpoint_path:
+            return
+        self.load_checkpoint()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="dose-checkpoint", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.checkpoint_s):
+                self.save_checkpoint()
+        finally:
+            self.save_checkpoint()
+
+    def _checkpoint(self):
+        with self._lock:
+            return {
+                "version": CHECKPOINT_VERSION,
+                "saved": time.time(),
+                "meters": {
+                    meter.name: dict(meter.state(), settings=meter.settings()) for meter in self.meters
+                },
+            }
+
+    def save_checkpoint(self):
+        # Written next to the target and renamed over it, so a crash leaves
+        # either the previous checkpoint or the new one, never a partial file.
+        payload = json.dumps(self._checkpoint()).encode("utf-8")
+        partial = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint_path)), exist_ok=True)
+            with open(partial, "wb") as handle:
+                handle.write(payload)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(partial, self.checkpoint_path)
+        except OSError as exc:
+            print(f"Dose: could not write checkpoint: {exc}")
+
+    def load_checkpoint(self, now=None):
+        # Resumes each criterion whose settings match and whose shift is
+        # still running; anything else starts from zero.
+        if now is None:
+            now = time.time()
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as handle:
+                checkpoint = json.load(handle)
+        except (OSError, ValueError):
+            return
+        if not isinstance(checkpoint, dict) or checkpoint.get("version") != CHECKPOINT_VERSION:
+            return
+        saved = checkpoint.get("meters", {})
+        with self._lock:
+            for meter in self.meters:
+                state = saved.get(meter.name)
+                if not state or state.get("settings") != meter.settings():
+                    continue
+                start_time = state.get("start_time")
+                if start_time is None or now - start_time >= self.shift_s:
+                    continue
+                try:
+                    meter.restore(state)
+                except (KeyError, TypeError, ValueError):
+                    meter.reset()
+                    continue
+                self.restored = True
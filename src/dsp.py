@@ -0,0 +1,102 @@
+import re
+import threading
+
+import numpy as np
+
+# SciPy releases whose private sosfilt kernel takes (sos, x, zi) with x as
+# (channels, frames) and zi as (channels, sections, 2), filtering in place.
+SOSFILT_KERNEL_VERSIONS = ((1, 4), (2, 0))
+
+
+def _load_sosfilt():
+    # The public sosfilt validates, reshapes and copies its inputs on every
+    # call, which costs more than the filtering itself for short blocks, so
+    # the compiled kernel is used directly on releases known to have it.
+    try:
+        import scipy
+    except ImportError:
+        return None
+    version = tuple(int(part) for part in re.findall(r"\d+", scipy.__version__)[:2])
+    low, high = SOSFILT_KERNEL_VERSIONS
+    if not low <= version < high:
+        return None
+    try:
+        from scipy.signal._sosfilt import _sosfilt
+    except ImportError:
+        return None
+    return _sosfilt
+
+
+# Importing the kernel loads all of scipy.signal, over a second on a Pi, so
+# it is resolved on a background thread (started by preload_sosfilt while
+# the UI and stream are built) and joined before the first block.
+_sosfilt = None
+_resolved = False
+_loader = None
+_loader_lock = threading.Lock()
+
+
+def _resolve():
+    global _sosfilt, _resolved
+    _sosfilt = _load_sosfilt()
+    _resolved = True
+
+
+def preload_sosfilt():
+    global _loader
+    with _loader_lock:
+        if _loader is None and not _resolved:
+            _loader = threading.Thread(target=_resolve, name="sosfilt-import", daemon=True)
+            _loader.start()
+
+
+def resolve_sosfilt():
+    # Waits for the kernel import. SciPy's package init is circular, so a
+    # second thread importing any part of scipy meanwhile can fail half way;
+    # code that designs filters calls this before its own scipy imports.
+    with _loader_lock:
+        loader = _loader
+        if loader is None and not _resolved:
+            _resolve()
+    if loader is not None:
+        loader.join()
+
+
+class SosFilter:
+    def __init__(self, sos, channels=1, dtype=np.float64):
+        self.sos = np.ascontiguousarray(sos, dtype=dtype)
+        self.zi = np.zeros((channels, self.sos.shape[0], 2), dtype=dtype)
+
+    def reset(self):
+        self.zi[:] = 0.0
+
+    def process(self, x):
+        # Filters a C-contiguous (channels, frames) array in place.
+        if not _resolved:
+            resolve_sosfilt()
+        if _sosfilt is not None:
+            _sosfilt(self.sos, x, self.zi)
+            return x
+        from scipy.signal import sosfilt
+
+        y, zi = sosfilt(self.sos, x, axis=-1, zi=self.zi.transpose(1, 0, 2))
+        x[...] = y
+        self.zi[...] = zi.transpose(1, 0, 2)
+        return x
+
+
+class ScratchBuffers:
+    # Named flat buffers, grown only when a block outgrows them, so the
+    # steady-state audio path reuses the same memory on every block.
+    def __init__(self, dtype=np.float64):
+        self.dtype = dtype
+        self._buffers = {}
+
+    def view(self, name, rows, frames):
+        buffer = self._buffers.get(name)
+        size = rows * frames
+        if buffer is None or buffer.size < size:
+            buffer = np.zeros(size, dtype=self.dtype)
+            self._buffers[name] = buffer
+        # A leading slice of a flat buffer reshapes to a C-contiguous view.
+        return buffer[:size].reshape(rows, frames)
@@ -0,0 +1,461 @@
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import zlib
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .audio import GRAPHIC_EQ_BANDS
+from .diagnostics import Diagnostics
+from .dose import FIELDS as DOSE_FIELDS
+from .detectors import IMPULSE_FIELDS, impulse_summary, tonal_summary
+from .dose import dose_criteria
+from .levels import LEVEL_FIELDS
+from .stats import PERCENTILES
+
+PERIODS = ("hour", "shift", "total")
+STAT_FIELDS = ("leq", "lmax", "lmin", "duration_s", "start_time") + tuple(f"l{n}" for n in PERCENTILES)
+IMPULSE_ROWS = 8
+# Timings measured in the engine; paint and refresh times are the UI's own.
+ENGINE_TIMINGS = Diagnostics.AUDIO_TIMINGS
+TIMING_FIELDS = ("count", "mean_us", "p50_us", "p99_us", "max_us")
+HISTORY_POINTS = 4000
+
+
+def snapshot_dtype(channels, doses, bands=len(GRAPHIC_EQ_BANDS)):
+    return np.dtype([
+        ("time", "<f8"),
+        ("first_reading_s", "<f8"),
+        ("dbs", "<f8", (channels,)),
+        ("spectrum", "<f4", (channels, bands)),
+        ("statistics", "<f8", (len(PERIODS), len(STAT_FIELDS))),
+        ("dose", "<f8", (doses, len(DOSE_FIELDS))),
+        ("prominence", "<f4", (channels, bands)),
+        ("tonal", "u1", (channels, bands)),
+        ("impulse_count", "<u8", (channels,)),
+        ("impulses", "<f8", (channels, IMPULSE_ROWS, len(IMPULSE_FIELDS))),
+        ("levels", "<f8", (channels, len(LEVEL_FIELDS))),
+        ("counters", "<u8", (len(Diagnostics.COUNTERS),)),
+        ("timings", "<f8", (len(ENGINE_TIMINGS), len(TIMING_FIELDS))),
+        ("latencies", "<f8", (2,)),
+    ])
+
+
+def history_dtype(points=HISTORY_POINTS):
+    # One Trend page selection: up to `points` buckets, the one still
+    # filling and one spare.
+    return np.dtype([
+        ("span_s", "<f8"),
+        ("period_s", "<f8"),
+        ("count", "<u8"),
+        ("time", "<f8", (points + 2,)),
+        ("levels", "<f4", (points + 2, 3)),
+    ])
+
+
+class SharedSlots:
+    # Two copies of a record in shared memory, each stored with a checksum
+    # of its contents. The writer fills the copy the index does not point
+    # at and then flips the index; a reader keeps a copy only if it matches
+    # its checksum, so a copy torn by a concurrent write, or seen half
+    # updated through a weakly ordered CPU's caches, is retried, never used.
+    def __init__(self, dtype, buffer, offset=0):
+        slot = np.dtype([("checksum", "<u4"), ("pad", "<u4"), ("record", dtype)])
+        self._index = np.ndarray((), dtype="<u8", buffer=buffer, offset=offset)
+        self._slots = np.ndarray((2,), dtype=slot, buffer=buffer, offset=offset + 8)
+        self._incoming = np.zeros((), dtype=slot)
+
+    @staticmethod
+    def size(dtype):
+        return 8 + 2 * (8 + dtype.itemsize)
+
+    def write(self, record):
+        index = 1 - int(self._index)
+        self._slots["record"][index] = record
+        self._slots["checksum"][index] = zlib.crc32(record.tobytes())
+        self._index[...] = index
+
+    def read(self, out):
+        # Fills out and returns True, or leaves it untouched if no
+        # consistent copy turned up (a writer stalled mid-copy).
+        for _ in range(100):
+            self._incoming[...] = self._slots[int(self._index) & 1]
+            record = self._incoming["record"]
+            if zlib.crc32(record.tobytes()) == int(self._incoming["checksum"]):
+                out[...] = record
+                return True
+            time.sleep(0)
+        return False
+
+    def release(self):
+        # Drops the views so the shared memory can be closed.
+        self._index = None
+        self._slots = None
+
+
+def shared_size(config):
+    channels = int(config.get("channels", 1))
+    snapshot = snapshot_dtype(channels, len(dose_criteria(config)))
+    return SharedSlots.size(snapshot) + SharedSlots.size(history_dtype())
+
+
+def shared_slots(config, buffer):
+    channels = int(config.get("channels", 1))
+    snapshot = snapshot_dtype(channels, len(dose_criteria(config)))
+    return (
+        SharedSlots(snapshot, buffer),
+        SharedSlots(history_dtype(), buffer, SharedSlots.size(snapshot)),
+    )
+
+
+def _nan_if_none(value):
+    return np.nan if value is None else value
+
+
+def _none_if_nan(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def publish(slots, snapshot, audio):
+    # Fills the engine's local snapshot and hands it to the shared slots.
+    dbs = audio.get_channel_dbs()
+    spectra = audio.get_channel_spectra()
+    statistics = audio.get_statistics()
+    dose = audio.get_dose()
+    detections = audio.get_detector_state()
+    snapshot["time"] = time.time()
+    snapshot["first_reading_s"] = _nan_if_none(audio.first_reading_s)
+    snapshot["dbs"] = dbs
+    snapshot["spectrum"] = spectra
+    for row, period in enumerate(PERIODS):
+        values = statistics[period]
+        snapshot["statistics"][row] = [_nan_if_none(values[field]) for field in STAT_FIELDS]
+    for row, values in enumerate(dose.values()):
+        snapshot["dose"][row] = [_nan_if_none(values[field]) for field in DOSE_FIELDS]
+    if detections is not None:
+        snapshot["prominence"] = detections[0]
+        snapshot["tonal"] = detections[1]
+        snapshot["impulse_count"] = detections[3]
+        snapshot["impulses"] = np.nan
+        for channel, recent in enumerate(detections[2]):
+            recent = recent[-IMPULSE_ROWS:]
+            snapshot["impulses"][channel, IMPULSE_ROWS - len(recent):] = recent
+    for channel in range(audio.channels):
+        levels = audio.get_levels(channel)
+        if levels:
+            snapshot["levels"][channel] = [levels[name] for name in LEVEL_FIELDS]
+    diagnostics = audio.get_diagnostics()
+    if diagnostics is not None:
+        snapshot["counters"] = [diagnostics["counters"][name] for name in Diagnostics.COUNTERS]
+        for row, name in enumerate(ENGINE_TIMINGS):
+            timing = diagnostics["timings"][name]
+            snapshot["timings"][row] = [_nan_if_none(timing[field]) for field in TIMING_FIELDS]
+        snapshot["latencies"] = [
+            _nan_if_none(diagnostics["stream_latency_s"]), _nan_if_none(diagnostics["input_latency_s"])
+        ]
+    slots.write(snapshot)
+
+
+def publish_history(slots, record, audio, span_s):
+    history = audio.get_history(span_s, HISTORY_POINTS)
+    count = len(history["time"])
+    record["span_s"] = span_s
+    record["period_s"] = history["period_s"]
+    record["count"] = count
+    record["time"][:count] = history["time"]
+    for column, name in enumerate(("leq", "max", "min")):
+        record["levels"][:count, column] = history[name]
+    slots.write(record)
+
+
+def _attach(name):
+    # The engine shares the UI process's resource tracker, so attaching
+    # re-registers the same name and the UI's unlink still clears it.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def run_engine(config, shm_name, commands, data_ready, started_at):
+    # Entry point of the engine process: owns the audio stream (and the level
+    # logger, telemetry and event capture, which need the audio), and
+    # publishes readings into shared memory for the UI process.
+    from .audio import AudioProcessor
+    from .datalog import LevelLogger
+    from .telemetry import make_emitter
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    cpu = config.get("engine_cpu")
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {int(cpu)})
+
+    shm = _attach(shm_name)
+    slots, history_slots = shared_slots(config, shm.buf)
+    snapshot = np.zeros((), dtype=snapshot_dtype(int(config.get("channels", 1)), len(dose_criteria(config))))
+    snapshot["levels"] = np.nan
+    snapshot["timings"] = np.nan
+    snapshot["latencies"] = np.nan
+    history = np.zeros((), dtype=history_dtype())
+    history_span = None
+
+    audio = AudioProcessor(config)
+    audio.started_at = started_at
+    logger = None
+    if config.get("log_dir"):
+        logger = LevelLogger(
+            audio,
+            os.path.abspath(config["log_dir"]),
+            interval_s=config.get("log_interval_s", 1.0),
+            flush_s=config.get("log_flush_s", 10.0),
+            bands=len(GRAPHIC_EQ_BANDS),
+        )
+    telemetry = make_emitter(audio, config, bands=len(GRAPHIC_EQ_BANDS))
+
+    # The same intervals the UI refreshes at, with the same defaults.
+    update_interval_ms = int(config.get("update_interval_ms", 250))
+    update_interval_s = update_interval_ms / 1000.0
+    publish_interval_s = min(update_interval_s, int(config.get("meter_interval_ms", update_interval_ms)) / 1000.0)
+
+    audio.start()
+    if logger:
+        logger.start()
+    if telemetry:
+        telemetry.start()
+    try:
+        next_spectrum = time.monotonic()
+        while True:
+            try:
+                command, argument = commands.get(timeout=publish_interval_s)
+            except queue.Empty:
+                command = None
+            if command == "stop":
+                break
+            if command == "reset_statistics":
+                audio.reset_statistics(argument)
+            elif command == "reset_dose":
+                audio.reset_dose()
+            elif command == "set_calibration_profile":
+                audio.set_calibration_profile(*argument)
+            elif command == "history_span":
+                history_span = argument
+            now = time.monotonic()
+            if audio.processing != "worker" and now >= next_spectrum:
+                audio.compute_spectrum()
+                next_spectrum = now + update_interval_s
+            publish(slots, snapshot, audio)
+            if history_span is not None and audio.history is not None:
+                publish_history(history_slots, history, audio, history_span)
+            data_ready.set()
+    finally:
+        if telemetry:
+            telemetry.stop()
+        if logger:
+            logger.stop()
+        audio.stop()
+        slots.release()
+        history_slots.release()
+        shm.close()
+
+
+class EngineProxy:
+    # Stands in for AudioProcessor in the UI process while the audio engine
+    # runs in its own process (and interpreter, so it never waits on the
+    # UI's GIL). Readings come from the shared snapshot, no pickling. The
+    # spectrogram streams too many rows to share this way.
+    def __init__(self, config):
+        if config.get("spectrogram", False):
+            raise ValueError("spectrogram (the Waterfall page) is not available with engine_process")
+        self.config = dict(config)
+        self.channels = int(config.get("channels", 1))
+        self.processing = "engine"
+        # The engine keeps the diagnostics; this only has to be set for the
+        # GUI to record its own paint and refresh times.
+        self.diagnostics = True if config.get("diagnostics", False) else None
+        self.spectrogram = None
+        # The engine keeps the history and sends the selection the Trend
+        # page asks for; this only has to be set for the page to exist.
+        self.history = True if config.get("history", True) else None
+        # The engine runs the detectors (and keeps the spectrum current).
+        self.tonal_detector = None
+        self.worker_spectrum = True
+        self.started_at = time.monotonic()
+
+        self._dose_names = [criterion["name"] for criterion in dose_criteria(config)]
+        self._shm = None
+        self._slots = None
+        self._history_slots = None
+        self._snapshot = np.zeros((), dtype=snapshot_dtype(self.channels, len(self._dose_names)))
+        for field in ("first_reading_s", "statistics", "dose", "prominence", "impulses", "levels", "timings", "latencies"):
+            self._snapshot[field] = np.nan
+        self._history = np.zeros((), dtype=history_dtype())
+        self._history["span_s"] = np.nan
+        self._history_span = None
+        self.detectors = bool(config.get("detectors", False))
+        self.level_engine = bool(config.get("level_engine", False))
+        self._listeners = []
+        self._process = None
+        self._watcher = None
+        self._stopping = threading.Event()
+        context = multiprocessing.get_context("spawn")
+        self._context = context
+        self._commands = context.Queue()
+        self._data_ready = context.Event()
+
+    @property
+    def first_reading_s(self):
+        return _none_if_nan(self._read()["first_reading_s"])
+
+    def start(self):
+        if self._process:
+            return
+        self._shm = shared_memory.SharedMemory(create=True, size=shared_size(self.config))
+        self._slots, self._history_slots = shared_slots(self.config, self._shm.buf)
+        self._slots.write(self._snapshot)
+        self._history_slots.write(self._history)
+        self._history_span = None
+        self._process = self._context.Process(
+            target=run_engine,
+            args=(self.config, self._shm.name, self._commands, self._data_ready, self.started_at),
+            name="audio-engine",
+            daemon=True,
+        )
+        self._process.start()
+        self._stopping.clear()
+        self._watcher = threading.Thread(target=self._watch, name="engine-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        if not self._process:
+            return
+        self._stopping.set()
+        self._watcher.join()
+        self._watcher = None
+        self._commands.put(("stop", None))
+        self._process.join(5.0)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._process = None
+        self._slots.release()
+        self._history_slots.release()
+        self._slots = None
+        self._history_slots = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _watch(self):
+        while not self._stopping.is_set():
+            if self._data_ready.wait(0.5):
+                self._data_ready.clear()
+                for listener in self._listeners:
+                    listener()
+
+    def _read(self):
+        # A read that finds no consistent copy keeps the previous snapshot.
+        if self._slots is not None:
+            self._slots.read(self._snapshot)
+        return self._snapshot
+
+    def get_last_db(self, channel=0):
+        return float(self._read()["dbs"][channel])
+
+    def get_channel_dbs(self):
+        return [float(db) for db in self._read()["dbs"]]
+
+    def get_spectrum(self, channel=0):
+        return self._read()["spectrum"][channel].copy()
+
+    def get_channel_spectra(self):
+        return self._read()["spectrum"].copy()
+
+    def get_statistics(self):
+        statistics = self._read()["statistics"]
+        return {
+            period: {field: _none_if_nan(value) for field, value in zip(STAT_FIELDS, statistics[row])}
+            for row, period in enumerate(PERIODS)
+        }
+
+    def reset_statistics(self, period=None):
+        self._commands.put(("reset_statistics", period))
+
+    def set_calibration_profile(self, path, channel=None):
+        self._commands.put(("set_calibration_profile", (path, channel)))
+
+    def get_detections(self, channel=0):
+        if not self.detectors:
+            return None
+        snapshot = self._read()
+        impulses = snapshot["impulses"][channel]
+        return {
+            "tonal": tonal_summary(GRAPHIC_EQ_BANDS, snapshot["prominence"][channel], snapshot["tonal"][channel]),
+            "impulsive": impulse_summary(impulses[~np.isnan(impulses[:, 0])], snapshot["impulse_count"][channel]),
+        }
+
+    def get_dose(self):
+        dose = self._read()["dose"]
+        return {
+            name: {field: _none_if_nan(value) for field, value in zip(DOSE_FIELDS, dose[row])}
+            for row, name in enumerate(self._dose_names)
+        }
+
+    def reset_dose(self):
+        self._commands.put(("reset_dose", None))
+
+    def get_levels(self, channel=0):
+        if not self.level_engine:
+            return {}
+        levels = self._read()["levels"][channel]
+        return {name: float(value) for name, value in zip(LEVEL_FIELDS, levels)}
+
+    def get_history(self, span_s, max_points=HISTORY_POINTS):
+        # Asks the engine for this span, and until it arrives returns
+        # whatever is there for it (nothing, the first time).
+        if self.history is None:
+            return None
+        if span_s != self._history_span:
+            self._history_span = span_s
+            self._commands.put(("history_span", span_s))
+        record = self._history
+        if self._history_slots is not None:
+            self._history_slots.read(record)
+        count = int(record["count"]) if float(record["span_s"]) == span_s else 0
+        levels = record["levels"][:count]
+        return {
+            "period_s": float(record["period_s"]),
+            "time": record["time"][:count].copy(),
+            "leq": levels[:, 0].copy(),
+            "max": levels[:, 1].copy(),
+            "min": levels[:, 2].copy(),
+        }
+
+    def get_diagnostics(self):
+        if self.diagnostics is None:
+            return None
+        snapshot = self._read()
+        summary = {
+            "counters": {name: int(value) for name, value in zip(Diagnostics.COUNTERS, snapshot["counters"])},
+            "timings": {},
+        }
+        for row, name in enumerate(ENGINE_TIMINGS):
+            timing = {field: _none_if_nan(value) for field, value in zip(TIMING_FIELDS, snapshot["timings"][row])}
+            timing["count"] = int(timing["count"] or 0)
+            summary["timings"][name] = timing
+        summary["stream_latency_s"], summary["input_latency_s"] = (
+            _none_if_nan(value) for value in snapshot["latencies"]
+        )
+        summary["first_reading_s"] = self.first_reading_s
+        return summary
+
+    def compute_spectrum(self):
+        # The engine keeps the spectrum current itself.
+        pass
@@ -0,0 +1,195 @@
+import collections
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class EventCapture:
+    # Runs on the audio (or worker) thread. Clips are recorded into a fixed
+    # pool of preallocated buffers and handed to a writer thread; if every
+    # buffer is still waiting to be written the event is counted as dropped
+    # rather than blocking or allocating.
+    def __init__(
+        self,
+        sample_rate,
+        channels,
+        event_dir,
+        threshold_db,
+        hysteresis_db=3.0,
+        pre_s=2.0,
+        post_s=1.0,
+        max_s=30.0,
+        slots=4,
+        band_levels=None,
+    ):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.event_dir = event_dir
+        self.threshold_db = float(threshold_db)
+        self.release_db = self.threshold_db - float(hysteresis_db)
+        self.pre_frames = max(1, int(round(pre_s * sample_rate)))
+        self.post_frames = int(round(post_s * sample_rate))
+        self.max_frames = self.pre_frames + max(1, int(round(max_s * sample_rate)))
+        self.band_levels = band_levels
+
+        self._pre = np.zeros((channels, self.pre_frames), dtype=np.float32)
+        self._pre_idx = 0
+        self._pre_filled = 0
+
+        self._free = queue.Queue()
+        for _ in range(max(1, int(slots))):
+            self._free.put(np.zeros((channels, self.max_frames), dtype=np.float32))
+        self._pending = queue.Queue()
+
+        self._active = False
+        self._starting = False
+        self._clip = None
+        self._clip_len = 0
+        self._release_left = None
+        self._event = None
+
+        self.written = 0
+        self.dropped = 0
+        self.recent = collections.deque(maxlen=20)
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        os.makedirs(self.event_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        if self._active:
+            self._finish()
+        self._pending.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def on_level(self, db, duration, now=None):
+        if not self._active:
+            if db < self.threshold_db:
+                return
+            self._active = True
+            self._starting = True
+            self._event = {
+                "start_time": time.time() if now is None else now,
+                "peak_dba": db,
+                "energy": 0.0,
+                "duration": 0.0,
+            }
+        event = self._event
+        event["peak_dba"] = max(event["peak_dba"], db)
+        event["energy"] += 10 ** (db / 10.0) * duration
+        event["duration"] += duration
+        if db >= self.release_db:
+            self._release_left = None
+        elif self._release_left is None:
+            self._release_left = self.post_frames
+
+    def process(self, samples):
+        count = samples.shape[1]
+        if self._starting:
+            self._starting = False
+            self._begin()
+        if self._active:
+            if self._clip is not None:
+                n = min(count, self.max_frames - self._clip_len)
+                self._clip[:, self._clip_len:self._clip_len + n] = samples[:, :n]
+                self._clip_len += n
+            if self._release_left is not None:
+                self._release_left -= count
+            if (self._release_left is not None and self._release_left <= 0) or (
+                self._clip is not None and self._clip_len >= self.max_frames
+            ):
+                self._finish()
+        self._append_pre(samples)
+
+    def _append_pre(self, samples):
+        count = samples.shape[1]
+        size = self.pre_frames
+        if count >= size:
+            self._pre[:] = samples[:, -size:]
+            self._pre_idx = 0
+            self._pre_filled = size
+            return
+        end = self._pre_idx + count
+        if end <= size:
+            self._pre[:, self._pre_idx:end] = samples
+        else:
+            first = size - self._pre_idx
+            self._pre[:, self._pre_idx:] = samples[:, :first]
+            self._pre[:, :count - first] = samples[:, first:]
+        self._pre_idx = end % size
+        self._pre_filled = min(size, self._pre_filled + count)
+
+    def _begin(self):
+        try:
+            self._clip = self._free.get_nowait()
+        except queue.Empty:
+            self._clip = None
+            self.dropped += 1
+            return
+        # Oldest pre-trigger samples first.
+        filled = self._pre_filled
+        start = (self._pre_idx - filled) % self.pre_frames
+        first = min(filled, self.pre_frames - start)
+        self._clip[:, :first] = self._pre[:, start:start + first]
+        self._clip[:, first:filled] = self._pre[:, :filled - first]
+        self._clip_len = filled
+        self._event["pre_trigger_s"] = filled / float(self.sample_rate)
+
+    def _finish(self):
+        if self._clip is not None:
+            self._pending.put((self._clip, self._clip_len, self._event))
+        self._active = False
+        self._clip = None
+        self._clip_len = 0
+        self._release_left = None
+        self._event = None
+
+    def _run(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            clip, length, event = item
+            try:
+                self._write(clip[:, :length], event)
+            except OSError as exc:
+                print(f"Event capture: could not write clip: {exc}")
+            finally:
+                self._free.put(clip)
+
+    def _write(self, clip, event):
+        start = event["start_time"]
+        stem = time.strftime("event-%Y%m%d-%H%M%S", time.localtime(start)) + f"-{int(start * 1000) % 1000:03d}"
+        metadata = {
+            "start_time": start,
+            "duration_s": clip.shape[1] / float(self.sample_rate),
+            "pre_trigger_s": event.get("pre_trigger_s", 0.0),
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "threshold_db": self.threshold_db,
+            "peak_dba": event["peak_dba"],
+            "leq_dba": 10 * np.log10(event["energy"] / event["duration"]) if event["duration"] else None,
+        }
+        if self.band_levels is not None:
+            metadata["bands"] = np.round(self.band_levels(clip), 2).tolist()
+
+        from scipy.io import wavfile
+
+        wav_path = os.path.join(self.event_dir, stem + ".wav")
+        wavfile.write(wav_path, self.sample_rate, np.ascontiguousarray(clip.T))
+        with open(os.path.join(self.event_dir, stem + ".json"), "w", encoding="utf-8") as handle:
+            json.dump(metadata, handle, indent=2)
+        metadata["path"] = wav_path
+        self.written += 1
+        self.recent.append(metadata)
@@ -0,0 +1,105 @@
+import numpy as np
+
+from .dsp import ScratchBuffers, SosFilter, resolve_sosfilt
+
+# Base-10 octave ratio from IEC 61260-1.
+OCTAVE_RATIO = 10 ** (3 / 10)
+BAND_EDGE = OCTAVE_RATIO ** (1 / 6)
+
+# A band runs at the lowest decimated rate that is still at least this many
+# times its upper edge, which keeps it clear of the anti-alias transition.
+STAGE_HEADROOM = 5.0
+
+
+def exact_midband(nominal):
+    x = round(10 * np.log10(nominal / 1000.0))
+    return 1000.0 * OCTAVE_RATIO ** (x / 3)
+
+
+class _Stage:
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.bands = []
+        self.band_filters = []
+        self.lowpass = None
+        self.phase = 0
+
+
+class ThirdOctaveFilterbank:
+    def __init__(self, sample_rate, centers, channels=1, order=3):
+        resolve_sosfilt()
+        from scipy.signal import butter, cheby1
+
+        self.sample_rate = sample_rate
+        self.centers = list(centers)
+        self.channels = channels
+        self.order = order
+
+        self.energy = np.zeros((channels, len(self.centers)), dtype=np.float64)
+        self.counts = np.zeros(len(self.centers), dtype=np.float64)
+        self._band_energy = np.zeros(channels, dtype=np.float64)
+        self._scratch = ScratchBuffers()
+
+        # Every stage halves the rate of the one before it, so the same
+        # normalized anti-alias lowpass serves the whole chain.
+        self._lowpass_sos = cheby1(8, 0.05, 0.8 / 2, output="sos")
+
+        self.stages = []
+        for band, nominal in enumerate(self.centers):
+            center = exact_midband(nominal)
+            low = center / BAND_EDGE
+            high = center * BAND_EDGE
+            if low >= sample_rate / 2.0:
+                continue
+
+            depth = 0
+            while sample_rate / 2 ** (depth + 1) >= STAGE_HEADROOM * high:
+                depth += 1
+            while len(self.stages) <= depth:
+                stage = _Stage(sample_rate / 2 ** len(self.stages))
+                if self.stages:
+                    stage.lowpass = SosFilter(self._lowpass_sos, channels)
+                self.stages.append(stage)
+
+            stage = self.stages[depth]
+            nyquist = stage.sample_rate / 2.0
+            if high < nyquist * 0.99:
+                sos = butter(order, [low, high], btype="bandpass", fs=stage.sample_rate, output="sos")
+            else:
+                sos = butter(order, low, btype="highpass", fs=stage.sample_rate, output="sos")
+            stage.bands.append(band)
+            stage.band_filters.append(SosFilter(sos, channels))
+
+    def process(self, samples):
+        # samples is a (channels, frames) block; returns per-channel band
+        # energy and the number of (decimated) samples behind each band.
+        # Each stage and the band being filtered work in scratch buffers,
+        # so no sample arrays are allocated per block.
+        self.energy[:] = 0.0
+        self.counts[:] = 0.0
+        scratch = self._scratch
+        x = scratch.view("stage0", self.channels, samples.shape[1])
+        x[...] = samples
+        for index, stage in enumerate(self.stages):
+            if stage.lowpass is not None:
+                stage.lowpass.process(x)
+                frames = x.shape[1]
+                decimated = scratch.view(f"stage{index}", self.channels, (frames - stage.phase + 1) // 2)
+                np.copyto(decimated, x[:, stage.phase::2])
+                x = decimated
+                stage.phase = (stage.phase + frames) % 2
+            if x.shape[1] == 0:
+                break
+            y = scratch.view("band", self.channels, x.shape[1])
+            for band, band_filter in zip(stage.bands, stage.band_filters):
+                y[...] = x
+                band_filter.process(y)
+                self.energy[:, band] = np.einsum("ij,ij->i", y, y, out=self._band_energy)
+                self.counts[band] = y.shape[1]
+        return self.energy, self.counts
+
+    def band_levels(self, energy, counts):
+        mean_square = energy / np.maximum(counts, 1.0)
+        levels = 10 * np.log10(mean_square + 1e-20)
+        levels[..., counts == 0] = -120.0
+        return levels
@@ -0,0 +1,348 @@
+import os
+import platform
+import sys
+import time
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from .audio import GRAPHIC_EQ_BANDS, AudioProcessor
+from .datalog import LevelLogger
+from .diagnostics import Diagnostics
+from .dose import dose_criteria
+from .telemetry import make_emitter
+from .ui_widgets import (
+    ChannelsWidget,
+    DbDisplayWidget,
+    DiagnosticsWidget,
+    DoseWidget,
+    LazyPage,
+    RangeBarWidget,
+    SpectrumWidget,
+    StatsWidget,
+    TrendWidget,
+    WaterfallWidget,
+)
+
+# How long the Spectrum page keeps showing a detected impulsive event.
+IMPULSE_HOLD_S = 5.0
+
+
+class UpdateScheduler(QtCore.QObject):
+    # Refreshes only the visible page, at that page's own rate, and only
+    # after the audio side reports new data. Notifications are coalesced:
+    # one is delivered per refresh however many blocks arrive in between.
+    data_ready = QtCore.pyqtSignal()
+
+    def __init__(self, stack, wrap=None, parent=None):
+        super().__init__(parent)
+        self.stack = stack
+        self.wrap = wrap
+        self.views = {}
+        self._last_refresh = 0.0
+        self._armed = True
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._refresh)
+        self.data_ready.connect(self._on_data_ready, QtCore.Qt.QueuedConnection)
+        self.stack.currentChanged.connect(lambda index: self.refresh_now())
+
+    def add_view(self, widget, interval_ms, refresh):
+        self.views[widget] = (interval_ms / 1000.0, refresh)
+
+    def notify(self):
+        if self._armed:
+            self._armed = False
+            self.data_ready.emit()
+
+    def refresh_now(self):
+        self._timer.stop()
+        self._refresh()
+
+    def _on_data_ready(self):
+        view = self.views.get(self.stack.currentWidget())
+        if view is None:
+            self._armed = True
+            return
+        wait_s = self._last_refresh + view[0] - time.monotonic()
+        if wait_s <= 0:
+            self._refresh()
+        else:
+            self._timer.start(int(wait_s * 1000))
+
+    def _refresh(self):
+        view = self.views.get(self.stack.currentWidget())
+        self._last_refresh = time.monotonic()
+        self._armed = True
+        if view is None:
+            return
+        if self.wrap is None:
+            view[1]()
+        else:
+            self.wrap(view[1])
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    def __init__(self, config, started_at=None):
+        super().__init__()
+        self.setWindowTitle("Decibel Meter")
+
+        if config.get("engine_process", False):
+            from .engine import EngineProxy
+
+            self.audio = EngineProxy(config)
+        else:
+            self.audio = AudioProcessor(config)
+        if started_at is not None:
+            self.audio.started_at = started_at
+        self._startup_reported = False
+        self.channel = 0
+
+        self.db_widget = DbDisplayWidget()
+        self.range_widget = RangeBarWidget(
+            low_db=config.get("range_low_db", 70.0),
+            high_db=config.get("range_high_db", 85.0),
+        )
+        self.spectrum_page = LazyPage(SpectrumWidget)
+        self.stats_widget = StatsWidget()
+        self.stats_widget.reset_requested.connect(self._reset_statistics)
+        self.dose_widget = DoseWidget([criterion["name"] for criterion in dose_criteria(config)])
+        self.dose_widget.reset_requested.connect(self._reset_dose)
+        self.channels_widget = None
+        if self.audio.channels > 1:
+            self.channels_widget = ChannelsWidget(self.audio.channels)
+            self.channels_widget.channel_selected.connect(self._select_channel)
+        self.trend_page = None
+        if self.audio.history is not None:
+            self.trend_page = LazyPage(TrendWidget)
+        self.waterfall_page = None
+        self.waterfall_count = 0
+        spectrogram = self.audio.spectrogram
+        if spectrogram is not None:
+            self.waterfall_page = LazyPage(lambda: WaterfallWidget(
+                spectrogram.rows, spectrogram.row_period_s, spectrogram.freqs
+            ))
+        # UI timings have their own instance, so the audio side's stays
+        # single-writer.
+        self.diagnostics = None
+        self.diagnostics_widget = None
+        if self.audio.diagnostics is not None:
+            self.diagnostics = Diagnostics(Diagnostics.UI_TIMINGS)
+            self.diagnostics_widget = DiagnosticsWidget()
+            self.range_widget.paint_observer = lambda seconds: self.diagnostics.record("paint", seconds)
+
+        self.stack = QtWidgets.QStackedWidget()
+
+        self.close_button = QtWidgets.QPushButton("Close")
+        self.close_button.setMinimumHeight(40)
+        self.close_button.setStyleSheet("font-size: 18px;")
+        self.close_button.clicked.connect(self.close)
+
+        top_layout = QtWidgets.QHBoxLayout()
+        self.profile_box = None
+        profiles = config.get("calibration_profiles") or []
+        if len(profiles) > 1:
+            self.profile_box = QtWidgets.QComboBox()
+            self.profile_box.setStyleSheet("font-size: 18px;")
+            for path in profiles:
+                self.profile_box.addItem(os.path.splitext(os.path.basename(path))[0], path)
+            if config.get("calibration_file") in profiles:
+                self.profile_box.setCurrentIndex(profiles.index(config["calibration_file"]))
+            self.profile_box.currentIndexChanged.connect(
+                lambda index: self.audio.set_calibration_profile(self.profile_box.itemData(index))
+            )
+            top_layout.addWidget(self.profile_box)
+        top_layout.addStretch(1)
+        top_layout.addWidget(self.close_button)
+
+        self.button_layout = QtWidgets.QHBoxLayout()
+        self.db_button = self._add_page(self.db_widget, "dBA")
+        self.range_button = self._add_page(self.range_widget, "Range")
+        self.spectrum_button = self._add_page(self.spectrum_page, "Spectrum")
+        self.stats_button = self._add_page(self.stats_widget, "Stats")
+        self.dose_button = self._add_page(self.dose_widget, "Dose")
+        if self.trend_page:
+            self.trend_button = self._add_page(self.trend_page, "Trend")
+        if self.waterfall_page:
+            self.waterfall_button = self._add_page(self.waterfall_page, "Waterfall")
+        if self.channels_widget:
+            self.channels_button = self._add_page(self.channels_widget, "Channels")
+        if self.diagnostics_widget:
+            self.diagnostics_button = self._add_page(self.diagnostics_widget, "Diag")
+
+        central = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(central)
+        layout.addLayout(top_layout)
+        layout.addWidget(self.stack, 1)
+        layout.addLayout(self.button_layout)
+        self.setCentralWidget(central)
+
+        update_interval_ms = int(config.get("update_interval_ms", 250))
+        meter_interval_ms = int(config.get("meter_interval_ms", update_interval_ms))
+
+        self.scheduler = UpdateScheduler(self.stack, self._timed_refresh, self)
+        self.scheduler.add_view(self.db_widget, meter_interval_ms, self._refresh_db)
+        self.scheduler.add_view(self.range_widget, meter_interval_ms, self._refresh_range)
+        self.scheduler.add_view(self.spectrum_page, update_interval_ms, self._refresh_spectrum)
+        self.scheduler.add_view(self.stats_widget, update_interval_ms, self._refresh_stats)
+        self.scheduler.add_view(self.dose_widget, 1000, self._refresh_dose)
+        if self.trend_page:
+            self.scheduler.add_view(self.trend_page, update_interval_ms, self._refresh_trend)
+        if self.waterfall_page:
+            self.scheduler.add_view(self.waterfall_page, update_interval_ms, self._refresh_waterfall)
+        if self.channels_widget:
+            self.scheduler.add_view(self.channels_widget, meter_interval_ms, self._refresh_channels)
+        if self.diagnostics_widget:
+            self.scheduler.add_view(self.diagnostics_widget, 1000, self._refresh_diagnostics)
+        self.audio.add_listener(self.scheduler.notify)
+
+        # A separate engine process runs the logger and telemetry next to
+        # the audio.
+        self.logger = None
+        self.telemetry = None
+        if config.get("log_dir") and not config.get("engine_process", False):
+            self.logger = LevelLogger(
+                self.audio,
+                os.path.abspath(config["log_dir"]),
+                interval_s=config.get("log_interval_s", 1.0),
+                flush_s=config.get("log_flush_s", 10.0),
+                bands=len(GRAPHIC_EQ_BANDS),
+            )
+        if not config.get("engine_process", False):
+            self.telemetry = make_emitter(self.audio, config, bands=len(GRAPHIC_EQ_BANDS))
+
+        # The logger, telemetry and tonal detector use the spectrum, so then
+        # it has to stay current while other pages are showing; otherwise the
+        # Spectrum page computes it only while visible.
+        self.background_spectrum = (
+            self.logger is not None or self.telemetry is not None or self.audio.tonal_detector is not None
+        )
+        self.audio.worker_spectrum = self.background_spectrum
+        self.spectrum_timer = None
+        if self.background_spectrum and self.audio.processing != "worker":
+            self.spectrum_timer = QtCore.QTimer(self)
+            self.spectrum_timer.timeout.connect(self.audio.compute_spectrum)
+            self.spectrum_timer.start(update_interval_ms)
+
+        self.audio.start()
+        if self.logger:
+            self.logger.start()
+        if self.telemetry:
+            self.telemetry.start()
+
+    def _make_button(self, label):
+        button = QtWidgets.QPushButton(label)
+        button.setMinimumHeight(60)
+        button.setStyleSheet("font-size: 20px;")
+        return button
+
+    def _add_page(self, widget, label):
+        self.stack.addWidget(widget)
+        button = self._make_button(label)
+        button.clicked.connect(lambda: self.stack.setCurrentWidget(widget))
+        self.button_layout.addWidget(button)
+        return button
+
+    def _select_channel(self, channel):
+        self.channel = channel
+        if self.waterfall_page and self.waterfall_page.built():
+            self.waterfall_page.widget().clear()
+            self.waterfall_count = 0
+        self.scheduler.refresh_now()
+
+    def _timed_refresh(self, refresh):
+        if not self._startup_reported and self.audio.first_reading_s is not None:
+            self._startup_reported = True
+            print(f"First reading {self.audio.first_reading_s:.2f} s after start")
+        if self.diagnostics is None:
+            refresh()
+            return
+        started = time.perf_counter()
+        refresh()
+        self.diagnostics.record("ui_refresh", time.perf_counter() - started)
+
+    def _refresh_db(self):
+        self.db_widget.set_value(self.audio.get_last_db(self.channel))
+
+    def _refresh_range(self):
+        self.range_widget.set_value(self.audio.get_last_db(self.channel))
+
+    def _refresh_stats(self):
+        self.stats_widget.set_statistics(self.audio.get_statistics())
+
+    def _refresh_channels(self):
+        self.channels_widget.set_values(self.audio.get_channel_dbs())
+
+    def _refresh_waterfall(self):
+        rows, self.waterfall_count = self.audio.get_spectrogram_rows(self.channel, self.waterfall_count)
+        self.waterfall_page.widget().add_rows(rows)
+
+    def _refresh_trend(self):
+        widget = self.trend_page.widget()
+        widget.set_history(self.audio.get_history(widget.span_s))
+
+    def _refresh_diagnostics(self):
+        diagnostics = self.audio.get_diagnostics()
+        diagnostics["timings"].update(self.diagnostics.snapshot()["timings"])
+        self.diagnostics_widget.set_diagnostics(diagnostics)
+
+    def _refresh_dose(self):
+        self.dose_widget.set_dose(self.audio.get_dose())
+
+    def _reset_dose(self):
+        self.audio.reset_dose()
+        self.dose_widget.set_dose(self.audio.get_dose())
+
+    def _reset_statistics(self):
+        self.audio.reset_statistics("shift")
+        self.audio.reset_statistics("total")
+        self.stats_widget.set_statistics(self.audio.get_statistics())
+
+    def _refresh_spectrum(self):
+        if not self.background_spectrum:
+            self.audio.compute_spectrum()
+        widget = self.spectrum_page.widget()
+        widget.set_levels(self.audio.get_spectrum(self.channel))
+        detections = self.audio.get_detections(self.channel)
+        if detections is not None:
+            recent = detections["impulsive"]["recent"]
+            impulsive = bool(recent) and time.time() - recent[-1]["time"] < IMPULSE_HOLD_S
+            widget.set_detections(detections["tonal"]["tonal"], impulsive)
+
+    def closeEvent(self, event):
+        if self.telemetry:
+            self.telemetry.stop()
+        if self.logger:
+            self.logger.stop()
+        self.audio.stop()
+        event.accept()
+
+
+def run_gui(config, args):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    app = QtWidgets.QApplication(sys.argv)
+    icon_path = os.path.join(base_dir, "..", "assets", "sound-monitor-icon.png")
+    if os.path.exists(icon_path):
+        pixmap = QtGui.QPixmap(os.path.abspath(icon_path))
+        if not pixmap.isNull():
+            pixmap = pixmap.scaled(
+                256,
+                256,
+                QtCore.Qt.KeepAspectRatio,
+                QtCore.Qt.SmoothTransformation,
+            )
+            icon = QtGui.QIcon(pixmap)
+            app.setWindowIcon(icon)
+    window = MainWindow(config, getattr(args, "started_at", None))
+    if app.windowIcon().isNull() is False:
+        window.setWindowIcon(app.windowIcon())
+    system = platform.system().lower()
+    if args.windowed:
+        window.resize(900, 600)
+        window.show()
+    elif system.startswith("darwin"):
+        window.resize(800, 480)
+        window.show()
+    else:
+        window.showFullScreen()
+    sys.exit(app.exec_())
+
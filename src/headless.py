@@ -0,0 +1,229 @@
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .audio import GRAPHIC_EQ_BANDS, AudioProcessor
+from .datalog import LevelLogger
+from .telemetry import make_emitter
+
+
+def _format_metric(name, value, labels=None):
+    if value is None:
+        return None
+    label_text = ""
+    if labels:
+        label_text = "{" + ",".join(f'{key}="{val}"' for key, val in labels.items()) + "}"
+    return f"{name}{label_text} {value:.2f}"
+
+
+class MetricsPublisher:
+    # Encodes the current readings once per update interval; request
+    # handlers only ever send the last pre-encoded bytes.
+    def __init__(self, audio, interval_s):
+        self.audio = audio
+        self.interval_s = interval_s
+        self._payloads = {"json": b"{}", "text": b""}
+        self._startup_reported = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.update()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def payload(self, kind):
+        return self._payloads[kind]
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.update()
+
+    def update(self):
+        if not self._startup_reported and self.audio.first_reading_s is not None:
+            self._startup_reported = True
+            print(f"First reading {self.audio.first_reading_s:.2f} s after start", flush=True)
+        if self.audio.processing != "worker":
+            self.audio.compute_spectrum()
+        snapshot = {
+            "time": time.time(),
+            "dba": self.audio.get_last_db(),
+            "spectrum": {
+                "bands": GRAPHIC_EQ_BANDS,
+                "levels": [round(float(v), 2) for v in self.audio.get_spectrum()],
+            },
+            "statistics": self.audio.get_statistics(),
+            "dose": self.audio.get_dose(),
+            "levels": self.audio.get_levels(),
+            "first_reading_s": self.audio.first_reading_s,
+        }
+        diagnostics = self.audio.get_diagnostics()
+        if diagnostics is not None:
+            snapshot["diagnostics"] = diagnostics
+        events = self.audio.get_events()
+        if events is not None:
+            snapshot["events"] = events
+        detections = self.audio.get_detections()
+        if detections is not None:
+            snapshot["detections"] = detections
+        if self.audio.channels > 1:
+            spectra = self.audio.get_channel_spectra()
+            snapshot["channels"] = [
+                {
+                    "dba": dba,
+                    "levels": [round(float(v), 2) for v in spectra[channel]],
+                }
+                for channel, dba in enumerate(self.audio.get_channel_dbs())
+            ]
+            if detections is not None:
+                for channel, values in enumerate(snapshot["channels"]):
+                    values["detections"] = self.audio.get_detections(channel)
+
+        lines = [_format_metric("soundmonitor_dba", snapshot["dba"])]
+        for band, level in zip(GRAPHIC_EQ_BANDS, snapshot["spectrum"]["levels"]):
+            lines.append(_format_metric("soundmonitor_band_db", level, {"band": f"{band:g}"}))
+        for period, values in snapshot["statistics"].items():
+            for key, value in values.items():
+                if key in ("duration_s", "start_time"):
+                    continue
+                lines.append(_format_metric(f"soundmonitor_{key}_db", value, {"period": period}))
+        for name, values in snapshot["dose"].items():
+            for key in ("dose_pct", "twa", "projected_dose_pct", "projected_twa"):
+                lines.append(_format_metric(f"soundmonitor_{key}", values[key], {"criterion": name}))
+        for name, value in snapshot["levels"].items():
+            lines.append(_format_metric("soundmonitor_level_db", value, {"name": name}))
+        if diagnostics is not None:
+            for name, value in diagnostics["counters"].items():
+                lines.append(f"soundmonitor_{name}_total {value}")
+            for name, timing in diagnostics["timings"].items():
+                lines.append(_format_metric("soundmonitor_duration_p99_us", timing["p99_us"], {"stage": name}))
+        if detections is not None:
+            for band, prominence in zip(GRAPHIC_EQ_BANDS, detections["tonal"]["prominence_db"]):
+                lines.append(_format_metric("soundmonitor_tonal_prominence_db", prominence, {"band": f"{band:g}"}))
+            lines.append(f"soundmonitor_tonal_bands {sum(detections['tonal']['tonal'])}")
+            lines.append(f"soundmonitor_impulses_total {detections['impulsive']['count']}")
+        if events is not None:
+            lines.append(f"soundmonitor_events_written_total {events['written']}")
+            lines.append(f"soundmonitor_events_dropped_total {events['dropped']}")
+        for channel, values in enumerate(snapshot.get("channels", [])):
+            labels = {"channel": str(channel + 1)}
+            lines.append(_format_metric("soundmonitor_channel_dba", values["dba"], labels))
+            for band, level in zip(GRAPHIC_EQ_BANDS, values["levels"]):
+                lines.append(_format_metric(
+                    "soundmonitor_channel_band_db", level, dict(labels, band=f"{band:g}")
+                ))
+            if "detections" in values:
+                detections = values["detections"]
+                label_text = f'{{channel="{channel + 1}"}}'
+                lines.append(f"soundmonitor_channel_tonal_bands{label_text} {sum(detections['tonal']['tonal'])}")
+                lines.append(f"soundmonitor_channel_impulses_total{label_text} {detections['impulsive']['count']}")
+
+        self._payloads = {
+            "json": json.dumps(snapshot).encode("utf-8"),
+            "text": ("\n".join(line for line in lines if line) + "\n").encode("utf-8"),
+        }
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    routes = {
+        "/": ("json", "application/json"),
+        "/snapshot.json": ("json", "application/json"),
+        "/metrics": ("text", "text/plain; version=0.0.4"),
+    }
+
+    def do_GET(self):
+        route = self.routes.get(self.path.split("?", 1)[0])
+        if route is None:
+            self.send_error(404)
+            return
+        kind, content_type = route
+        body = self.server.publisher.payload(kind)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket peers have no address.
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(publisher, host="127.0.0.1", port=8750, socket_path=None):
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, MetricsHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        server.daemon_threads = True
+    server.publisher = publisher
+    return server
+
+
+def run_headless(config, args):
+    audio = AudioProcessor(config)
+    if getattr(args, "started_at", None) is not None:
+        audio.started_at = args.started_at
+    publisher = MetricsPublisher(audio, int(config.get("update_interval_ms", 250)) / 1000.0)
+    server = make_server(
+        publisher,
+        host=args.host or config.get("metrics_host", "127.0.0.1"),
+        port=args.port or int(config.get("metrics_port", 8750)),
+        socket_path=args.socket or config.get("metrics_socket"),
+    )
+
+    logger = None
+    if config.get("log_dir"):
+        logger = LevelLogger(
+            audio,
+            os.path.abspath(config["log_dir"]),
+            interval_s=config.get("log_interval_s", 1.0),
+            flush_s=config.get("log_flush_s", 10.0),
+            bands=len(GRAPHIC_EQ_BANDS),
+        )
+    telemetry = make_emitter(audio, config, bands=len(GRAPHIC_EQ_BANDS))
+
+    def shutdown(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    audio.start()
+    publisher.start()
+    if logger:
+        logger.start()
+    if telemetry:
+        telemetry.start()
+    try:
+        server.serve_forever()
+    finally:
+        if telemetry:
+            telemetry.stop()
+        if logger:
+            logger.stop()
+        publisher.stop()
+        audio.stop()
+        server.server_close()
+        if isinstance(server, UnixHTTPServer):
+            os.unlink(server.server_address)
@@ -0,0 +1,107 @@
+import numpy as np
+
+# (period in seconds, buckets kept) for each tier, finest first.
+TIERS = ((0.1, 6000), (1.0, 7200), (60.0, 2880), (900.0, 2976))
+
+
+class HistoryTier:
+    # Levels folded into fixed wall-clock buckets. Every finished bucket is
+    # written twice, `size` rows apart, so the latest buckets are always one
+    # contiguous slice; the bucket still filling is kept separately.
+    def __init__(self, period_s, size):
+        self.period_s = float(period_s)
+        self.size = int(size)
+        self._time = np.zeros(2 * self.size, dtype=np.float64)
+        self._levels = np.zeros((2 * self.size, 3), dtype=np.float32)
+        self.count = 0
+        self._bucket = None
+        self._energy = 0.0
+        self._duration = 0.0
+        self._max = 0.0
+        self._min = 0.0
+
+    def add(self, db, duration, now):
+        bucket = int(now // self.period_s)
+        if bucket != self._bucket:
+            if self._bucket is not None:
+                self._commit()
+            self._bucket = bucket
+            self._energy = 0.0
+            self._duration = 0.0
+            self._max = db
+            self._min = db
+        self._energy += duration * 10 ** (db / 10.0)
+        self._duration += duration
+        if db > self._max:
+            self._max = db
+        if db < self._min:
+            self._min = db
+
+    def _current(self):
+        return (10 * np.log10(self._energy / self._duration), self._max, self._min)
+
+    def _commit(self):
+        index = self.count % self.size
+        start = self._bucket * self.period_s
+        levels = self._current()
+        self._time[index] = self._time[index + self.size] = start
+        self._levels[index] = self._levels[index + self.size] = levels
+        self.count += 1
+
+    def latest(self, buckets):
+        # Bucket start times and (leq, max, min) of the latest finished
+        # buckets plus the one still filling, oldest first.
+        count = min(buckets, self.count, self.size)
+        end = self.count % self.size + self.size
+        times = self._time[end - count:end]
+        levels = self._levels[end - count:end]
+        if self._bucket is not None and self._duration > 0:
+            times = np.append(times, self._bucket * self.period_s)
+            levels = np.vstack([levels, np.array(self._current(), dtype=np.float32)])
+        else:
+            times = times.copy()
+            levels = levels.copy()
+        return times, levels
+
+
+class LevelHistory:
+    def __init__(self, tiers=TIERS):
+        self.tiers = [HistoryTier(period_s, size) for period_s, size in tiers]
+
+    def add(self, db, duration, now):
+        for tier in self.tiers:
+            tier.add(db, duration, now)
+
+    def tier_for(self, span_s, max_points=4000):
+        # The finest tier that covers the span in at most max_points
+        # buckets, or the coarsest one.
+        for tier in self.tiers:
+            if span_s / tier.period_s <= max_points and tier.period_s * tier.size >= span_s:
+                return tier
+        return self.tiers[-1]
+
+    def select(self, span_s, max_points=4000):
+        tier = self.tier_for(span_s, max_points)
+        buckets = int(np.ceil(span_s / tier.period_s)) + 1
+        times, levels = tier.latest(buckets)
+        return {
+            "period_s": tier.period_s,
+            "time": times,
+            "leq": levels[:, 0],
+            "max": levels[:, 1],
+            "min": levels[:, 2],
+        }
+
+
+def with_gaps(selection):
+    # Puts a NaN level after any bucket followed by a missing one (nothing
+    # was measured then), so curves drawn with connect="finite" break there.
+    times = selection["time"]
+    period_s = selection["period_s"]
+    gaps = np.flatnonzero(np.diff(times) > 1.5 * period_s) + 1
+    if not len(gaps):
+        return selection
+    marked = dict(selection, time=np.insert(times, gaps, times[gaps - 1] + period_s))
+    for name in ("leq", "max", "min"):
+        marked[name] = np.insert(selection[name], gaps, np.nan)
+    return marked
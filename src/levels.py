@@ -0,0 +1,123 @@
+import numpy as np
+
+from .dsp import ScratchBuffers, SosFilter
+
+WEIGHTINGS = ("A", "C", "Z")
+# Every level snapshot() reports, per weighting.
+LEVEL_FIELDS = tuple(
+    f"L{weighting}{name}"
+    for weighting in WEIGHTINGS
+    for name in ("F", "Fmax", "S", "Smax", "I", "Imax", "peak", "eq")
+)
+
+# IEC 61672-1 exponential time constants in seconds.
+FAST_S = 0.125
+SLOW_S = 1.0
+IMPULSE_RISE_S = 0.035
+IMPULSE_DECAY_S = 1.5
+
+
+def _exponential_sos(tau, sample_rate):
+    alpha = np.exp(-1.0 / (tau * sample_rate))
+    return np.array([[1.0 - alpha, 0.0, 0.0, 1.0, -alpha, 0.0]])
+
+
+class LevelEngine:
+    # Runs the A, C and Z weighted signals of every input channel side by
+    # side as rows of one (3 * channels, frames) array, so squaring, the
+    # Fast/Slow/Impulse detectors, peak and energy integration are each a
+    # single call across all weightings and channels.
+    def __init__(self, sample_rate, c_weighting_sos, channels=1):
+        self.sample_rate = sample_rate
+        self.input_channels = channels
+        self._c_filter = SosFilter(c_weighting_sos, channels)
+        channels = len(WEIGHTINGS) * channels
+        self._fast = SosFilter(_exponential_sos(FAST_S, sample_rate), channels)
+        self._slow = SosFilter(_exponential_sos(SLOW_S, sample_rate), channels)
+        self._impulse = SosFilter(_exponential_sos(IMPULSE_RISE_S, sample_rate), channels)
+        self._impulse_decay = np.exp(-1.0 / (IMPULSE_DECAY_S * sample_rate))
+        self._impulse_held = np.zeros(channels)
+        self._impulse_start = np.zeros(channels)
+        self._decay_powers = np.zeros((0, 0))
+        self._scratch = ScratchBuffers()
+
+        self._block = {
+            name: np.zeros(channels)
+            for name in ("F", "S", "I", "Fmax", "Smax", "Imax", "peak", "energy")
+        }
+        self._block_frames = 0
+
+        self.current = {name: np.zeros(channels) for name in ("F", "S", "I")}
+        self.maximum = {name: np.zeros(channels) for name in ("F", "S", "I", "peak")}
+        self.energy = np.zeros(channels)
+        self.frames = 0
+
+    def process(self, samples, a_weighted):
+        # samples and a_weighted are (channels, frames) blocks.
+        frames = samples.shape[1]
+        if frames == 0:
+            return
+        n = self.input_channels
+        rows = len(WEIGHTINGS) * n
+        block = self._scratch.view("block", rows, frames)
+        block[:n] = a_weighted
+        block[n:2 * n] = samples
+        block[2 * n:] = samples
+        self._c_filter.process(block[n:2 * n])
+        np.square(block, out=block)
+
+        out = self._block
+        np.max(block, axis=1, out=out["peak"])
+        np.sum(block, axis=1, out=out["energy"])
+        self._block_frames = frames
+
+        weighted = self._scratch.view("detector", rows, frames)
+        for name, detector in (("F", self._fast), ("S", self._slow)):
+            weighted[...] = block
+            detector.process(weighted)
+            out[name][:] = weighted[:, -1]
+            np.max(weighted, axis=1, out=out[name + "max"])
+
+        # Impulse is a 35 ms exponential average followed by a peak hold
+        # that decays with a 1.5 s time constant. The held value at the end
+        # of the block is the largest decayed input, so it can be found
+        # with one multiply against precomputed decay powers.
+        rising = self._impulse.process(block)
+        if self._decay_powers.shape != rising.shape:
+            # One row per detector, as numpy buffers a broadcast in-place multiply.
+            powers = self._impulse_decay ** np.arange(frames - 1, -1, -1, dtype=np.float64)
+            self._decay_powers = np.tile(powers, (rows, 1))
+        start = np.multiply(self._impulse_held, self._impulse_decay, out=self._impulse_start)
+        np.max(rising, axis=1, out=out["Imax"])
+        np.maximum(out["Imax"], start, out=out["Imax"])
+        np.multiply(rising, self._decay_powers, out=rising)
+        np.max(rising, axis=1, out=out["I"])
+        start *= self._decay_powers[0, 0]
+        np.maximum(out["I"], start, out=out["I"])
+        self._impulse_held[:] = out["I"]
+
+    def accumulate(self):
+        out = self._block
+        for name in ("F", "S", "I"):
+            self.current[name][:] = out[name]
+            np.maximum(self.maximum[name], out[name + "max"], out=self.maximum[name])
+        np.maximum(self.maximum["peak"], out["peak"], out=self.maximum["peak"])
+        self.energy += out["energy"]
+        self.frames += self._block_frames
+
+    def reset(self):
+        for values in self.maximum.values():
+            values[:] = 0.0
+        self.energy[:] = 0.0
+        self.frames = 0
+
+    def snapshot(self, channel=0):
+        values = {}
+        for w, weighting in enumerate(WEIGHTINGS):
+            i = w * self.input_channels + channel
+            for name in ("F", "S", "I"):
+                values[f"L{weighting}{name}"] = self.current[name][i]
+                values[f"L{weighting}{name}max"] = self.maximum[name][i]
+            values[f"L{weighting}peak"] = self.maximum["peak"][i]
+            values[f"L{weighting}eq"] = self.energy[i] / max(self.frames, 1)
+        return values
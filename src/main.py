@@ -1,92 +1,14 @@
 import argparse
 import os
 import platform
-import sys
+import time
 
-from PyQt5 import QtCore, QtGui, QtWidgets
-import sounddevice as sd
+# Taken before the heavy imports so the reported time to first reading
+# covers the whole startup.
+STARTED_AT = time.monotonic()
 
-from .audio import AudioProcessor, load_config
-from .ui_widgets import DbDisplayWidget, RangeBarWidget, SpectrumWidget
-
-
-class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self, config):
-        super().__init__()
-        self.setWindowTitle("Decibel Meter")
-
-        self.audio = AudioProcessor(config)
-
-        self.db_widget = DbDisplayWidget()
-        self.range_widget = RangeBarWidget(
-            low_db=config.get("range_low_db", 70.0),
-            high_db=config.get("range_high_db", 85.0),
-        )
-        self.spectrum_widget = SpectrumWidget()
-
-        self.stack = QtWidgets.QStackedWidget()
-        self.stack.addWidget(self.db_widget)
-        self.stack.addWidget(self.range_widget)
-        self.stack.addWidget(self.spectrum_widget)
-
-        self.close_button = QtWidgets.QPushButton("Close")
-        self.close_button.setMinimumHeight(40)
-        self.close_button.setStyleSheet("font-size: 18px;")
-        self.close_button.clicked.connect(self.close)
-
-        top_layout = QtWidgets.QHBoxLayout()
-        top_layout.addStretch(1)
-        top_layout.addWidget(self.close_button)
-
-        button_layout = QtWidgets.QHBoxLayout()
-        self.db_button = self._make_button("dBA")
-        self.range_button = self._make_button("Range")
-        self.spectrum_button = self._make_button("Spectrum")
-        button_layout.addWidget(self.db_button)
-        button_layout.addWidget(self.range_button)
-        button_layout.addWidget(self.spectrum_button)
-
-        self.db_button.clicked.connect(lambda: self.stack.setCurrentIndex(0))
-        self.range_button.clicked.connect(lambda: self.stack.setCurrentIndex(1))
-        self.spectrum_button.clicked.connect(lambda: self.stack.setCurrentIndex(2))
-
-        central = QtWidgets.QWidget()
-        layout = QtWidgets.QVBoxLayout(central)
-        layout.addLayout(top_layout)
-        layout.addWidget(self.stack, 1)
-        layout.addLayout(button_layout)
-        self.setCentralWidget(central)
-
-        update_interval_ms = int(config.get("update_interval_ms", 250))
-
-        self.update_timer = QtCore.QTimer(self)
-        self.update_timer.timeout.connect(self._refresh_meter)
-        self.update_timer.start(update_interval_ms)
-
-        self.spectrum_timer = QtCore.QTimer(self)
-        self.spectrum_timer.timeout.connect(self._refresh_spectrum)
-        self.spectrum_timer.start(update_interval_ms)
-
-        self.audio.start()
-
-    def _make_button(self, label):
-        button = QtWidgets.QPushButton(label)
-        button.setMinimumHeight(60)
-        button.setStyleSheet("font-size: 20px;")
-        return button
-
-    def _refresh_meter(self):
-        value = self.audio.get_last_db()
-        self.db_widget.set_value(value)
-        self.range_widget.set_value(value)
-
-    def _refresh_spectrum(self):
-        self.audio.compute_spectrum()
-        self.spectrum_widget.set_levels(self.audio.get_spectrum())
-
-    def closeEvent(self, event):
-        self.audio.stop()
-        event.accept()
+from .audio import load_config
+from .dsp import preload_sosfilt
 
 
 def parse_args():
@@ -94,10 +16,22 @@ def parse_args():
     parser.add_argument("--config", default=None, help="Path to config.json")
     parser.add_argument("--windowed", action="store_true", help="Disable full-screen")
     parser.add_argument("--list-devices", action="store_true", help="List audio input devices")
+    parser.add_argument("--headless", action="store_true", help="Run without a UI and serve metrics over HTTP")
+    parser.add_argument("--host", default=None, help="Headless metrics bind address")
+    parser.add_argument("--port", type=int, default=None, help="Headless metrics port")
+    parser.add_argument("--socket", default=None, help="Serve headless metrics on a Unix socket instead")
+    parser.add_argument("--synthetic", action="store_true", help="Use a synthetic test signal instead of a sound device")
+    parser.add_argument("--analyze", nargs="+", metavar="WAV", help="Analyze WAV files offline and exit")
+    parser.add_argument("--output-dir", default=None, help="Where --analyze writes time series")
+    parser.add_argument("--interval", type=float, default=1.0, help="--analyze time-series interval in seconds")
+    parser.add_argument("--format", choices=("bin", "csv"), default="bin", help="--analyze output format")
+    parser.add_argument("--jobs", type=int, default=None, help="--analyze worker processes (default: all cores)")
     return parser.parse_args()
 
 
 def list_audio_devices():
+    import sounddevice as sd
+
     for i, device in enumerate(sd.query_devices()):
         if device.get("max_input_channels", 0) > 0:
             print(f"{i}: {device['name']}")
@@ -105,6 +39,7 @@ def list_audio_devices():
 
 def main():
     args = parse_args()
+    args.started_at = STARTED_AT
     if args.list_devices:
         list_audio_devices()
         return
@@ -119,33 +54,27 @@ def main():
             config["device"] = device.get("mac", device.get("darwin"))
         elif system.startswith("linux"):
             config["device"] = device.get("linux")
+    if args.synthetic:
+        config["source"] = "synthetic"
+
+    if args.analyze:
+        from .analyze import run_analysis
+
+        run_analysis(config, args)
+        return
+
+    # The filter kernel's import (most of a second on a Pi) overlaps with
+    # building the UI or server; the audio stream waits for it on start.
+    preload_sosfilt()
+    # Qt is only imported for the UI so headless units never load it.
+    if args.headless:
+        from .headless import run_headless
 
-    app = QtWidgets.QApplication(sys.argv)
-    icon_path = os.path.join(base_dir, "..", "assets", "sound-monitor-icon.png")
-    if os.path.exists(icon_path):
-        pixmap = QtGui.QPixmap(os.path.abspath(icon_path))
-        if not pixmap.isNull():
-            pixmap = pixmap.scaled(
-                256,
-                256,
-                QtCore.Qt.KeepAspectRatio,
-                QtCore.Qt.SmoothTransformation,
-            )
-            icon = QtGui.QIcon(pixmap)
-            app.setWindowIcon(icon)
-    window = MainWindow(config)
-    if app.windowIcon().isNull() is False:
-        window.setWindowIcon(app.windowIcon())
-    system = platform.system().lower()
-    if args.windowed:
-        window.resize(900, 600)
-        window.show()
-    elif system.startswith("darwin"):
-        window.resize(800, 480)
-        window.show()
+        run_headless(config, args)
     else:
-        window.showFullScreen()
-    sys.exit(app.exec_())
+        from .gui import run_gui
+
+        run_gui(config, args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class SpscRing:
+    # Single-producer/single-consumer frame queue. The producer only advances
+    # _write and the consumer only advances _read, each after its copy is
+    # complete, so neither side ever waits on the other.
+    def __init__(self, capacity, frame_shape=(), dtype=np.float32):
+        self.capacity = int(capacity)
+        self._buffer = np.zeros((self.capacity,) + tuple(frame_shape), dtype=dtype)
+        self._write = 0
+        self._read = 0
+        self.dropped_frames = 0
+
+    def available(self):
+        return self._write - self._read
+
+    def write(self, frames):
+        count = len(frames)
+        if count > self.capacity - (self._write - self._read):
+            self.dropped_frames += count
+            return False
+
+        start = self._write % self.capacity
+        end = start + count
+        if end <= self.capacity:
+            self._buffer[start:end] = frames
+        else:
+            first = self.capacity - start
+            self._buffer[start:] = frames[:first]
+            self._buffer[:count - first] = frames[first:]
+        self._write += count
+        return True
+
+    def read_into(self, out):
+        count = min(len(out), self._write - self._read)
+        if count <= 0:
+            return 0
+
+        start = self._read % self.capacity
+        end = start + count
+        if end <= self.capacity:
+            out[:count] = self._buffer[start:end]
+        else:
+            first = self.capacity - start
+            out[:first] = self._buffer[start:]
+            out[first:count] = self._buffer[:count - first]
+        self._read += count
+        return count
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import numpy as np
+
+
+SIGNAL_KINDS = ("sine", "pink", "burst")
+
+
+def pink_noise(frames, rng):
+    # Shape white noise to a 1/f power spectrum.
+    spectrum = np.fft.rfft(rng.standard_normal(frames))
+    freqs = np.arange(len(spectrum), dtype=np.float64)
+    freqs[0] = 1.0
+    noise = np.fft.irfft(spectrum / np.sqrt(freqs), frames)
+    return noise / max(np.sqrt(np.mean(noise ** 2)), 1e-12)
+
+
+def make_signal(kind, sample_rate, frames, channels=1, level_dbfs=-20.0, seed=0):
+    rng = np.random.default_rng(seed)
+    rms = 10 ** (level_dbfs / 20.0)
+    t = np.arange(frames) / float(sample_rate)
+    if kind == "sine":
+        signal = np.sqrt(2.0) * rms * np.sin(2 * np.pi * 1000.0 * t)
+    elif kind == "pink":
+        signal = rms * pink_noise(frames, rng)
+    elif kind == "burst":
+        # 100 ms tone bursts once a second over a quiet pink noise floor.
+        gate = (t % 1.0) < 0.1
+        signal = 0.01 * rms * pink_noise(frames, rng)
+        signal += gate * np.sqrt(2.0) * rms * np.sin(2 * np.pi * 1000.0 * t)
+    else:
+        raise ValueError(f"Unknown signal kind: {kind}")
+    return np.repeat(signal.astype(np.float32)[:, None], channels, axis=1)
+
+
+class SignalGenerator:
+    def __init__(self, sample_rate, channels=1, frequency=1000.0, level_dbfs=-20.0,
+                 noise_dbfs=-60.0, seed=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frequency = float(frequency)
+        self.amplitude = np.sqrt(2.0) * 10 ** (level_dbfs / 20.0)
+        self.noise = 10 ** (noise_dbfs / 20.0)
+        self._phase = 0.0
+        self._rng = np.random.default_rng(seed)
+
+    def generate(self, frames):
+        step = 2 * np.pi * self.frequency / self.sample_rate
+        phase = self._phase + step * np.arange(frames)
+        self._phase = (self._phase + step * frames) % (2 * np.pi)
+        tone = self.amplitude * np.sin(phase)
+        block = np.empty((frames, self.channels), dtype=np.float32)
+        block[:] = tone[:, None]
+        if self.noise > 0:
+            block += self.noise * self._rng.standard_normal((frames, self.channels))
+        return block
+
+
+class SyntheticStream:
+    # Stands in for sounddevice.InputStream: a thread delivers generated
+    # blocks to the callback at the real-time rate.
+    def __init__(self, samplerate, blocksize, channels, callback, generator=None):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.channels = channels
+        self.callback = callback
+        self.generator = generator or SignalGenerator(samplerate, channels)
+        self.latency = blocksize / float(samplerate)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="synthetic-audio", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+
+    def _run(self):
+        period = self.blocksize / float(self.samplerate)
+        next_time = time.monotonic()
+        while not self._stop.is_set():
+            block = self.generator.generate(self.blocksize)
+            self.callback(block, self.blocksize, None, None)
+            next_time += period
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_time = time.monotonic()
@@ -0,0 +1,97 @@
+import time
+
+import numpy as np
+
+PERCENTILES = (10, 50, 90)
+
+
+class LevelHistogram:
+    # Time spent at each level in fixed-width bins plus a running energy sum,
+    # so Leq and any Ln percentile come out without keeping past levels.
+    def __init__(self, low_db=0.0, high_db=160.0, resolution_db=0.1):
+        self.low_db = low_db
+        self.resolution_db = resolution_db
+        self.bins = np.zeros(int(round((high_db - low_db) / resolution_db)), dtype=np.float64)
+        self.reset()
+
+    def reset(self, start_time=None):
+        self.bins[:] = 0.0
+        self.energy = 0.0
+        self.duration = 0.0
+        self.max_db = None
+        self.min_db = None
+        self.start_time = start_time
+
+    def add(self, db, duration):
+        index = int((db - self.low_db) / self.resolution_db)
+        index = min(max(index, 0), len(self.bins) - 1)
+        self.bins[index] += duration
+        self.energy += duration * 10 ** (db / 10.0)
+        self.duration += duration
+        if self.max_db is None or db > self.max_db:
+            self.max_db = db
+        if self.min_db is None or db < self.min_db:
+            self.min_db = db
+
+    def leq(self):
+        if self.duration <= 0:
+            return None
+        return float(10 * np.log10(self.energy / self.duration))
+
+    def percentile(self, n):
+        # Ln is the level exceeded for n percent of the period.
+        if self.duration <= 0:
+            return None
+        exceeded = np.cumsum(self.bins[::-1])
+        index = int(np.searchsorted(exceeded, self.duration * n / 100.0))
+        index = len(self.bins) - 1 - min(index, len(self.bins) - 1)
+        return float(self.low_db + (index + 0.5) * self.resolution_db)
+
+    def summary(self):
+        values = {
+            "leq": self.leq(),
+            "lmax": self.max_db,
+            "lmin": self.min_db,
+            "duration_s": self.duration,
+            "start_time": self.start_time,
+        }
+        for n in PERCENTILES:
+            values[f"l{n}"] = self.percentile(n)
+        return values
+
+
+class LevelStatistics:
+    def __init__(self, shift_hours=8.0):
+        self.shift_s = float(shift_hours) * 3600.0
+        self.periods = {
+            "hour": LevelHistogram(),
+            "shift": LevelHistogram(),
+            "total": LevelHistogram(),
+        }
+
+    def add(self, db, duration, now=None):
+        if now is None:
+            now = time.time()
+        local = time.localtime(now)
+        hour_start = now - (local.tm_min * 60 + local.tm_sec + now % 1.0)
+
+        hour = self.periods["hour"]
+        if hour.start_time is None or hour.start_time < hour_start:
+            hour.reset(hour_start)
+        shift = self.periods["shift"]
+        if shift.start_time is None or now - shift.start_time >= self.shift_s:
+            shift.reset(now)
+        total = self.periods["total"]
+        if total.start_time is None:
+            total.start_time = now
+
+        for histogram in self.periods.values():
+            histogram.add(db, duration)
+
+    def reset(self, period=None):
+        names = [period] if period else list(self.periods)
+        for name in names:
+            self.periods[name].reset()
+
+    def summary(self):
+        return {name: histogram.summary() for name, histogram in self.periods.items()}
@@ -0,0 +1,83 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class IncrementalStft:
+    def __init__(self, sample_rate, fft_size=2048, overlap=0.5, history_s=30.0, channels=1):
+        self.sample_rate = sample_rate
+        self.fft_size = int(fft_size)
+        self.hop = max(1, int(round(self.fft_size * (1.0 - overlap))))
+        self.channels = channels
+        self.bins = self.fft_size // 2 + 1
+        self.row_period_s = self.hop / float(sample_rate)
+        self.rows = max(1, int(round(history_s / self.row_period_s)))
+        self.freqs = np.fft.rfftfreq(self.fft_size, 1.0 / sample_rate)
+
+        self.window = np.hanning(self.fft_size).astype(np.float32)
+        # RMS power, as in the band spectrum: a full-scale sine in the
+        # middle of a bin reads -3 dBFS.
+        self._power_scale = 2.0 / np.sum(self.window) ** 2
+
+        # Samples not yet covered by a complete hop sit at the start of one
+        # of two buffers; each block is appended after them and what is left
+        # over moves to the start of the other, so nothing is reallocated.
+        self._buffers = [np.zeros((channels, 2 * self.fft_size), dtype=np.float32) for _ in range(2)]
+        self._active = 0
+        self._pending = 0
+
+        # Every row is written twice, rows apart, so the latest `rows` rows
+        # are always one contiguous slice of the buffer.
+        self._history = np.full((channels, 2 * self.rows, self.bins), -120.0, dtype=np.float32)
+        self.count = 0
+
+    def reset(self):
+        self._pending = 0
+        self._history[:] = -120.0
+        self.count = 0
+
+    def process(self, samples):
+        # Transforms only the hops completed by this (channels, frames) block
+        # and returns their levels as a (channels, new rows, bins) array.
+        total = self._pending + samples.shape[1]
+        buffer = self._buffers[self._active]
+        if buffer.shape[1] < total:
+            grown = np.zeros((self.channels, total), dtype=np.float32)
+            grown[:, :self._pending] = buffer[:, :self._pending]
+            self._buffers = [grown, np.zeros_like(grown)]
+            self._active = 0
+            buffer = grown
+        buffer[:, self._pending:total] = samples
+        available = total - self.fft_size
+        if available < 0:
+            self._pending = total
+            return None
+        frames = available // self.hop + 1
+        consumed = frames * self.hop
+        windows = sliding_window_view(buffer[:, :total], self.fft_size, axis=1)[:, :consumed:self.hop]
+        spectrum = np.fft.rfft(windows * self.window, axis=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+
+        self._pending = total - consumed
+        self._active = 1 - self._active
+        self._buffers[self._active][:, :self._pending] = buffer[:, consumed:total]
+        return (10 * np.log10(power * self._power_scale + 1e-12)).astype(np.float32)
+
+    def append(self, rows):
+        count = rows.shape[1]
+        if count > self.rows:
+            rows = rows[:, -self.rows:]
+            self.count += count - self.rows
+            count = self.rows
+        index = (self.count + np.arange(count)) % self.rows
+        self._history[:, index] = rows
+        self._history[:, index + self.rows] = rows
+        self.count += count
+
+    def rows_since(self, channel, since):
+        # Rows written after the first `since`, oldest first; at most one
+        # history's worth if the caller has fallen behind.
+        count = min(self.count - since, self.rows)
+        if count <= 0:
+            return self._history[channel, :0].copy()
+        end = self.count % self.rows + self.rows
+        return self._history[channel, end - count:end].copy()
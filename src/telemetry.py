@@ -0,0 +1,217 @@
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b"SMT1"
+VERSION = 2
+_HEADER = struct.Struct("<4sBBH32s")
+FRAME = struct.Struct("<I")
+# Levels travel as int16 hundredths of a dB; this marks a missing value.
+MISSING = -32768
+MAX_BATCH = 64
+
+
+def record_dtype(bands):
+    return np.dtype([
+        ("time", "<f8"),
+        ("leq", "<i2"),
+        ("lmax", "<i2"),
+        ("bands", "<i2", (bands,)),
+        ("dropped_blocks", "<u4"),
+        ("input_overflows", "<u4"),
+        ("input_underflows", "<u4"),
+    ])
+
+
+# Largest packet a meter can send (a full batch with the most bands the
+# header can describe); TCP frames claiming more are not read.
+MAX_FRAME = _HEADER.size + MAX_BATCH * record_dtype(255).itemsize
+
+
+def to_centi_db(values):
+    values = np.asarray(values, dtype=np.float64)
+    scaled = np.round(np.nan_to_num(values, nan=MISSING / 100.0) * 100.0)
+    return np.clip(scaled, MISSING, 32767).astype(np.int16)
+
+
+def from_centi_db(values):
+    values = np.asarray(values)
+    return np.where(values == MISSING, np.nan, values / 100.0)
+
+
+def encode_packet(unit, records):
+    header = _HEADER.pack(MAGIC, VERSION, records.dtype["bands"].shape[0], len(records), unit.encode("utf-8")[:32])
+    return header + records.tobytes()
+
+
+def decode_packet(data):
+    # Returns (unit, records) or raises ValueError for anything malformed.
+    if len(data) < _HEADER.size:
+        raise ValueError("truncated telemetry header")
+    magic, version, bands, count, unit = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a telemetry packet")
+    dtype = record_dtype(bands)
+    if len(data) != _HEADER.size + count * dtype.itemsize:
+        raise ValueError("telemetry packet size does not match its header")
+    records = np.frombuffer(data, dtype=dtype, count=count, offset=_HEADER.size)
+    return unit.rstrip(b"\0").decode("utf-8", "replace"), records
+
+
+def parse_address(text, default_port):
+    # host:port, host, :port (all interfaces), [v6]:port, [v6] or a bare
+    # IPv6 address.
+    text = str(text).strip()
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        return host, int(rest[1:]) if rest.startswith(":") else default_port
+    if text.count(":") > 1:
+        return text, default_port
+    host, colon, port = text.rpartition(":")
+    if not colon:
+        return port or "127.0.0.1", default_port
+    return host, int(port) if port else default_port
+
+
+def resolve(address, kind):
+    # (family, sockaddr) of the first match, so IPv4 and IPv6 hosts both work.
+    # An empty host (from ":port") is every interface, as bind() takes it.
+    host, port = address[:2]
+    flags = 0 if host else socket.AI_PASSIVE
+    family, _, _, _, sockaddr = socket.getaddrinfo(host or None, port, type=kind, flags=flags)[0]
+    return family, sockaddr
+
+
+class TelemetrySender:
+    # UDP sends one datagram per batch; TCP frames each batch with its length
+    # and reconnects on the next batch after a failure.
+    def __init__(self, address, protocol="udp"):
+        if protocol not in ("udp", "tcp"):
+            raise ValueError(f"Unknown telemetry protocol: {protocol}")
+        self.address = address
+        self.protocol = protocol
+        self._socket = None
+        self._target = None
+
+    def send(self, payload):
+        if self.protocol == "udp":
+            if self._socket is None:
+                family, self._target = resolve(self.address, socket.SOCK_DGRAM)
+                self._socket = socket.socket(family, socket.SOCK_DGRAM)
+            self._socket.sendto(payload, self._target)
+            return
+        if self._socket is None:
+            self._socket = socket.create_connection(self.address, timeout=2.0)
+        try:
+            self._socket.sendall(FRAME.pack(len(payload)) + payload)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+
+class TelemetryEmitter:
+    # Summarizes each interval (Leq, Lmax, the 31 bands and the dropped
+    # block and input overflow/underflow counts) into a fixed-size record and sends them in batches, so a
+    # collector receives one small packet every few seconds per meter.
+    def __init__(self, audio, address, protocol="udp", interval_s=1.0, batch=10, unit=None, bands=31):
+        self.audio = audio
+        self.interval_s = float(interval_s)
+        self.unit = unit or socket.gethostname()
+        self.sender = TelemetrySender(address, protocol)
+        self.dtype = record_dtype(bands)
+        self._batch = np.zeros(max(1, min(int(batch), MAX_BATCH)), dtype=self.dtype)
+        self._batch_len = 0
+        self._lmax = None
+        self._lmax_lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread = None
+        audio.add_level_listener(self._on_level)
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _on_level(self, db, duration):
+        with self._lmax_lock:
+            if self._lmax is None or db > self._lmax:
+                self._lmax = db
+
+    def _take_lmax(self):
+        with self._lmax_lock:
+            lmax, self._lmax = self._lmax, None
+        return np.nan if lmax is None else lmax
+
+    def _run(self):
+        counter = self.audio.get_energy_counter()
+        next_time = (np.floor(time.time() / self.interval_s) + 1) * self.interval_s
+        try:
+            while not self._stop.wait(max(0.0, next_time - time.time())):
+                latest = self.audio.get_energy_counter()
+                leq = self.audio.leq_between(counter, latest)
+                counter = latest
+
+                record = self._batch[self._batch_len]
+                record["time"] = next_time
+                record["leq"] = to_centi_db(np.nan if leq is None else leq)
+                record["lmax"] = to_centi_db(self._take_lmax())
+                record["bands"] = to_centi_db(self.audio.get_spectrum())
+                record["dropped_blocks"] = self.audio.dropped_blocks
+                record["input_overflows"] = self.audio.input_overflows
+                record["input_underflows"] = self.audio.input_underflows
+                self._batch_len += 1
+                if self._batch_len == len(self._batch):
+                    self._flush()
+
+                next_time += self.interval_s
+                if next_time < time.time():
+                    next_time = (np.floor(time.time() / self.interval_s) + 1) * self.interval_s
+        finally:
+            self._flush()
+            self.sender.close()
+
+    def _flush(self):
+        if not self._batch_len:
+            return
+        try:
+            self.sender.send(encode_packet(self.unit, self._batch[:self._batch_len]))
+            self.sent += self._batch_len
+        except OSError:
+            # The collector is down or unreachable; the batch is dropped
+            # rather than held, so a long outage cannot grow memory.
+            self.failed += self._batch_len
+        self._batch_len = 0
+
+
+def make_emitter(audio, config, bands=31):
+    target = config.get("telemetry_target")
+    if not target:
+        return None
+    return TelemetryEmitter(
+        audio,
+        parse_address(target, 9750),
+        protocol=config.get("telemetry_protocol", "udp"),
+        interval_s=config.get("telemetry_interval_s", 1.0),
+        batch=config.get("telemetry_batch", 10),
+        unit=config.get("telemetry_unit"),
+        bands=bands,
+    )
@@ -1,9 +1,31 @@
 import math
+import time
 
+import numpy as np
 from PyQt5 import QtCore, QtGui, QtWidgets
-import pyqtgraph as pg
 
 from .audio import GRAPHIC_EQ_BANDS
+from .history import with_gaps
+
+
+class LazyPage(QtWidgets.QWidget):
+    # Stands in for a page whose widget, and whatever that widget imports
+    # (pyqtgraph for the plots), is only built when the page is first used.
+    def __init__(self, factory, parent=None):
+        super().__init__(parent)
+        self._factory = factory
+        self._widget = None
+        self._layout = QtWidgets.QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+
+    def built(self):
+        return self._widget is not None
+
+    def widget(self):
+        if self._widget is None:
+            self._widget = self._factory()
+            self._layout.addWidget(self._widget)
+        return self._widget
 
 
 class DbDisplayWidget(QtWidgets.QWidget):
@@ -24,7 +46,170 @@ class DbDisplayWidget(QtWidgets.QWidget):
         self.label.setText(f"{value:.1f} dBA")
 
 
+class ChannelsWidget(QtWidgets.QWidget):
+    channel_selected = QtCore.pyqtSignal(int)
+
+    def __init__(self, channels, parent=None):
+        super().__init__(parent)
+        self.group = QtWidgets.QButtonGroup(self)
+        self.group.setExclusive(True)
+        self.group.idClicked.connect(self.channel_selected)
+
+        columns = 2 if channels <= 4 else 4
+        grid = QtWidgets.QGridLayout(self)
+        self.buttons = []
+        for channel in range(channels):
+            button = QtWidgets.QPushButton()
+            button.setCheckable(True)
+            button.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+            button.setStyleSheet("font-size: 28px;")
+            self.group.addButton(button, channel)
+            grid.addWidget(button, channel // columns, channel % columns)
+            self.buttons.append(button)
+        self.buttons[0].setChecked(True)
+        self.set_values([0.0] * channels)
+
+    def set_values(self, values):
+        for channel, (button, value) in enumerate(zip(self.buttons, values)):
+            button.setText(f"Ch {channel + 1}\n{value:.1f} dBA")
+
+
+class StatsWidget(QtWidgets.QWidget):
+    PERIODS = (("hour", "Hour"), ("shift", "Shift"), ("total", "Total"))
+    COLUMNS = (("leq", "Leq"), ("lmax", "Lmax"), ("lmin", "Lmin"),
+               ("l10", "L10"), ("l50", "L50"), ("l90", "L90"))
+
+    reset_requested = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        font = QtGui.QFont("Arial", 20)
+        header_font = QtGui.QFont("Arial", 20, QtGui.QFont.Bold)
+
+        grid = QtWidgets.QGridLayout()
+        for col, (_, title) in enumerate(self.COLUMNS, start=1):
+            label = QtWidgets.QLabel(title)
+            label.setFont(header_font)
+            label.setAlignment(QtCore.Qt.AlignCenter)
+            grid.addWidget(label, 0, col)
+
+        self.cells = {}
+        for row, (period, title) in enumerate(self.PERIODS, start=1):
+            label = QtWidgets.QLabel(title)
+            label.setFont(header_font)
+            grid.addWidget(label, row, 0)
+            for col, (key, _) in enumerate(self.COLUMNS, start=1):
+                cell = QtWidgets.QLabel("--")
+                cell.setFont(font)
+                cell.setAlignment(QtCore.Qt.AlignCenter)
+                grid.addWidget(cell, row, col)
+                self.cells[(period, key)] = cell
+
+        self.reset_button = QtWidgets.QPushButton("Reset")
+        self.reset_button.setMinimumHeight(40)
+        self.reset_button.setStyleSheet("font-size: 18px;")
+        self.reset_button.clicked.connect(self.reset_requested)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(grid, 1)
+        layout.addWidget(self.reset_button, 0, QtCore.Qt.AlignRight)
+
+    def set_statistics(self, statistics):
+        for (period, key), cell in self.cells.items():
+            value = statistics.get(period, {}).get(key)
+            cell.setText("--" if value is None else f"{value:.1f}")
+
+
+class DoseWidget(QtWidgets.QWidget):
+    COLUMNS = (("dose_pct", "Dose %"), ("twa", "TWA"),
+               ("projected_dose_pct", "8 h dose %"), ("projected_twa", "8 h TWA"))
+
+    reset_requested = QtCore.pyqtSignal()
+
+    def __init__(self, names, parent=None):
+        super().__init__(parent)
+        font = QtGui.QFont("Arial", 20)
+        header_font = QtGui.QFont("Arial", 20, QtGui.QFont.Bold)
+
+        grid = QtWidgets.QGridLayout()
+        for col, (_, title) in enumerate(self.COLUMNS, start=1):
+            label = QtWidgets.QLabel(title)
+            label.setFont(header_font)
+            label.setAlignment(QtCore.Qt.AlignCenter)
+            grid.addWidget(label, 0, col)
+
+        self.cells = {}
+        for row, name in enumerate(names, start=1):
+            label = QtWidgets.QLabel(name.replace("_", " ").upper())
+            label.setFont(header_font)
+            grid.addWidget(label, row, 0)
+            for col, (key, _) in enumerate(self.COLUMNS, start=1):
+                cell = QtWidgets.QLabel("--")
+                cell.setFont(font)
+                cell.setAlignment(QtCore.Qt.AlignCenter)
+                grid.addWidget(cell, row, col)
+                self.cells[(name, key)] = cell
+
+        self.duration_label = QtWidgets.QLabel("--")
+        self.duration_label.setStyleSheet("font-size: 18px;")
+        self.reset_button = QtWidgets.QPushButton("Reset")
+        self.reset_button.setMinimumHeight(40)
+        self.reset_button.setStyleSheet("font-size: 18px;")
+        self.reset_button.clicked.connect(self.reset_requested)
+
+        bottom = QtWidgets.QHBoxLayout()
+        bottom.addWidget(self.duration_label, 1)
+        bottom.addWidget(self.reset_button)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(grid, 1)
+        layout.addLayout(bottom)
+
+    def set_dose(self, dose):
+        for (name, key), cell in self.cells.items():
+            value = dose.get(name, {}).get(key)
+            cell.setText("--" if value is None else f"{value:.1f}")
+        duration = max((values["duration_s"] or 0.0 for values in dose.values()), default=0.0)
+        minutes = int(duration // 60)
+        self.duration_label.setText(f"Measured {minutes // 60} h {minutes % 60:02d} min")
+
+
+class DiagnosticsWidget(QtWidgets.QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.label = QtWidgets.QLabel()
+        self.label.setAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
+        self.label.setFont(QtGui.QFont("Monospace", 14))
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.label)
+
+    def set_diagnostics(self, diagnostics):
+        def fmt(value, unit=""):
+            return "--" if value is None else f"{value:.0f}{unit}"
+
+        lines = []
+        for name, value in diagnostics["counters"].items():
+            lines.append(f"{name:<18} {value}")
+        for name, key in (
+            ("stream latency", "stream_latency_s"),
+            ("input latency", "input_latency_s"),
+            ("first reading", "first_reading_s"),
+        ):
+            value = diagnostics[key]
+            lines.append(f"{name:<18} {fmt(None if value is None else value * 1000.0, ' ms')}")
+        lines.append("")
+        lines.append(f"{'timing (us)':<18} {'count':>8} {'p50':>8} {'p99':>8} {'max':>8}")
+        for name, timing in diagnostics["timings"].items():
+            lines.append(
+                f"{name:<18} {timing['count']:>8} {fmt(timing['p50_us']):>8} "
+                f"{fmt(timing['p99_us']):>8} {fmt(timing['max_us']):>8}"
+            )
+        self.label.setText("\n".join(lines))
+
+
 class RangeBarWidget(QtWidgets.QWidget):
+    START_ANGLE = 225.0
+    SWEEP_ANGLE = -270.0
+
     def __init__(self, low_db, high_db, min_db=None, max_db=None, parent=None):
         super().__init__(parent)
         self.value = 0.0
@@ -38,44 +223,78 @@ class RangeBarWidget(QtWidgets.QWidget):
         else:
             self.min_db = min_db
             self.max_db = max_db
+        self.paint_observer = None
+        # The dial (background, arcs and ticks) only changes with the size or
+        # the range, so it is drawn once into a pixmap and each frame just
+        # blits it and adds the needle and readout.
+        self._dial = None
+        self._font = QtGui.QFont("Arial", 24, QtGui.QFont.Bold)
+        self._font_height = QtGui.QFontMetrics(self._font).height()
         self.setMinimumHeight(200)
 
     def set_value(self, value):
+        if value == self.value:
+            return
         self.value = value
         self.update()
 
     def set_range(self, low_db, high_db):
         self.low_db = low_db
         self.high_db = high_db
+        self._dial = None
         self.update()
 
+    def resizeEvent(self, event):
+        self._dial = None
+        super().resizeEvent(event)
+
     def paintEvent(self, event):
-        painter = QtGui.QPainter(self)
+        if self.paint_observer is None:
+            self._paint()
+            return
+        started = time.perf_counter()
+        self._paint()
+        self.paint_observer(time.perf_counter() - started)
+
+    def _angle_for_db(self, db):
+        t = (db - self.min_db) / (self.max_db - self.min_db)
+        t = max(0.0, min(t, 1.0))
+        return self.START_ANGLE + self.SWEEP_ANGLE * t
+
+    @staticmethod
+    def _point_on_circle(center, radius, angle_deg):
+        rad = math.radians(angle_deg)
+        return QtCore.QPointF(
+            center.x() + math.cos(rad) * radius,
+            center.y() - math.sin(rad) * radius,
+        )
+
+    def _geometry(self):
         rect = self.rect().adjusted(20, 20, -20, -20)
+        center = QtCore.QPointF(rect.center().x(), rect.center().y() + rect.height() * 0.1)
+        arc_width = max(10.0, min(rect.width(), rect.height()) * 0.05)
+        max_radius = min(
+            center.x() - rect.left(),
+            rect.right() - center.x(),
+            center.y() - rect.top(),
+            rect.bottom() - center.y(),
+        )
+        radius = max(max_radius - arc_width * 0.6, 10.0)
+        return rect, center, arc_width, radius
+
+    def _render_dial(self):
+        ratio = self.devicePixelRatioF()
+        pixmap = QtGui.QPixmap(self.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(pixmap)
+        rect, center, arc_width, radius = self._geometry()
 
         painter.setRenderHint(QtGui.QPainter.Antialiasing)
         painter.fillRect(rect, QtGui.QColor("#000000"))
         painter.setPen(QtGui.QPen(QtGui.QColor("#333333"), 2))
         painter.drawRoundedRect(rect, 12, 12)
 
-        start_angle = 225.0
-        sweep_angle = -270.0
-
-        def clamp(value, low, high):
-            return max(low, min(value, high))
-
-        def angle_for_db(db):
-            t = (db - self.min_db) / (self.max_db - self.min_db)
-            t = clamp(t, 0.0, 1.0)
-            return start_angle + sweep_angle * t
-
-        def point_on_circle(center, radius, angle_deg):
-            rad = math.radians(angle_deg)
-            return QtCore.QPointF(
-                center.x() + math.cos(rad) * radius,
-                center.y() - math.sin(rad) * radius,
-            )
-
         def lerp_color(a, b, t):
             return QtGui.QColor(
                 int(a.red() + (b.red() - a.red()) * t),
@@ -83,62 +302,65 @@ class RangeBarWidget(QtWidgets.QWidget):
                 int(a.blue() + (b.blue() - a.blue()) * t),
             )
 
-        def draw_gradient_arc(center, radius, start_deg, end_deg, start_color, end_color, width, steps=80):
+        def draw_gradient_arc(start_deg, end_deg, start_color, end_color, steps=80):
             for i in range(steps):
                 t0 = i / steps
                 t1 = (i + 1) / steps
                 a0 = start_deg + (end_deg - start_deg) * t0
                 a1 = start_deg + (end_deg - start_deg) * t1
                 color = lerp_color(start_color, end_color, (t0 + t1) * 0.5)
-                painter.setPen(QtGui.QPen(color, width, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap))
-                painter.drawLine(point_on_circle(center, radius, a0), point_on_circle(center, radius, a1))
+                painter.setPen(QtGui.QPen(color, arc_width, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap))
+                painter.drawLine(
+                    self._point_on_circle(center, radius, a0),
+                    self._point_on_circle(center, radius, a1),
+                )
 
-        center = QtCore.QPointF(rect.center().x(), rect.center().y() + rect.height() * 0.1)
-        arc_width = max(10.0, min(rect.width(), rect.height()) * 0.05)
-        max_radius = min(
-            center.x() - rect.left(),
-            rect.right() - center.x(),
-            center.y() - rect.top(),
-            rect.bottom() - center.y(),
-        )
-        radius = max(max_radius - arc_width * 0.6, 10.0)
+        start_angle = self.START_ANGLE
+        end_angle = start_angle + self.SWEEP_ANGLE
 
         base_color = QtGui.QColor("#dddddd")
-        draw_gradient_arc(center, radius, start_angle, start_angle + sweep_angle, base_color, base_color, arc_width, steps=60)
+        draw_gradient_arc(start_angle, end_angle, base_color, base_color, steps=60)
 
         orange = QtGui.QColor("#f28c28")
         green = QtGui.QColor("#2e8b57")
         red = QtGui.QColor("#b31b1b")
 
-        low_angle = angle_for_db(self.low_db)
-        high_angle = angle_for_db(self.high_db)
-        end_angle = start_angle + sweep_angle
+        low_angle = self._angle_for_db(self.low_db)
+        high_angle = self._angle_for_db(self.high_db)
 
-        draw_gradient_arc(center, radius, start_angle, low_angle, orange, green, arc_width)
-        draw_gradient_arc(center, radius, low_angle, high_angle, green, green, arc_width)
-        draw_gradient_arc(center, radius, high_angle, end_angle, green, red, arc_width)
+        draw_gradient_arc(start_angle, low_angle, orange, green)
+        draw_gradient_arc(low_angle, high_angle, green, green)
+        draw_gradient_arc(high_angle, end_angle, green, red)
 
+        painter.setPen(QtGui.QPen(QtGui.QColor("#ffffff"), 2))
         for tick_db in (self.min_db, 95.0, self.max_db):
-            tick_angle = angle_for_db(tick_db)
-            inner = point_on_circle(center, radius - arc_width * 0.9, tick_angle)
-            outer = point_on_circle(center, radius + arc_width * 0.1, tick_angle)
-            painter.setPen(QtGui.QPen(QtGui.QColor("#ffffff"), 2))
+            tick_angle = self._angle_for_db(tick_db)
+            inner = self._point_on_circle(center, radius - arc_width * 0.9, tick_angle)
+            outer = self._point_on_circle(center, radius + arc_width * 0.1, tick_angle)
             painter.drawLine(inner, outer)
+        painter.end()
+        return pixmap
+
+    def _paint(self):
+        if self._dial is None:
+            self._dial = self._render_dial()
+        painter = QtGui.QPainter(self)
+        painter.drawPixmap(0, 0, self._dial)
+        rect, center, arc_width, radius = self._geometry()
 
-        value_angle = angle_for_db(self.value)
-        needle_end = point_on_circle(center, radius - arc_width * 0.6, value_angle)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        value_angle = self._angle_for_db(self.value)
+        needle_end = self._point_on_circle(center, radius - arc_width * 0.6, value_angle)
         painter.setPen(QtGui.QPen(QtGui.QColor("#ffffff"), 4))
         painter.drawLine(center, needle_end)
         painter.setBrush(QtGui.QBrush(QtGui.QColor("#ffffff")))
         painter.drawEllipse(center, 6, 6)
 
         painter.setPen(QtGui.QColor("#ffffff"))
-        font = QtGui.QFont("Arial", 24, QtGui.QFont.Bold)
-        painter.setFont(font)
-        font_height = QtGui.QFontMetrics(font).height()
+        painter.setFont(self._font)
         text_rect = QtCore.QRectF(
             rect.left(),
-            center.y() + arc_width * 0.4 + font_height,
+            center.y() + arc_width * 0.4 + self._font_height,
             rect.width(),
             rect.bottom() - center.y(),
         )
@@ -148,6 +370,8 @@ class RangeBarWidget(QtWidgets.QWidget):
 class SpectrumWidget(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
+        import pyqtgraph as pg
+
         pg.setConfigOptions(antialias=True)
         self.plot = pg.PlotWidget(background="w")
         self.plot.setMouseEnabled(x=False, y=False)
@@ -161,6 +385,12 @@ class SpectrumWidget(QtWidgets.QWidget):
                                         width=0.6,
                                         brush=pg.mkBrush("#1f77b4"))
         self.plot.addItem(self.bar_item)
+        # Tonal bands are drawn in orange; brushes only change with the flags.
+        self._brushes = (pg.mkBrush("#1f77b4"), pg.mkBrush("#ff7f0e"))
+        self._tonal = None
+        self.impulse_label = pg.TextItem("", color="#d62728", anchor=(1, 0))
+        self.impulse_label.setPos(len(GRAPHIC_EQ_BANDS) - 0.5, 0)
+        self.plot.addItem(self.impulse_label)
 
         layout = QtWidgets.QVBoxLayout(self)
         layout.addWidget(self.plot)
@@ -177,3 +407,158 @@ class SpectrumWidget(QtWidgets.QWidget):
     def set_levels(self, levels_db):
         heights = [max(min(v, 0), -80) for v in levels_db]
         self.bar_item.setOpts(height=heights)
+
+    def set_detections(self, tonal, impulsive):
+        tonal = tuple(tonal)
+        if tonal != self._tonal:
+            self._tonal = tonal
+            self.bar_item.setOpts(brushes=[self._brushes[flag] for flag in tonal])
+        self.impulse_label.setText("Impulsive" if impulsive else "")
+
+
+class TrendWidget(QtWidgets.QWidget):
+    SPANS = (("1 min", 60.0), ("1 h", 3600.0), ("1 day", 86400.0), ("1 week", 604800.0))
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        import pyqtgraph as pg
+
+        self.span_s = self.SPANS[0][1]
+        self.plot = pg.PlotWidget(background="w", axisItems={"bottom": pg.DateAxisItem()})
+        self.plot.setMouseEnabled(x=False, y=False)
+        self.plot.showGrid(x=True, y=True, alpha=0.3)
+        self.plot.setLabel("left", "dBA")
+
+        # Max and min of each bucket as a shaded band, Leq as the line.
+        self.max_curve = pg.PlotDataItem(pen=pg.mkPen("#9ecae1"), connect="finite")
+        self.min_curve = pg.PlotDataItem(pen=pg.mkPen("#9ecae1"), connect="finite")
+        self.band = pg.FillBetweenItem(self.max_curve, self.min_curve, brush=pg.mkBrush(158, 202, 225, 90))
+        self.leq_curve = pg.PlotDataItem(pen=pg.mkPen("#1f77b4", width=2), connect="finite")
+        for item in (self.max_curve, self.min_curve, self.band, self.leq_curve):
+            self.plot.addItem(item)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.span_buttons = QtWidgets.QButtonGroup(self)
+        for index, (label, span_s) in enumerate(self.SPANS):
+            button = QtWidgets.QPushButton(label)
+            button.setCheckable(True)
+            button.setChecked(index == 0)
+            button.setMinimumHeight(40)
+            button.setStyleSheet("font-size: 18px;")
+            self.span_buttons.addButton(button, index)
+            buttons.addWidget(button)
+        self.span_buttons.idClicked.connect(self._set_span)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.plot, 1)
+        layout.addLayout(buttons)
+
+    def _set_span(self, index):
+        self.span_s = self.SPANS[index][1]
+
+    def set_history(self, history):
+        history = with_gaps(history)
+        times = history["time"]
+        self.max_curve.setData(times, history["max"])
+        self.min_curve.setData(times, history["min"])
+        self.leq_curve.setData(times, history["leq"])
+        now = time.time()
+        self.plot.setXRange(now - self.span_s, now, padding=0)
+        if len(times):
+            # At least 20 dB tall, so small fluctuations do not look large.
+            low = float(np.nanmin(history["min"]))
+            high = float(np.nanmax(history["max"]))
+            half = max((high - low) / 2.0 + 2.0, 10.0)
+            middle = (low + high) / 2.0
+            self.plot.setYRange(middle - half, middle + half, padding=0)
+
+
+class RingImageItem(QtWidgets.QGraphicsItem):
+    # A circular buffer of colour-indexed columns drawn as one image, oldest
+    # column first. New columns are written straight into the QImage, so a
+    # refresh touches only the columns that changed and the image is never
+    # rebuilt; painting draws the two halves of the ring side by side.
+    def __init__(self, columns, rows, colors, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.head = 0
+        self.qimage = QtGui.QImage(columns, rows, QtGui.QImage.Format_Indexed8)
+        self.qimage.setColorTable([QtGui.qRgb(int(r), int(g), int(b)) for r, g, b in colors[:, :3]])
+        bits = self.qimage.bits()
+        bits.setsize(self.qimage.byteCount())
+        stride = self.qimage.bytesPerLine()
+        self.pixels = np.frombuffer(bits, dtype=np.uint8).reshape(rows, stride)[:, :columns]
+        self.pixels[:] = 0
+
+    def boundingRect(self):
+        return QtCore.QRectF(0.0, 0.0, self.columns, self.qimage.height())
+
+    def set_rect(self, rect):
+        self.setPos(rect.left(), rect.top())
+        self.setTransform(QtGui.QTransform.fromScale(
+            rect.width() / self.columns, rect.height() / self.qimage.height()
+        ))
+
+    def clear(self):
+        self.pixels[:] = 0
+        self.head = 0
+        self.update()
+
+    def add_columns(self, values):
+        count = len(values)
+        if count > self.columns:
+            values = values[-self.columns:]
+            self.head = (self.head + count - self.columns) % self.columns
+            count = self.columns
+        first = min(count, self.columns - self.head)
+        self.pixels[:, self.head:self.head + first] = values[:first].T
+        self.pixels[:, :count - first] = values[first:].T
+        self.head = (self.head + count) % self.columns
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        height = self.qimage.height()
+        older = self.columns - self.head
+        painter.drawImage(QtCore.QRectF(0, 0, older, height), self.qimage,
+                          QtCore.QRectF(self.head, 0, older, height))
+        if self.head:
+            painter.drawImage(QtCore.QRectF(older, 0, self.head, height), self.qimage,
+                              QtCore.QRectF(0, 0, self.head, height))
+
+
+class WaterfallWidget(QtWidgets.QWidget):
+    def __init__(self, rows, row_period_s, freqs, min_db=-100.0, max_db=0.0, parent=None):
+        super().__init__(parent)
+        import pyqtgraph as pg
+
+        self.rows = rows
+        self.min_db = min_db
+        self.max_db = max_db
+        self.plot = pg.PlotWidget(background="w")
+        self.plot.setMouseEnabled(x=False, y=False)
+        self.plot.setLabel("left", "Frequency", units="Hz")
+        self.plot.setLabel("bottom", "Time", units="s")
+
+        # Each spectrogram row is one column of a ring image, so new rows are
+        # copied in place and nothing is re-uploaded on a refresh.
+        self.image_item = RingImageItem(
+            rows, len(freqs), pg.colormap.get("viridis").getLookupTable(nPts=256)
+        )
+        bin_width = freqs[1] - freqs[0]
+        span_s = rows * row_period_s
+        self.image_item.set_rect(QtCore.QRectF(-span_s, 0.0, span_s, freqs[-1] + bin_width))
+        self.plot.addItem(self.image_item)
+        self.plot.setXRange(-span_s, 0.0, padding=0)
+        self.plot.setYRange(0.0, freqs[-1], padding=0)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.plot)
+
+    def clear(self):
+        self.image_item.clear()
+
+    def add_rows(self, rows_db):
+        if not len(rows_db):
+            return
+        scaled = np.clip((rows_db - self.min_db) * (255.0 / (self.max_db - self.min_db)), 0, 255)
+        self.image_item.add_columns(scaled.astype(np.uint8))
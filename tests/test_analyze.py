@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from src.analyze import analyze_file, open_wav, to_float32
+from src.audio import AudioProcessor
+from src.datalog import read_log
+from src.sources import make_signal
+
+SAMPLE_RATE = 48000
+SECONDS = 6.5
+
+
+def config(tmp_path, block_size):
+    return {
+        "block_size": block_size,
+        "update_interval_ms": 250,
+        "calibration_file": str(tmp_path / "none.txt"),
+        "cache_dir": str(tmp_path / "cache"),
+    }
+
+
+@pytest.fixture
+def wav_path(tmp_path):
+    frames = int(SECONDS * SAMPLE_RATE)
+    signal = make_signal("burst", SAMPLE_RATE, frames) + make_signal("pink", SAMPLE_RATE, frames, level_dbfs=-40.0)
+    path = str(tmp_path / "burst.wav")
+    wavfile.write(path, SAMPLE_RATE, signal)
+    return path
+
+
+def stream_series(path, config):
+    # The WAV fed block by block as the live stream would, with blocks that
+    # divide both the record and the spectrum interval.
+    sample_rate, data = open_wav(path)
+    audio = AudioProcessor(dict(config, sample_rate=sample_rate, channels=data.shape[1]))
+    done = 0
+    audio.clock = lambda: done / float(sample_rate)
+    counter = audio.get_energy_counter()
+    spectrum_frames = int(audio.spectrum_interval_s * sample_rate)
+    leq, bands = [], []
+    for start in range(0, len(data), audio.block_size):
+        block = to_float32(data[start:start + audio.block_size])
+        done = start + len(block)
+        audio.process_block(np.ascontiguousarray(block.T))
+        if done % spectrum_frames == 0:
+            audio.compute_spectrum()
+        if done % sample_rate == 0:
+            latest = audio.get_energy_counter()
+            leq.append(audio.leq_between(counter, latest))
+            counter = latest
+            bands.append(audio.get_spectrum())
+    return np.array(leq), np.array(bands)
+
+
+@pytest.mark.parametrize("block_size", [480, 1024, 4096])
+def test_analyze_matches_the_stream(tmp_path, wav_path, block_size):
+    leq, bands = stream_series(wav_path, config(tmp_path, 480))
+
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    summary = analyze_file(wav_path, config(tmp_path, block_size), 1.0, str(output_dir))
+    records = read_log(summary["output"])
+
+    np.testing.assert_array_equal(records["time"], np.arange(1, int(SECONDS) + 1))
+    np.testing.assert_allclose(records["leq"], leq, atol=1e-3)
+    np.testing.assert_allclose(records["bands"], bands, atol=1e-3)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from src.audio import GRAPHIC_EQ_BANDS, BandPlan
+
+
+def mask_levels(data, sample_rate):
+    # The per-band mask computation BandPlan replaced, summing each band's
+    # bins and dividing out the Hann window's noise bandwidth.
+    window = np.hanning(len(data))
+    spectrum = np.fft.rfft(data * window)
+    scale = max(np.sum(window) / 2.0, 1e-12)
+    mag = (np.abs(spectrum) / scale) / np.sqrt(2.0)
+    enbw = len(data) * np.sum(window ** 2) / np.sum(window) ** 2
+    freqs = np.fft.rfftfreq(len(data), 1.0 / sample_rate)
+    levels = np.zeros(len(GRAPHIC_EQ_BANDS))
+    for i, center in enumerate(GRAPHIC_EQ_BANDS):
+        mask = (freqs >= center / (2 ** (1 / 6))) & (freqs <= center * (2 ** (1 / 6)))
+        levels[i] = 10 * np.log10(np.sum(mag[mask] ** 2) / enbw + 1e-20) if np.any(mask) else -120.0
+    return levels
+
+
+@pytest.mark.parametrize("sample_rate, size", [(48000, 4096), (44100, 8192), (16000, 1024)])
+def test_band_levels_match_mask_computation(sample_rate, size):
+    rng = np.random.default_rng(1)
+    t = np.arange(size) / sample_rate
+    data = 0.1 * rng.standard_normal(size) + 0.5 * np.sin(2 * np.pi * 1000.0 * t)
+    plan = BandPlan(sample_rate, size, np.zeros(len(GRAPHIC_EQ_BANDS)))
+    plan.frame[0] = data
+    levels = plan.band_levels(plan.frame)
+    np.testing.assert_allclose(levels[0], mask_levels(data, sample_rate), atol=1e-6)
+
+
+def test_band_levels_per_channel_with_corrections():
+    size = 4096
+    rng = np.random.default_rng(2)
+    data = rng.standard_normal((2, size)) * [[0.01], [0.3]]
+    corrections = np.vstack([np.zeros(len(GRAPHIC_EQ_BANDS)), np.linspace(-3.0, 3.0, len(GRAPHIC_EQ_BANDS))])
+    plan = BandPlan(48000, size, corrections)
+    plan.frame[:] = data
+    levels = plan.band_levels(plan.frame)
+    for channel in range(2):
+        np.testing.assert_allclose(levels[channel], mask_levels(data[channel], 48000) + corrections[channel], atol=1e-6)
+
+
+def test_sine_reads_its_rms_level():
+    size = 48000
+    t = np.arange(size) / 48000
+    plan = BandPlan(48000, size, np.zeros(len(GRAPHIC_EQ_BANDS)))
+    plan.frame[0] = np.sin(2 * np.pi * 1000.0 * t)
+    levels = plan.band_levels(plan.frame)
+    assert levels[0, GRAPHIC_EQ_BANDS.index(1000)] == pytest.approx(-3.01, abs=0.01)
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from src import cache, dsp
+from src.cache import cached_arrays
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def counting_build():
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"sos": np.arange(12.0).reshape(2, 6)}
+
+    return build, calls
+
+
+def test_cached_arrays_build_once(tmp_path):
+    build, calls = counting_build()
+    first = cached_arrays(str(tmp_path), "a-weighting", 48000, build)
+    second = cached_arrays(str(tmp_path), "a-weighting", 48000, build)
+    assert len(calls) == 1
+    np.testing.assert_array_equal(first["sos"], second["sos"])
+    cached_arrays(str(tmp_path), "a-weighting", 44100, build)
+    assert len(calls) == 2
+
+
+def test_cache_version_change_rebuilds(tmp_path, monkeypatch):
+    build, calls = counting_build()
+    cached_arrays(str(tmp_path), "a-weighting", 48000, build)
+    monkeypatch.setattr(cache, "CACHE_VERSION", cache.CACHE_VERSION + 1)
+    cached_arrays(str(tmp_path), "a-weighting", 48000, build)
+    assert len(calls) == 2
+
+
+def test_corrupt_entry_rebuilds(tmp_path):
+    build, calls = counting_build()
+    cached_arrays(str(tmp_path), "a-weighting", 48000, build)
+    (path,) = tmp_path.iterdir()
+    path.write_bytes(b"not an npz")
+    result = cached_arrays(str(tmp_path), "a-weighting", 48000, build)
+    assert len(calls) == 2
+    assert result["sos"].shape == (2, 6)
+    assert sorted(os.listdir(tmp_path)) == [path.name]
+
+
+def test_no_cache_dir_always_builds():
+    build, calls = counting_build()
+    cached_arrays(None, "a-weighting", 48000, build)
+    cached_arrays(None, "a-weighting", 48000, build)
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("kernel", [True, False])
+def test_sos_filter_matches_scipy_across_blocks(kernel, monkeypatch):
+    from scipy.signal import butter, sosfilt
+
+    dsp.resolve_sosfilt()
+    if not kernel:
+        monkeypatch.setattr(dsp, "_sosfilt", None)
+    sos = butter(4, 0.1, output="sos")
+    x = np.random.default_rng(6).standard_normal((2, 3000))
+    expected = sosfilt(sos, x, axis=-1)
+    sos_filter = dsp.SosFilter(sos, channels=2)
+    blocks = [np.ascontiguousarray(x[:, start:start + 700]) for start in range(0, 3000, 700)]
+    result = np.concatenate([sos_filter.process(block) for block in blocks], axis=1)
+    np.testing.assert_allclose(result, expected, atol=1e-12)
+
+
+def test_importing_the_audio_path_skips_scipy_signal():
+    code = "import sys, src.audio, src.headless; print('scipy.signal' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_preloaded_kernel_is_joined():
+    dsp.preload_sosfilt()
+    dsp.resolve_sosfilt()
+    assert dsp._resolved
+
+
+def test_cold_cache_designs_do_not_race_the_kernel_import(tmp_path):
+    # Every filter design imports scipy while the kernel loads in the
+    # background; a concurrent import would fail or leave the kernel unset.
+    code = (
+        "from src import dsp; from src.audio import AudioProcessor; "
+        f"AudioProcessor({{'sample_rate': 48000, 'block_size': 1024, 'cache_dir': {str(tmp_path)!r}, "
+        "'level_engine': True, 'spectrum_engine': 'filterbank'}); "
+        "dsp.resolve_sosfilt(); print(dsp._sosfilt is not None)"
+    )
+    for _ in range(3):
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "True"
+        for path in tmp_path.iterdir():
+            path.unlink()
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.audio import load_calibration_profile
+from src.calibration import REFERENCE_HZ, correction_db, fit_correction_sos, peaking_sos, sos_response_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_correction_is_opposite_of_deviation_relative_to_reference():
+    freqs = np.array([100.0, 1000.0, 10000.0])
+    gains = np.array([2.0, 1.0, -3.0])
+    np.testing.assert_allclose(correction_db(freqs, gains, freqs), [-1.0, 0.0, 4.0])
+
+
+def test_peaking_section_is_unity_away_from_center():
+    sos = peaking_sos(1000.0, 6.0, 1.0, 48000)
+    response = sos_response_db(sos, [1e-3, 1000.0, 23999.0], 48000)
+    np.testing.assert_allclose(response, [0.0, 6.0, 0.0], atol=1e-3)
+
+
+@pytest.fixture(scope="module")
+def profile():
+    return load_calibration_profile(os.path.join(ROOT, "calibration.txt"))
+
+
+@pytest.fixture(scope="module")
+def fitted(profile):
+    return fit_correction_sos(profile["freqs"], profile["gains"], 48000, sections=4)
+
+
+def test_fit_passes_reference_at_unity(fitted):
+    assert sos_response_db(fitted, [REFERENCE_HZ], 48000)[0] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_fit_follows_correction(profile, fitted):
+    grid = np.geomspace(20.0, 20000.0, 200)
+    error = sos_response_db(fitted, grid, 48000) - correction_db(profile["freqs"], profile["gains"], grid)
+    assert np.sqrt(np.mean(error ** 2)) < 0.25
+    assert np.max(np.abs(error)) < 1.0
+
+
+def test_fit_is_stable(fitted):
+    for section in fitted:
+        assert np.all(np.abs(np.roots(section[3:])) < 1.0)
+
+
+def test_calibration_file_leaves_reference_tone_unchanged(tmp_path):
+    from src.audio import AudioProcessor
+
+    sample_rate, block_size = 48000, 1024
+    t = np.arange(2 * sample_rate) / sample_rate
+    tone = (0.1 * np.sin(2 * np.pi * REFERENCE_HZ * t)).astype(np.float32)[:, None]
+
+    def leq(config):
+        audio = AudioProcessor(dict(config, sample_rate=sample_rate, block_size=block_size, cache_dir=str(tmp_path)))
+        for start in range(0, len(tone) // 2, block_size):
+            audio._on_audio(tone[start:start + block_size], block_size, None, None)
+        counter = audio.get_energy_counter()
+        for start in range(len(tone) // 2, len(tone) - block_size + 1, block_size):
+            audio._on_audio(tone[start:start + block_size], block_size, None, None)
+        return audio.leq_between(counter, audio.get_energy_counter())
+
+    # Same sensitivity, flat response.
+    flat = tmp_path / "flat.txt"
+    flat.write_text('"Sens Factor =-1.935dB, SERNO: 0"\n20\t0\n20000\t0\n')
+    calibrated = leq({"calibration_file": os.path.join(ROOT, "calibration.txt")})
+    assert calibrated == pytest.approx(leq({"calibration_file": str(flat)}), abs=0.01)
+    assert calibrated != pytest.approx(leq({"calibration_db": 1.0, "calibration_file": str(flat)}), abs=0.5)
@@ -0,0 +1,94 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from src.datalog import HEADER_SIZE, LevelLogger, log_path, read_header, read_log, record_dtype
+
+NOON = time.mktime((2024, 5, 1, 12, 0, 0, 0, 0, -1))
+
+
+def write_records(logger, times):
+    for index, when in enumerate(times):
+        record = logger._batch[logger._batch_len]
+        record["time"] = when
+        record["leq"] = 50.0 + index
+        record["bands"] = np.arange(logger.bands) + index
+        logger._batch_len += 1
+        if logger._batch_len == len(logger._batch):
+            logger._flush()
+    logger._flush()
+
+
+def close(logger):
+    logger._handle.close()
+    logger._handle = None
+    logger._handle_path = None
+
+
+def test_round_trip(tmp_path):
+    logger = LevelLogger(None, str(tmp_path), interval_s=1.0, flush_s=4.0)
+    write_records(logger, NOON + np.arange(10.0))
+    close(logger)
+
+    path = log_path(str(tmp_path), NOON)
+    assert read_header(path) == {"bands": 31, "interval_s": 1.0, "record_size": record_dtype(31).itemsize}
+    records = read_log(path)
+    np.testing.assert_array_equal(records["time"], NOON + np.arange(10.0))
+    np.testing.assert_array_equal(records["leq"], 50.0 + np.arange(10.0))
+    np.testing.assert_array_equal(records["bands"][3], np.arange(31) + 3)
+
+
+def test_records_split_at_midnight(tmp_path):
+    midnight = time.mktime((2024, 5, 2, 0, 0, 0, 0, 0, -1))
+    logger = LevelLogger(None, str(tmp_path), interval_s=1.0, flush_s=10.0)
+    write_records(logger, midnight + np.arange(-3.0, 3.0))
+    close(logger)
+    assert len(read_log(log_path(str(tmp_path), midnight - 1))) == 3
+    assert len(read_log(log_path(str(tmp_path), midnight))) == 3
+
+
+def test_partial_record_ignored_then_trimmed(tmp_path):
+    logger = LevelLogger(None, str(tmp_path))
+    write_records(logger, NOON + np.arange(5.0))
+    close(logger)
+    path = log_path(str(tmp_path), NOON)
+    with open(path, "ab") as handle:
+        handle.write(b"\x01" * 7)
+    assert len(read_log(path)) == 5
+
+    write_records(logger, NOON + np.arange(5.0, 8.0))
+    close(logger)
+    assert (os.path.getsize(path) - HEADER_SIZE) % record_dtype(31).itemsize == 0
+    np.testing.assert_array_equal(read_log(path)["time"], NOON + np.arange(8.0))
+
+
+def test_short_header_is_rewritten(tmp_path):
+    path = log_path(str(tmp_path), NOON)
+    with open(path, "wb") as handle:
+        handle.write(b"SMLOG")
+    with pytest.raises(ValueError):
+        read_header(path)
+
+    logger = LevelLogger(None, str(tmp_path))
+    write_records(logger, NOON + np.arange(2.0))
+    close(logger)
+    assert read_header(path)["bands"] == 31
+    assert len(read_log(path)) == 2
+
+
+def test_other_band_count_moved_aside(tmp_path):
+    old = LevelLogger(None, str(tmp_path), bands=10)
+    write_records(old, NOON + np.arange(3.0))
+    close(old)
+
+    logger = LevelLogger(None, str(tmp_path))
+    write_records(logger, NOON + np.arange(3.0, 5.0))
+    close(logger)
+    path = log_path(str(tmp_path), NOON)
+    root, ext = os.path.splitext(path)
+    assert read_header(f"{root}.1{ext}")["bands"] == 10
+    assert len(read_log(f"{root}.1{ext}")) == 3
+    assert read_header(path)["bands"] == 31
+    np.testing.assert_array_equal(read_log(path)["time"], NOON + np.arange(3.0, 5.0))
@@ -0,0 +1,169 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.audio import GRAPHIC_EQ_BANDS
+from src.detectors import ImpulseDetector, TonalDetector, impulse_summary, tonal_summary
+
+BANDS = np.asarray(GRAPHIC_EQ_BANDS, dtype=np.float64)
+
+
+def band_index(center):
+    return int(np.argmin(np.abs(BANDS - center)))
+
+
+def levels_with_peak(center, prominence, channels=1):
+    levels = np.full((channels, len(BANDS)), 40.0)
+    levels[:, band_index(center)] += prominence
+    return levels
+
+
+def test_thresholds_follow_frequency_ranges():
+    detector = TonalDetector(BANDS, updates=1)
+    assert detector.thresholds[band_index(100.0)] == 15.0
+    assert detector.thresholds[band_index(250.0)] == 8.0
+    assert detector.thresholds[band_index(1000.0)] == 5.0
+    assert np.isnan(detector.thresholds[0]) and np.isnan(detector.thresholds[-1])
+    assert np.isnan(detector.thresholds[band_index(16000.0)])
+
+
+@pytest.mark.parametrize("center, threshold", [(100.0, 15.0), (250.0, 8.0), (1000.0, 5.0)])
+def test_tone_needs_threshold_over_both_neighbours(center, threshold):
+    detector = TonalDetector(BANDS, updates=1)
+    detector.update(levels_with_peak(center, threshold + 0.1))
+    assert detector.tonal[0, band_index(center)]
+    assert detector.prominence[0, band_index(center)] == pytest.approx(threshold + 0.1)
+    detector.update(levels_with_peak(center, threshold - 0.1))
+    assert not detector.tonal.any()
+
+
+def test_prominence_is_over_the_louder_neighbour():
+    detector = TonalDetector(BANDS, updates=1)
+    levels = levels_with_peak(1000.0, 10.0)
+    levels[0, band_index(1000.0) + 1] += 6.0
+    detector.update(levels)
+    assert detector.prominence[0, band_index(1000.0)] == pytest.approx(4.0)
+    assert not detector.tonal[0, band_index(1000.0)]
+
+
+def test_levels_are_energy_averaged_over_updates():
+    detector = TonalDetector(BANDS, updates=4)
+    quiet = np.full((1, len(BANDS)), 40.0)
+    for _ in range(3):
+        detector.update(quiet)
+    detector.update(levels_with_peak(1000.0, 20.0))
+    expected = 10 * np.log10((3 + 100.0) / 4)
+    assert detector.prominence[0, band_index(1000.0)] == pytest.approx(expected)
+    assert detector.tonal[0, band_index(1000.0)]
+    # Once the tone has left the ring it is no longer reported.
+    for _ in range(4):
+        detector.update(quiet)
+    assert not detector.tonal.any()
+
+
+def test_channels_are_assessed_separately():
+    detector = TonalDetector(BANDS, updates=1, channels=2)
+    levels = np.full((2, len(BANDS)), 40.0)
+    levels[1, band_index(1000.0)] += 10.0
+    detector.update(levels)
+    assert not detector.tonal[0].any()
+    assert detector.tonal[1, band_index(1000.0)]
+
+
+def feed(detector, levels, interval=0.125, start=0.0):
+    for index, db in enumerate(levels):
+        detector.add(db, interval, start + (index + 1) * interval)
+
+
+def test_impulse_prominence_and_penalty():
+    detector = ImpulseDetector(threshold=5.0)
+    feed(detector, [50.0, 50.0, 80.0, 70.0, 50.0])
+    assert detector.count == 1
+    time, level, difference, rate, prominence, penalty = detector.recent()[0]
+    assert level == 80.0
+    assert difference == 30.0
+    assert rate == pytest.approx(240.0)
+    assert prominence == pytest.approx(3 * math.log10(240.0) + 2 * math.log10(30.0))
+    assert penalty == pytest.approx(1.8 * (prominence - 5.0))
+    assert time == pytest.approx(0.375)
+
+
+def test_onset_over_several_intervals():
+    detector = ImpulseDetector(threshold=5.0)
+    feed(detector, [50.0, 60.0, 70.0, 80.0, 75.0])
+    assert detector.count == 1
+    assert detector.recent()[0][3] == pytest.approx(30.0 / 0.375)
+
+
+@pytest.mark.parametrize(
+    "levels",
+    [
+        [50.0, 52.0, 50.0],  # below the minimum level difference
+        [50.0] + list(np.linspace(50.5, 80.0, 60)) + [70.0],  # slower than the minimum onset rate
+        [50.0, 52.0, 54.0, 50.0],  # prominence under the threshold
+        [50.0, 60.0, 70.0],  # still rising
+    ],
+)
+def test_no_impulse(levels):
+    detector = ImpulseDetector(threshold=5.0)
+    feed(detector, levels)
+    assert detector.count == 0
+
+
+def test_recent_keeps_latest_events_oldest_first():
+    detector = ImpulseDetector(threshold=5.0, capacity=3)
+    feed(detector, [50.0, 80.0, 50.0] * 5)
+    assert detector.count == 5
+    times = detector.recent()[:, 0]
+    assert len(times) == 3
+    assert np.all(np.diff(times) > 0)
+    assert times[-1] == pytest.approx(14 * 0.125)
+
+
+def test_summaries():
+    detector = TonalDetector(BANDS, updates=1)
+    detector.update(levels_with_peak(1000.0, 10.0))
+    summary = tonal_summary(BANDS, detector.prominence[0], detector.tonal[0])
+    assert summary["prominence_db"][0] is None
+    assert summary["tonal"][band_index(1000.0)] is True
+
+    impulses = ImpulseDetector()
+    feed(impulses, [50.0, 80.0, 50.0])
+    summary = impulse_summary(impulses.recent(), impulses.count)
+    assert summary["count"] == 1
+    assert summary["recent"][0]["level_db"] == 80.0
+
+
+def test_audio_processor_flags_tone_and_impulses_per_channel():
+    from src.audio import AudioProcessor
+
+    sample_rate, block_size = 48000, 1024
+    audio = AudioProcessor({
+        "sample_rate": sample_rate,
+        "block_size": block_size,
+        "channels": 2,
+        "detectors": True,
+        "tonal_window_s": 0.5,
+    })
+    frames = 4 * sample_rate
+    t = np.arange(frames) / sample_rate
+    rng = np.random.default_rng(4)
+    signal = np.zeros((frames, 2), dtype=np.float32)
+    signal[:, 0] = 0.01 * rng.standard_normal(frames) + 0.3 * np.sin(2 * np.pi * 1000.0 * t)
+    # Quiet noise with three loud bursts on the second channel only.
+    signal[:, 1] = 0.001 * rng.standard_normal(frames)
+    for start in (1.0, 2.0, 3.0):
+        burst = slice(int(start * sample_rate), int((start + 0.05) * sample_rate))
+        signal[burst, 1] = 0.5 * rng.standard_normal(burst.stop - burst.start)
+    for start in range(0, frames - block_size + 1, block_size):
+        audio._on_audio(signal[start:start + block_size], block_size, None, None)
+        if start % (8 * block_size) == 0:
+            audio.compute_spectrum()
+
+    tone = audio.get_detections(0)
+    assert tone["tonal"]["tonal"][band_index(1000.0)]
+    assert tone["impulsive"]["count"] == 0
+    bursts = audio.get_detections(1)
+    assert not any(bursts["tonal"]["tonal"])
+    assert bursts["impulsive"]["count"] == 3
@@ -0,0 +1,69 @@
+import threading
+
+import numpy as np
+
+from src.audio import AudioProcessor
+from src.diagnostics import Diagnostics, LatencyHistogram
+
+
+class Status:
+    # Stands in for sounddevice.CallbackFlags.
+    def __init__(self, overflow=False, underflow=False):
+        self.input_overflow = overflow
+        self.input_underflow = underflow
+
+    def __bool__(self):
+        return self.input_overflow or self.input_underflow
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for us in range(1, 1001):
+        histogram.add(us / 1e6)
+    summary = histogram.summary()
+    assert summary["count"] == 1000
+    assert summary["max_us"] == 1000.0
+    assert 500.0 <= summary["p50_us"] <= 632.0
+    assert summary["p99_us"] == 1000.0
+
+
+def test_snapshots_while_the_writer_runs():
+    diagnostics = Diagnostics()
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            diagnostics.on_callback(None)
+            diagnostics.record("callback", 1e-4)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        last = 0
+        for _ in range(200):
+            timing = diagnostics.snapshot()["timings"]["callback"]
+            assert timing["count"] >= last
+            if timing["count"]:
+                assert timing["p99_us"] <= timing["max_us"]
+            last = timing["count"]
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_xrun_counts_have_one_source(tmp_path):
+    audio = AudioProcessor({
+        "sample_rate": 48000,
+        "block_size": 480,
+        "diagnostics": True,
+        "calibration_file": str(tmp_path / "none.txt"),
+        "cache_dir": str(tmp_path),
+    })
+    block = np.zeros((audio.block_size, 1), dtype=np.float32)
+    audio._on_audio(block, audio.block_size, None, Status(overflow=True))
+    audio._on_audio(block, audio.block_size, None, Status(underflow=True))
+    audio._on_audio(block, audio.block_size, None, None)
+    counters = audio.get_diagnostics()["counters"]
+    assert counters == {"blocks": 3, "input_overflow": 1, "input_underflow": 1, "dropped_blocks": 1}
+    assert (audio.input_overflows, audio.input_underflows, audio.dropped_blocks) == (1, 1, 1)
+    assert list(counters) == list(Diagnostics.COUNTERS)
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from src.dose import PRESETS, DoseEngine, DoseMeter, dose_criteria
+
+
+def meter(preset):
+    return DoseMeter(preset, **PRESETS[preset])
+
+
+def test_criterion_level_for_criterion_time_is_full_dose():
+    osha = meter("osha_pel")
+    osha.add(90.0, 8 * 3600.0)
+    summary = osha.summary()
+    assert summary["dose_pct"] == pytest.approx(100.0)
+    assert summary["twa"] == pytest.approx(90.0)
+
+
+@pytest.mark.parametrize("preset, db, hours", [("osha_hc", 95.0, 4.0), ("niosh", 88.0, 4.0), ("niosh", 100.0, 0.25)])
+def test_exchange_rate_halves_allowed_time(preset, db, hours):
+    dose = meter(preset)
+    dose.add(db, hours * 3600.0)
+    assert dose.summary()["dose_pct"] == pytest.approx(100.0)
+
+
+def test_levels_below_threshold_add_time_only():
+    osha = meter("osha_hc")
+    osha.add(79.9, 3600.0)
+    osha.add(90.0, 3600.0)
+    summary = osha.summary()
+    assert summary["dose_pct"] == pytest.approx(12.5)
+    assert summary["duration_s"] == 7200.0
+    assert summary["lmax"] == 90.0
+    # Projected over the 8 h criterion time at the same rate.
+    assert summary["projected_dose_pct"] == pytest.approx(50.0)
+    assert summary["projected_twa"] == pytest.approx(85.0)
+
+
+def test_empty_meter_summary():
+    summary = meter("niosh").summary()
+    assert summary["dose_pct"] == 0.0
+    assert summary["twa"] is None and summary["projected_dose_pct"] is None
+
+
+def test_dose_criteria_presets_and_custom():
+    criteria = dose_criteria({"dose_presets": ["niosh"], "dose_criteria": [{"name": "eu", "criterion_db": 87.0}]})
+    assert [criterion["name"] for criterion in criteria] == ["niosh", "eu"]
+    with pytest.raises(ValueError):
+        dose_criteria({"dose_presets": ["nope"]})
+
+
+def test_shift_restarts_after_shift_length():
+    engine = DoseEngine(dose_criteria({"dose_presets": ["niosh"]}), shift_hours=1.0)
+    engine.add(85.0, 1800.0, now=1000.0)
+    engine.add(85.0, 1800.0, now=2000.0)
+    assert engine.summary()["niosh"]["duration_s"] == 3600.0
+    engine.add(85.0, 60.0, now=1000.0 + 3600.0)
+    summary = engine.summary()["niosh"]
+    assert summary["duration_s"] == 60.0
+    assert summary["start_time"] == 4600.0
+
+
+def test_checkpoint_restores_running_shift(tmp_path):
+    path = str(tmp_path / "dose.json")
+    criteria = dose_criteria({"dose_presets": ["osha_hc", "niosh"]})
+    engine = DoseEngine(criteria, checkpoint_path=path)
+    engine.add(92.0, 3600.0, now=1000.0)
+    engine.save_checkpoint()
+    before = engine.summary()
+
+    restored = DoseEngine(criteria, checkpoint_path=path)
+    restored.load_checkpoint(now=1000.0 + 4 * 3600.0)
+    assert restored.restored
+    assert restored.summary() == before
+
+
+def test_checkpoint_skips_changed_settings_and_finished_shifts(tmp_path):
+    path = str(tmp_path / "dose.json")
+    engine = DoseEngine(dose_criteria({"dose_presets": ["osha_hc", "niosh"]}), checkpoint_path=path)
+    engine.add(92.0, 3600.0, now=1000.0)
+    engine.save_checkpoint()
+
+    changed = DoseEngine(
+        [dict(PRESETS["osha_hc"], name="osha_hc", exchange_db=3.0)], checkpoint_path=path
+    )
+    changed.load_checkpoint(now=2000.0)
+    assert not changed.restored
+    assert changed.summary()["osha_hc"]["dose_pct"] == 0.0
+
+    late = DoseEngine(dose_criteria({"dose_presets": ["niosh"]}), checkpoint_path=path)
+    late.load_checkpoint(now=1000.0 + 8 * 3600.0)
+    assert not late.restored
+
+
+def test_checkpoint_ignores_bad_files(tmp_path):
+    path = tmp_path / "dose.json"
+    engine = DoseEngine(dose_criteria({"dose_presets": ["niosh"]}), checkpoint_path=str(path))
+    engine.load_checkpoint()
+    path.write_text("{not json")
+    engine.load_checkpoint()
+    path.write_text(json.dumps({"version": 0, "meters": {}}))
+    engine.load_checkpoint()
+    assert not engine.restored
@@ -0,0 +1,82 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.engine import EngineProxy, SharedSlots, history_dtype, shared_size, shared_slots, snapshot_dtype
+
+DTYPE = np.dtype([("value", "<f8"), ("copy", "<f8", (64,))])
+
+
+def test_read_returns_latest_write():
+    slots = SharedSlots(DTYPE, bytearray(SharedSlots.size(DTYPE)))
+    record = np.zeros((), dtype=DTYPE)
+    out = np.zeros((), dtype=DTYPE)
+    for value in range(3):
+        record["value"] = value
+        record["copy"] = value
+        slots.write(record)
+        assert slots.read(out)
+        assert out["value"] == value
+
+
+def test_torn_copy_is_never_returned():
+    buffer = bytearray(SharedSlots.size(DTYPE))
+    slots = SharedSlots(DTYPE, buffer)
+    record = np.zeros((), dtype=DTYPE)
+    record["value"] = 7.0
+    slots.write(record)
+    # Corrupt the copy the index points at, as a concurrent write would.
+    active = int(np.frombuffer(buffer, dtype="<u8", count=1)[0])
+    buffer[8 + active * (8 + DTYPE.itemsize) + 16] ^= 0xFF
+    out = np.zeros((), dtype=DTYPE)
+    out["value"] = -1.0
+    assert not slots.read(out)
+    assert out["value"] == -1.0
+
+
+def test_concurrent_reads_are_consistent():
+    slots = SharedSlots(DTYPE, bytearray(SharedSlots.size(DTYPE)))
+    stop = threading.Event()
+
+    def writer():
+        record = np.zeros((), dtype=DTYPE)
+        value = 0.0
+        while not stop.is_set():
+            value += 1.0
+            record["value"] = value
+            record["copy"] = value
+            slots.write(record)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    out = np.zeros((), dtype=DTYPE)
+    try:
+        for _ in range(2000):
+            if slots.read(out):
+                assert np.all(out["copy"] == out["value"])
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_shared_layout_fits_both_records():
+    config = {"channels": 2, "dose_presets": ["niosh"]}
+    buffer = bytearray(shared_size(config))
+    snapshot_slots, history_slots = shared_slots(config, buffer)
+    snapshot = np.zeros((), dtype=snapshot_dtype(2, 1))
+    snapshot["levels"] = 1.0
+    history = np.zeros((), dtype=history_dtype())
+    history["count"] = 5
+    snapshot_slots.write(snapshot)
+    history_slots.write(history)
+    snapshot_out = np.zeros((), dtype=snapshot_dtype(2, 1))
+    history_out = np.zeros((), dtype=history_dtype())
+    assert snapshot_slots.read(snapshot_out) and history_slots.read(history_out)
+    assert np.all(snapshot_out["levels"] == 1.0)
+    assert history_out["count"] == 5
+
+
+def test_proxy_refuses_spectrogram():
+    with pytest.raises(ValueError, match="spectrogram"):
+        EngineProxy({"sample_rate": 48000, "block_size": 1024, "spectrogram": True})
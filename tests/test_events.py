@@ -0,0 +1,116 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.audio import GRAPHIC_EQ_BANDS, AudioProcessor
+from src.events import EventCapture
+
+SAMPLE_RATE = 1000
+BLOCK = 100
+
+
+def capture(tmp_path, **options):
+    settings = dict(threshold_db=80.0, hysteresis_db=3.0, pre_s=0.5, post_s=0.3, max_s=10.0, slots=4)
+    settings.update(options)
+    return EventCapture(SAMPLE_RATE, 1, str(tmp_path / "events"), **settings)
+
+
+def run(events, levels, first=0):
+    # One short-term level per block, reported before the block is
+    # processed as AudioProcessor does; each block holds its own index.
+    for index, db in enumerate(levels, first):
+        events.on_level(db, BLOCK / float(SAMPLE_RATE), now=index * 0.1)
+        events.process(np.full((1, BLOCK), index, dtype=np.float32))
+
+
+def clips(events):
+    found = []
+    while not events._pending.empty():
+        clip, length, event = events._pending.get_nowait()
+        found.append((clip[0, :length:BLOCK].astype(int).tolist(), event))
+    return found
+
+
+def test_clip_spans_pre_and_post_windows(tmp_path):
+    events = capture(tmp_path)
+    run(events, [60.0] * 10 + [85.0] * 3 + [60.0] * 10)
+    (blocks, event), = clips(events)
+    # Five blocks of pre-trigger audio, the loud blocks, then three blocks
+    # (post_s) from the first one below the release level.
+    assert blocks == list(range(5, 16))
+    assert event["pre_trigger_s"] == pytest.approx(0.5)
+    assert event["start_time"] == pytest.approx(1.0)
+    assert event["peak_dba"] == 85.0
+
+
+def test_hysteresis_keeps_one_event(tmp_path):
+    events = capture(tmp_path)
+    # 78 dB is under the threshold but above the release level (77 dB),
+    # and a dip below it that recovers within post_s does not end the event.
+    run(events, [60.0] * 10 + [85.0, 78.0, 79.0, 70.0, 82.0, 85.0] + [60.0] * 10)
+    (blocks, _), = clips(events)
+    assert blocks == list(range(5, 19))
+
+
+def test_max_length_ends_the_clip(tmp_path):
+    events = capture(tmp_path, max_s=0.4)
+    run(events, [60.0] * 10 + [90.0] * 10 + [60.0] * 10)
+    found = clips(events)
+    # Pre-trigger plus max_s, then a new event while it stays loud.
+    assert found[0][0] == list(range(5, 14))
+    assert found[1][0][:5] == list(range(9, 14))
+    assert found[1][0][5] == 14
+
+
+def test_busy_slots_drop_events(tmp_path):
+    events = capture(tmp_path, slots=1)
+    # No writer is running, so the only slot is never returned.
+    run(events, [60.0] * 10 + [85.0] * 2 + [60.0] * 5 + [85.0] * 2 + [60.0] * 5)
+    assert len(clips(events)) == 1
+    assert events.dropped == 1
+
+
+def test_written_clip_and_sidecar(tmp_path):
+    events = capture(tmp_path)
+    events.start()
+    run(events, [60.0] * 10 + [85.0] * 3 + [60.0] * 10)
+    events.stop()
+    assert events.written == 1
+    sidecar, = (tmp_path / "events").glob("*.json")
+    metadata = json.loads(sidecar.read_text())
+    assert metadata["duration_s"] == pytest.approx(1.1)
+    # Three loud levels and the three quiet ones of the post window.
+    assert metadata["leq_dba"] == pytest.approx(10 * np.log10((3 * 10 ** 8.5 + 3 * 10 ** 6) / 6))
+
+
+@pytest.fixture
+def audio(tmp_path):
+    return AudioProcessor({
+        "sample_rate": 48000,
+        "block_size": 1024,
+        "calibration_file": str(tmp_path / "none.txt"),
+        "cache_dir": str(tmp_path),
+    })
+
+
+def tone(seconds, level_dbfs=-20.0):
+    t = np.arange(int(seconds * 48000)) / 48000.0
+    return (np.sqrt(2.0) * 10 ** (level_dbfs / 20.0) * np.sin(2 * np.pi * 1000.0 * t))[None, :]
+
+
+@pytest.mark.parametrize("seconds", [0.4, 1.0, 2.7])
+def test_clip_bands_cover_the_whole_clip(audio, seconds):
+    levels = audio._clip_band_levels(tone(seconds))[0]
+    band = GRAPHIC_EQ_BANDS.index(1000)
+    assert levels[band] == pytest.approx(-20.0, abs=0.2)
+    assert np.argmax(levels) == band
+
+
+def test_clip_bands_include_the_last_partial_second(audio):
+    # Silence, then a tone only in the final half second, which a
+    # whole-seconds-only average would leave out.
+    clip = np.concatenate([np.zeros((1, 2 * 48000)), tone(0.5)], axis=1)
+    levels = audio._clip_band_levels(clip)[0]
+    assert np.argmax(levels) == GRAPHIC_EQ_BANDS.index(1000)
+    assert levels[GRAPHIC_EQ_BANDS.index(1000)] > -40.0
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from src.audio import GRAPHIC_EQ_BANDS, AudioProcessor
+
+SAMPLE_RATE = 48000
+BLOCK = 1000
+
+
+def pink_noise(seconds, seed=0):
+    frames = SAMPLE_RATE * seconds
+    spectrum = np.fft.rfft(np.random.default_rng(seed).standard_normal(frames))
+    freqs = np.fft.rfftfreq(frames)
+    spectrum[1:] /= np.sqrt(freqs[1:])
+    spectrum[0] = 0.0
+    noise = np.fft.irfft(spectrum, frames)
+    return (0.1 * noise / noise.std()).astype(np.float32)
+
+
+def mean_spectrum(engine, signal, tmp_path):
+    # Band levels of each whole second after the first, averaged; both
+    # engines then measure exactly the same samples.
+    audio = AudioProcessor({
+        "sample_rate": SAMPLE_RATE,
+        "block_size": BLOCK,
+        "spectrum_engine": engine,
+        "spectrum_smooth": 0.0,
+        "calibration_file": str(tmp_path / "none.txt"),
+        "cache_dir": str(tmp_path),
+    })
+    readings = []
+    for start in range(0, len(signal) + 1, BLOCK):
+        if start and start % SAMPLE_RATE == 0:
+            audio.compute_spectrum()
+            if start > SAMPLE_RATE:
+                readings.append(audio.get_spectrum())
+        if start < len(signal):
+            audio._on_audio(signal[start:start + BLOCK, None], BLOCK, None, None)
+    return np.mean(readings, axis=0)
+
+
+def test_engines_agree_on_a_sine(tmp_path):
+    t = np.arange(3 * SAMPLE_RATE) / SAMPLE_RATE
+    sine = (0.1 * np.sqrt(2) * np.sin(2 * np.pi * 1000.0 * t)).astype(np.float32)
+    band = GRAPHIC_EQ_BANDS.index(1000)
+    fft = mean_spectrum("fft", sine, tmp_path)
+    filterbank = mean_spectrum("filterbank", sine, tmp_path)
+    assert fft[band] == pytest.approx(-20.0, abs=0.05)
+    assert filterbank[band] == pytest.approx(-20.0, abs=0.2)
+
+
+def test_engines_agree_on_pink_noise(tmp_path):
+    pink = pink_noise(11)
+    difference = mean_spectrum("fft", pink, tmp_path) - mean_spectrum("filterbank", pink, tmp_path)
+    assert np.max(np.abs(difference)) < 1.5
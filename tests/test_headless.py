@@ -0,0 +1,106 @@
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from src.audio import REF_PASCAL
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEVEL_DBFS = -20.0
+# With no calibration full scale is 1 Pa RMS, so the tone reads this far
+# above the 20 uPa reference; A-weighting is 0 dB at 1 kHz. The spectrum
+# stays in dBFS.
+EXPECTED_DBA = LEVEL_DBFS - 20 * np.log10(REF_PASCAL)
+
+
+class UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost", timeout=5.0)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(5.0)
+        self.sock.connect(self.path)
+
+
+def get(path, url):
+    connection = UnixConnection(path)
+    try:
+        connection.request("GET", url)
+        response = connection.getresponse()
+        assert response.status == 200
+        return response.read().decode("utf-8")
+    finally:
+        connection.close()
+
+
+def metric(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[-1])
+    return None
+
+
+@pytest.fixture
+def headless(tmp_path):
+    socket_path = str(tmp_path / "metrics.sock")
+    config = {
+        "sample_rate": 48000,
+        "block_size": 480,
+        "source": "synthetic",
+        "synthetic": {"frequency": 1000.0, "level_dbfs": LEVEL_DBFS, "noise_dbfs": -90.0},
+        "calibration_file": str(tmp_path / "none.txt"),
+        "cache_dir": str(tmp_path / "cache"),
+        "metrics_socket": socket_path,
+        "spectrum_smooth": 0.0,
+        "update_interval_ms": 100,
+    }
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.main", "--headless", "--config", str(config_path)],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    try:
+        yield process, socket_path
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def test_synthetic_tone_is_reported(headless):
+    process, socket_path = headless
+    # The spectrum needs a full second of audio before it settles.
+    band = None
+    deadline = time.time() + 20.0
+    while time.time() < deadline:
+        assert process.poll() is None, process.stdout.read().decode("utf-8", "replace")
+        if os.path.exists(socket_path):
+            snapshot = json.loads(get(socket_path, "/snapshot.json"))
+            band = snapshot["spectrum"]["bands"].index(1000)
+            if abs(snapshot["spectrum"]["levels"][band] - LEVEL_DBFS) < 0.5:
+                break
+        time.sleep(0.1)
+    assert band is not None
+
+    assert snapshot["dba"] == pytest.approx(EXPECTED_DBA, abs=0.2)
+    assert snapshot["first_reading_s"] is not None
+    levels = snapshot["spectrum"]["levels"]
+    assert levels[band] == pytest.approx(LEVEL_DBFS, abs=0.5)
+    assert max(levels) == levels[band]
+
+    metrics = get(socket_path, "/metrics")
+    assert metric(metrics, "soundmonitor_dba") == pytest.approx(EXPECTED_DBA, abs=0.2)
+    assert metric(metrics, 'soundmonitor_band_db{band="1000"}') == pytest.approx(LEVEL_DBFS, abs=0.5)
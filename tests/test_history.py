@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from src.history import HistoryTier, LevelHistory, with_gaps
+
+
+def test_buckets_roll_up_energy_max_and_min():
+    tier = HistoryTier(1.0, 10)
+    for now, db in ((0.0, 60.0), (0.5, 70.0), (1.0, 50.0), (1.5, 50.0)):
+        tier.add(db, 0.5, now)
+    times, levels = tier.latest(10)
+    np.testing.assert_array_equal(times, [0.0, 1.0])
+    assert levels[0, 0] == pytest.approx(10 * np.log10((1e6 + 1e7) / 2), abs=1e-4)
+    np.testing.assert_array_equal(levels[0, 1:], [70.0, 60.0])
+    # The bucket still filling is included.
+    np.testing.assert_allclose(levels[1], [50.0, 50.0, 50.0])
+
+
+def test_ring_keeps_latest_buckets_contiguous():
+    tier = HistoryTier(1.0, 4)
+    for second in range(11):
+        tier.add(float(second), 1.0, second + 0.5)
+    times, levels = tier.latest(100)
+    np.testing.assert_array_equal(times, [6.0, 7.0, 8.0, 9.0, 10.0])
+    np.testing.assert_allclose(levels[:, 0], [6.0, 7.0, 8.0, 9.0, 10.0], atol=1e-5)
+    times, _ = tier.latest(2)
+    np.testing.assert_array_equal(times, [8.0, 9.0, 10.0])
+
+
+def test_coarser_tiers_agree_with_finer_ones():
+    history = LevelHistory(((0.1, 6000), (1.0, 600), (60.0, 10)))
+    rng = np.random.default_rng(3)
+    levels = rng.uniform(40.0, 90.0, 1200)
+    for index, db in enumerate(levels):
+        history.add(db, 0.1, (index + 0.5) * 0.1)
+    fine, seconds, minutes = history.tiers
+    _, fine_levels = fine.latest(6000)
+    _, second_levels = seconds.latest(600)
+    _, minute_levels = minutes.latest(10)
+    energy = 10 ** (fine_levels[:, 0].astype(np.float64) / 10.0)
+    np.testing.assert_allclose(second_levels[:, 0], 10 * np.log10(energy.reshape(-1, 10).mean(axis=1)), atol=1e-3)
+    np.testing.assert_allclose(second_levels[:, 1], fine_levels[:, 1].reshape(-1, 10).max(axis=1), atol=1e-4)
+    np.testing.assert_allclose(minute_levels[:, 2], levels.reshape(-1, 600).min(axis=1), atol=1e-4)
+
+
+def test_tier_for_picks_finest_covering_tier():
+    history = LevelHistory()
+    assert history.tier_for(60.0).period_s == 0.1
+    assert history.tier_for(3600.0).period_s == 1.0
+    assert history.tier_for(86400.0).period_s == 60.0
+    assert history.tier_for(7 * 86400.0).period_s == 900.0
+    assert history.tier_for(365 * 86400.0).period_s == 900.0
+
+
+def test_select_returns_columns():
+    history = LevelHistory()
+    for index in range(50):
+        history.add(60.0, 0.1, (index + 0.5) * 0.1)
+    selection = history.select(2.0)
+    assert selection["period_s"] == 0.1
+    # 21 finished buckets and the one still filling.
+    assert len(selection["time"]) == len(selection["leq"]) == 22
+
+
+def test_with_gaps_breaks_curves_where_nothing_was_measured():
+    selection = {
+        "period_s": 1.0,
+        "time": np.array([0.0, 1.0, 5.0, 6.0, 9.0]),
+        "leq": np.array([1.0, 2.0, 3.0, 4.0, 5.0]),
+        "max": np.array([1.0, 2.0, 3.0, 4.0, 5.0]),
+        "min": np.array([1.0, 2.0, 3.0, 4.0, 5.0]),
+    }
+    marked = with_gaps(selection)
+    np.testing.assert_array_equal(marked["time"], [0.0, 1.0, 2.0, 5.0, 6.0, 7.0, 9.0])
+    for name in ("leq", "max", "min"):
+        np.testing.assert_array_equal(marked[name], [1.0, 2.0, np.nan, 3.0, 4.0, np.nan, 5.0])
+
+
+def test_with_gaps_leaves_continuous_selection_alone():
+    selection = {"period_s": 1.0, "time": np.arange(5.0), "leq": np.ones(5), "max": np.ones(5), "min": np.ones(5)}
+    assert with_gaps(selection) is selection
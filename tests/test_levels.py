@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from src.audio import REF_PASCAL, AudioProcessor, c_weighting_sos
+from src.levels import FAST_S, IMPULSE_DECAY_S, IMPULSE_RISE_S, SLOW_S, LevelEngine
+
+SAMPLE_RATE = 48000
+BLOCK = 480
+
+
+def feed(engine, signal, a_weighted=None):
+    signal = np.asarray(signal, dtype=np.float64)[None, :]
+    a_weighted = signal if a_weighted is None else np.asarray(a_weighted, dtype=np.float64)[None, :]
+    for start in range(0, signal.shape[1], BLOCK):
+        engine.process(signal[:, start:start + BLOCK], a_weighted[:, start:start + BLOCK])
+        engine.accumulate()
+
+
+def db(value):
+    return 10 * np.log10(value)
+
+
+@pytest.fixture
+def engine():
+    return LevelEngine(SAMPLE_RATE, c_weighting_sos(SAMPLE_RATE))
+
+
+@pytest.mark.parametrize("name, tau", [("F", FAST_S), ("S", SLOW_S)])
+def test_exponential_time_constants(engine, name, tau):
+    # A unit step of mean square reaches 1 - 1/e after one time constant,
+    # and falls to 1/e one time constant after it ends.
+    frames = int(tau * SAMPLE_RATE)
+    feed(engine, np.ones(frames))
+    levels = engine.snapshot()
+    assert db(levels[f"LZ{name}"]) == pytest.approx(db(1 - np.exp(-1)), abs=0.01)
+    assert db(levels[f"LA{name}"]) == pytest.approx(db(1 - np.exp(-1)), abs=0.01)
+
+    feed(engine, np.ones(10 * frames))
+    feed(engine, np.zeros(frames))
+    levels = engine.snapshot()
+    assert db(levels[f"LZ{name}"]) == pytest.approx(db(np.exp(-1)), abs=0.01)
+    assert db(levels[f"LZ{name}max"]) == pytest.approx(0.0, abs=0.01)
+
+
+def test_impulse_rises_fast_and_decays_slowly(engine):
+    rise = int(IMPULSE_RISE_S * SAMPLE_RATE)
+    feed(engine, np.ones(rise))
+    assert db(engine.snapshot()["LZI"]) == pytest.approx(db(1 - np.exp(-1)), abs=0.01)
+
+    # After the step the held value decays with the 1.5 s constant, not
+    # the 35 ms one it rose with.
+    feed(engine, np.ones(20 * rise))
+    decay = int(0.3 * SAMPLE_RATE)
+    feed(engine, np.zeros(decay))
+    levels = engine.snapshot()
+    assert db(levels["LZI"]) == pytest.approx(-0.3 / IMPULSE_DECAY_S * 10 * np.log10(np.e), abs=0.02)
+    assert db(levels["LZImax"]) == pytest.approx(0.0, abs=0.01)
+    assert db(levels["LZF"]) < -10.0
+
+
+def tone_burst(amplitude, on_s, total_s, ramp_s=0.0, frequency=1000.0):
+    t = np.arange(int(total_s * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = (t < on_s).astype(np.float64)
+    if ramp_s:
+        # Raised-cosine edges keep the C-weighting's 20 Hz high-pass from
+        # ringing; a tone switched on abruptly peaks 0.3 dB high.
+        edge = np.clip(np.minimum(t, on_s - t) / ramp_s, 0.0, 1.0)
+        envelope = 0.5 - 0.5 * np.cos(np.pi * edge)
+    return amplitude * envelope * np.sin(2 * np.pi * frequency * t)
+
+
+def test_tone_burst_leq_and_fast_max(engine):
+    # 100 ms of a 1 kHz tone in one second: LZeq is its mean square times
+    # the duty cycle, and the burst is short of the Fast detector's steady
+    # reading by 10 log10(1 - exp(-0.1 / 0.125)).
+    amplitude = 0.5
+    feed(engine, tone_burst(amplitude, 0.1, 1.0))
+    levels = engine.snapshot()
+    assert db(levels["LZpeak"]) == pytest.approx(20 * np.log10(amplitude), abs=0.01)
+    assert db(levels["LZeq"]) == pytest.approx(db(amplitude ** 2 / 2 * 0.1), abs=0.01)
+    assert db(levels["LZFmax"]) == pytest.approx(
+        db(amplitude ** 2 / 2 * (1 - np.exp(-0.1 / FAST_S))), abs=0.1
+    )
+
+
+def test_tone_burst_c_peak(engine):
+    # C-weighting is 0 dB at 1 kHz, so LCpeak is the tone's amplitude.
+    amplitude = 0.5
+    burst = tone_burst(amplitude, 0.2, 1.0, ramp_s=0.01)
+    feed(engine, burst)
+    levels = engine.snapshot()
+    assert db(levels["LCpeak"]) == pytest.approx(20 * np.log10(amplitude), abs=0.01)
+    assert db(levels["LCeq"]) == pytest.approx(db(np.mean(burst ** 2)), abs=0.01)
+
+
+def test_levels_through_the_processor(tmp_path):
+    audio = AudioProcessor({
+        "sample_rate": SAMPLE_RATE,
+        "block_size": BLOCK,
+        "level_engine": True,
+        "calibration_file": str(tmp_path / "none.txt"),
+        "cache_dir": str(tmp_path),
+    })
+    # The C-weighting design is cached like the A-weighting.
+    assert len(list(tmp_path.glob("c-weighting-*.npz"))) == 1
+    amplitude = 0.1
+    burst = tone_burst(amplitude, 0.5, 1.0, ramp_s=0.01).astype(np.float32)
+    for start in range(0, len(burst), BLOCK):
+        audio.process_block(burst[None, start:start + BLOCK])
+    levels = audio.get_levels()
+    # Uncalibrated, full scale is 1 Pa RMS.
+    offset = -20 * np.log10(REF_PASCAL)
+    assert levels["LCpeak"] == pytest.approx(20 * np.log10(amplitude) + offset, abs=0.1)
+    assert levels["LZeq"] == pytest.approx(db(np.mean(burst.astype(np.float64) ** 2)) + offset, abs=0.01)
+    assert levels["LAeq"] == pytest.approx(levels["LZeq"], abs=0.05)
+    assert levels["LASmax"] < levels["LAFmax"] < levels["LAImax"]
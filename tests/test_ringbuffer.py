@@ -0,0 +1,76 @@
+import threading
+
+import numpy as np
+
+from src.audio import AudioProcessor
+from src.ringbuffer import SpscRing
+
+
+def test_wraparound_keeps_frame_order():
+    ring = SpscRing(10, (2,))
+    out = np.zeros((10, 2), dtype=np.float32)
+    frames = np.arange(40, dtype=np.float32).reshape(20, 2)
+    assert ring.write(frames[:7])
+    assert ring.read_into(out[:5]) == 5
+    # Starts at index 7 and wraps past the end of the buffer.
+    assert ring.write(frames[7:15])
+    assert ring.available() == 10
+    assert ring.read_into(out) == 10
+    np.testing.assert_array_equal(out, frames[5:15])
+    assert ring.read_into(out) == 0
+
+
+def test_full_ring_drops_the_whole_write():
+    ring = SpscRing(8)
+    assert ring.write(np.ones(6, dtype=np.float32))
+    assert not ring.write(np.full(3, 2.0, dtype=np.float32))
+    assert ring.dropped_frames == 3
+    assert ring.available() == 6
+    out = np.zeros(8, dtype=np.float32)
+    assert ring.read_into(out) == 6
+    np.testing.assert_array_equal(out[:6], 1.0)
+
+
+def test_full_ring_counts_a_dropped_block(tmp_path):
+    audio = AudioProcessor({
+        "sample_rate": 48000,
+        "block_size": 480,
+        "processing": "worker",
+        "worker_buffer_s": 0.01,
+        "calibration_file": str(tmp_path / "none.txt"),
+        "cache_dir": str(tmp_path),
+    })
+    # The worker is not running, so nothing drains the ring (4 blocks).
+    block = np.zeros((480, 1), dtype=np.float32)
+    for _ in range(6):
+        audio._on_audio(block, 480, None, None)
+    assert audio.dropped_blocks == 2
+    assert audio._capture.dropped_frames == 960
+
+
+def test_order_across_threads():
+    ring = SpscRing(1000)
+    total = 50000
+    received = np.zeros(total, dtype=np.float32)
+
+    def produce():
+        sent = 0
+        while sent < total:
+            count = min(37, total - sent)
+            if ring.write(np.arange(sent, sent + count, dtype=np.float32)):
+                sent += count
+
+    def consume():
+        done = 0
+        out = np.zeros(64, dtype=np.float32)
+        while done < total:
+            count = ring.read_into(out)
+            received[done:done + count] = out[:count]
+            done += count
+
+    threads = [threading.Thread(target=produce), threading.Thread(target=consume)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    np.testing.assert_array_equal(received, np.arange(total, dtype=np.float32))
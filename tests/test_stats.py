@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.stats import LevelHistogram, LevelStatistics
+
+
+def test_percentiles_of_uniform_levels():
+    histogram = LevelHistogram()
+    for db in np.arange(40.0, 80.0, 0.01):
+        histogram.add(db, 0.125)
+    # Ln is exceeded n percent of the time.
+    assert histogram.percentile(10) == pytest.approx(76.0, abs=0.1)
+    assert histogram.percentile(50) == pytest.approx(60.0, abs=0.1)
+    assert histogram.percentile(90) == pytest.approx(44.0, abs=0.1)
+    assert histogram.max_db == pytest.approx(79.99)
+    assert histogram.min_db == pytest.approx(40.0)
+
+
+def test_percentiles_weighted_by_duration():
+    histogram = LevelHistogram()
+    histogram.add(50.0, 9.0)
+    histogram.add(90.0, 1.0)
+    assert histogram.percentile(5) == pytest.approx(90.05)
+    assert histogram.percentile(50) == pytest.approx(50.05)
+    assert histogram.percentile(90) == pytest.approx(50.05)
+
+
+def test_leq_is_energy_mean():
+    histogram = LevelHistogram()
+    histogram.add(60.0, 1.0)
+    histogram.add(70.0, 1.0)
+    assert histogram.leq() == pytest.approx(10 * np.log10((1e6 + 1e7) / 2))
+
+
+def test_levels_outside_range_are_clamped():
+    histogram = LevelHistogram(low_db=0.0, high_db=160.0)
+    histogram.add(-20.0, 1.0)
+    histogram.add(200.0, 1.0)
+    assert histogram.percentile(1) == pytest.approx(159.95)
+    assert histogram.percentile(99) == pytest.approx(0.05)
+
+
+def test_empty_summary():
+    summary = LevelHistogram().summary()
+    assert summary["leq"] is None
+    assert summary["l10"] is None and summary["l50"] is None and summary["l90"] is None
+
+
+def test_hour_resets_on_the_hour_and_shift_after_its_length():
+    statistics = LevelStatistics(shift_hours=1.0)
+    local = time.localtime(time.time())
+    hour_start = time.mktime((local.tm_year, local.tm_mon, local.tm_mday, local.tm_hour, 0, 0, 0, 0, -1))
+    start = hour_start + 1800.0
+    statistics.add(60.0, 1.0, start)
+    statistics.add(60.0, 1.0, start + 1799.0)
+    statistics.add(70.0, 1.0, start + 1801.0)
+    summary = statistics.summary()
+    assert summary["hour"]["duration_s"] == 1.0
+    assert summary["hour"]["start_time"] == pytest.approx(hour_start + 3600.0)
+    assert summary["shift"]["duration_s"] == 3.0
+    assert summary["total"]["duration_s"] == 3.0
+
+    statistics.add(70.0, 1.0, start + 3600.0)
+    summary = statistics.summary()
+    assert summary["shift"]["duration_s"] == 1.0
+    assert summary["total"]["duration_s"] == 4.0
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from src.stft import IncrementalStft
+
+
+def test_full_scale_sine_reads_rms():
+    stft = IncrementalStft(48000, fft_size=2048)
+    bin_hz = 48000 / 2048
+    t = np.arange(8192) / 48000
+    rows = stft.process(np.sin(2 * np.pi * 40 * bin_hz * t)[None, :].astype(np.float32))
+    assert rows[0, :, 40].max() == pytest.approx(-3.01, abs=0.02)
+
+
+def test_blocks_of_any_size_match_one_pass():
+    rng = np.random.default_rng(5)
+    samples = rng.standard_normal((2, 20000)).astype(np.float32)
+    whole = IncrementalStft(48000, fft_size=1024, overlap=0.75, channels=2).process(samples)
+
+    stft = IncrementalStft(48000, fft_size=1024, overlap=0.75, channels=2)
+    parts = []
+    start = 0
+    for size in [100, 3000, 1, 5000, 256, 4096] * 4:
+        block = samples[:, start:start + size]
+        start += block.shape[1]
+        if not block.shape[1]:
+            break
+        rows = stft.process(block)
+        if rows is not None:
+            parts.append(rows)
+    incremental = np.concatenate(parts, axis=1)
+    assert incremental.shape == whole.shape == (2, (20000 - 1024) // 256 + 1, 513)
+    np.testing.assert_allclose(incremental, whole, atol=1e-3)
+
+
+def test_history_keeps_latest_rows():
+    stft = IncrementalStft(48000, fft_size=256, overlap=0.5, history_s=10 * 128 / 48000)
+    assert stft.rows == 10
+    for value in range(25):
+        stft.append(np.full((1, 1, stft.bins), value, dtype=np.float32))
+    np.testing.assert_array_equal(stft.rows_since(0, 20)[:, 0], [20, 21, 22, 23, 24])
+    np.testing.assert_array_equal(stft.rows_since(0, 0)[:, 0], np.arange(15, 25))
+    assert len(stft.rows_since(0, 25)) == 0
+    stft.append(np.arange(12, dtype=np.float32)[None, :, None].repeat(stft.bins, axis=2))
+    np.testing.assert_array_equal(stft.rows_since(0, 30)[:, 0], np.arange(5, 12))
+    assert stft.count == 37
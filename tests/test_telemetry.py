@@ -0,0 +1,165 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.collector import FleetStore, TcpReceiver, UdpReceiver
+from src.telemetry import (
+    FRAME,
+    MAX_FRAME,
+    MISSING,
+    TelemetrySender,
+    decode_packet,
+    encode_packet,
+    from_centi_db,
+    parse_address,
+    record_dtype,
+    to_centi_db,
+)
+
+
+def make_records(count, bands=31, start=1000.0):
+    records = np.zeros(count, dtype=record_dtype(bands))
+    records["time"] = start + np.arange(count)
+    records["leq"] = to_centi_db(60.0 + np.arange(count))
+    records["lmax"] = to_centi_db(np.nan)
+    records["bands"] = to_centi_db(np.linspace(20.0, 80.0, bands))
+    records["dropped_blocks"] = np.arange(count)
+    records["input_overflows"] = 2 * np.arange(count)
+    records["input_underflows"] = 3 * np.arange(count)
+    return records
+
+
+def test_centi_db_round_trip():
+    values = np.array([-40.0, 0.0, 63.456, 140.0, np.nan])
+    encoded = to_centi_db(values)
+    assert encoded[-1] == MISSING
+    np.testing.assert_allclose(from_centi_db(encoded)[:-1], [-40.0, 0.0, 63.46, 140.0])
+    assert np.isnan(from_centi_db(encoded)[-1])
+
+
+def test_packet_round_trip():
+    records = make_records(10)
+    unit, decoded = decode_packet(encode_packet("meter-01", records))
+    assert unit == "meter-01"
+    np.testing.assert_array_equal(decoded, records)
+
+
+def test_long_unit_names_are_cut():
+    unit, _ = decode_packet(encode_packet("x" * 40, make_records(1)))
+    assert unit == "x" * 32
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"SMT1",
+        b"XXXX" + encode_packet("a", make_records(2))[4:],
+        encode_packet("a", make_records(2))[:-1],
+        encode_packet("a", make_records(2)) + b"\0",
+    ],
+)
+def test_malformed_packets_are_rejected(data):
+    with pytest.raises(ValueError):
+        decode_packet(data)
+
+
+def test_largest_packet_fits_a_frame():
+    assert len(encode_packet("a", make_records(64, bands=255))) == MAX_FRAME
+
+
+@pytest.mark.parametrize(
+    "text, address",
+    [
+        ("collector:9000", ("collector", 9000)),
+        ("collector", ("collector", 9750)),
+        ("10.0.0.2:9001", ("10.0.0.2", 9001)),
+        ("[::1]:9002", ("::1", 9002)),
+        ("[fe80::1]", ("fe80::1", 9750)),
+        ("::1", ("::1", 9750)),
+        (":9000", ("", 9000)),
+        ("collector:", ("collector", 9750)),
+    ],
+)
+def test_parse_address(text, address):
+    assert parse_address(text, 9750) == address
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_udp_to_collector():
+    store = FleetStore(capacity=100)
+    receiver = UdpReceiver(store, ("127.0.0.1", 0))
+    receiver.start()
+    sender = TelemetrySender(receiver.address, "udp")
+    try:
+        sender.send(encode_packet("a", make_records(5, start=time.time() - 10)))
+        sender.send(b"garbage")
+        assert wait_for(lambda: store.stats()["rejected"] == 1 and store.count == 5)
+        summary = store.summary(60.0)
+        assert summary["meters"][0]["unit"] == "a"
+        assert summary["meters"][0]["dropped_blocks"] == 4
+        assert summary["meters"][0]["input_overflows"] == 8
+        assert summary["meters"][0]["input_underflows"] == 12
+    finally:
+        sender.close()
+        receiver.stop()
+
+
+def test_tcp_frame_over_the_limit_closes_the_connection():
+    store = FleetStore(capacity=100)
+    server = TcpReceiver(store, ("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        sender = TelemetrySender(server.server_address, "tcp")
+        sender.send(encode_packet("a", make_records(3, start=time.time())))
+        assert wait_for(lambda: store.count == 3)
+        sender.close()
+
+        connection = socket.create_connection(server.server_address, timeout=5.0)
+        connection.sendall(FRAME.pack(MAX_FRAME + 1))
+        assert connection.recv(1) == b""
+        connection.close()
+        assert wait_for(lambda: store.stats()["rejected"] == 1)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_port_only_address_listens_on_every_interface():
+    store = FleetStore(capacity=100)
+    receiver = UdpReceiver(store, parse_address(":0", 9750))
+    receiver.start()
+    assert receiver.address[0] in ("0.0.0.0", "::")
+    loopback = "127.0.0.1" if receiver.address[0] == "0.0.0.0" else "::1"
+    sender = TelemetrySender((loopback, receiver.address[1]), "udp")
+    try:
+        sender.send(encode_packet("a", make_records(2, start=time.time())))
+        assert wait_for(lambda: store.count == 2)
+    finally:
+        sender.close()
+        receiver.stop()
+
+
+@pytest.mark.skipif(not socket.has_ipv6, reason="no IPv6")
+def test_udp_over_ipv6():
+    store = FleetStore(capacity=100)
+    try:
+        receiver = UdpReceiver(store, parse_address("[::1]:0", 9750))
+    except OSError:
+        pytest.skip("IPv6 loopback unavailable")
+    receiver.start()
+    sender = TelemetrySender(parse_address(f"[::1]:{receiver.address[1]}", 9750), "udp")
+    try:
+        sender.send(encode_packet("v6", make_records(2, start=time.time())))
+        assert wait_for(lambda: store.count == 2)
+    finally:
+        sender.close()
+        receiver.stop()